@@ -0,0 +1,174 @@
+import time
+import heapq
+import asyncio
+import itertools
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Callable
+
+from .config import settings
+from .metrics import metrics
+from .profiling import record_stage
+
+# -------------------------------------------------
+# Admission control in front of the RAG pipeline.
+# - at most `max_inflight` requests run at once
+# - up to `max_queue` more wait, best priority first, each for at most
+#   `max_queue_seconds`
+# - anything beyond that is shed immediately (503 + Retry-After) rather
+#   than holding a socket until the upstream timeout
+# -------------------------------------------------
+
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+WAIT_BUCKETS = [0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0]
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Server busy ({reason}); retry in {retry_after}s.")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def parse_api_keys(raw: str) -> Dict[str, str]:
+    """"key1:high,key2:low" -> {"key1": "high", "key2": "low"} (unknown classes are ignored)."""
+    out: Dict[str, str] = {}
+    for item in (raw or "").split(","):
+        key, _, prio = item.strip().partition(":")
+        if key and prio.strip() in PRIORITIES:
+            out[key] = prio.strip()
+    return out
+
+
+def priority_for(api_key: Optional[str], requested: Optional[str]) -> str:
+    """
+    The API key decides the class; a client may only lower its own priority
+    with X-Priority (e.g. batch jobs sending "low").
+    """
+    prio = parse_api_keys(settings.admission_api_keys).get(api_key or "", settings.admission_default_priority)
+    if requested in PRIORITIES and PRIORITIES[requested] > PRIORITIES[prio]:
+        prio = requested
+    return prio
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        max_inflight: int,
+        max_queue: int,
+        max_queue_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_inflight = max_inflight
+        self.max_queue = max_queue
+        self.max_queue_seconds = max_queue_seconds
+        self._clock = clock
+        self.inflight = 0
+        # heap of [rank, seq, future]; entries whose future is done are stale
+        self._queue: List[list] = []
+        self._waiting = 0
+        self._seq = itertools.count()
+        self._avg_hold = 1.0   # EWMA of seconds a slot is held, for Retry-After
+
+    @property
+    def queue_length(self) -> int:
+        return self._waiting
+
+    def _publish(self):
+        metrics.set_gauge("admission_inflight", self.inflight)
+        metrics.set_gauge("admission_queue_length", self._waiting)
+
+    def retry_after(self) -> int:
+        """Rough time until a slot frees up for a newcomer, clamped to 1..30 s."""
+        waves = (self._waiting + 1) / max(self.max_inflight, 1)
+        return int(min(30, max(1, round(self._avg_hold * waves))))
+
+    def _shed(self, priority: str, reason: str) -> AdmissionRejected:
+        metrics.inc("admission_shed_total", priority=priority, reason=reason)
+        return AdmissionRejected(reason, self.retry_after())
+
+    def _evict_worst(self, rank: int) -> bool:
+        """Make room for a better-priority request by shedding the worst waiter."""
+        live = [e for e in self._queue if not e[2].done()]
+        if not live:
+            return False
+        worst = max(live, key=lambda e: (e[0], e[1]))
+        if worst[0] <= rank:
+            return False
+        name = next(n for n, r in PRIORITIES.items() if r == worst[0])
+        worst[2].set_exception(self._shed(name, "evicted"))
+        self._queue.remove(worst)
+        heapq.heapify(self._queue)
+        self._waiting -= 1
+        return True
+
+    async def acquire(self, priority: str = "normal") -> float:
+        """Wait for a slot; returns the seconds spent queued. Raises AdmissionRejected."""
+        rank = PRIORITIES.get(priority, PRIORITIES["normal"])
+        if self.inflight < self.max_inflight and not self._waiting:
+            self.inflight += 1
+            self._publish()
+            metrics.observe("admission_wait_seconds", 0.0, buckets=WAIT_BUCKETS, priority=priority)
+            return 0.0
+
+        if self._waiting >= self.max_queue and not self._evict_worst(rank):
+            raise self._shed(priority, "queue_full")
+
+        fut = asyncio.get_running_loop().create_future()
+        entry = [rank, next(self._seq), fut]
+        heapq.heappush(self._queue, entry)
+        self._waiting += 1
+        self._publish()
+        start = self._clock()
+        try:
+            await asyncio.wait_for(fut, timeout=self.max_queue_seconds)
+        except asyncio.TimeoutError:
+            self._waiting -= 1
+            self._publish()
+            raise self._shed(priority, "timeout")
+        except asyncio.CancelledError:
+            # client went away while queued; if a slot was handed over meanwhile, pass it on
+            if fut.done() and not fut.cancelled():
+                if fut.exception() is None:
+                    self.release()
+            else:
+                self._waiting -= 1
+                self._publish()
+            raise
+        waited = self._clock() - start
+        metrics.observe("admission_wait_seconds", waited, buckets=WAIT_BUCKETS, priority=priority)
+        record_stage("admission_wait", waited)
+        return waited
+
+    def release(self, held_seconds: Optional[float] = None):
+        """Hand the slot to the best waiter, or free it."""
+        if held_seconds is not None:
+            self._avg_hold = 0.8 * self._avg_hold + 0.2 * held_seconds
+        while self._queue:
+            _, _, fut = heapq.heappop(self._queue)
+            if fut.done():
+                continue
+            self._waiting -= 1
+            fut.set_result(True)   # slot ownership moves; inflight unchanged
+            self._publish()
+            return
+        self.inflight -= 1
+        self._publish()
+
+    @asynccontextmanager
+    async def slot(self, priority: str = "normal"):
+        if not settings.admission_enabled:
+            yield
+            return
+        await self.acquire(priority)
+        start = self._clock()
+        try:
+            yield
+        finally:
+            self.release(self._clock() - start)
+
+
+admission = AdmissionController(
+    settings.admission_max_inflight,
+    settings.admission_max_queue,
+    settings.admission_max_queue_seconds,
+)
@@ -0,0 +1,265 @@
+import os
+import json
+import base64
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from .config import settings
+from .vectorstore import vector_store
+from .routing import route_models
+from .utils_chunk import domain_content_hash
+from .utils_query import ORDINAL_WORDS, extract_entities, normalize_query
+
+STORE_FORMAT = 1
+
+# -------------------------------------------------
+# 1. Canonical question catalogue
+#    Every key is one "closed" question of the domain.
+#    Each key expands to several phrasings; the first one is
+#    the phrasing the answer is generated from.
+# -------------------------------------------------
+
+PLANETS = ["Sun", "Moon", "Mars", "Mercury", "Venus", "Jupiter", "Saturn", "Rahu", "Ketu"]
+
+HOUSE_TEMPLATES = [
+    "What does the {ordinal} house represent?",
+    "What is the meaning of the {ordinal_word} house in Vedic astrology?",
+    "Explain house {n}.",
+]
+PLANET_TEMPLATES = [
+    "What does {planet} represent in Vedic astrology?",
+    "What is the significance of {planet}?",
+]
+PLANET_IN_HOUSE_TEMPLATES = [
+    "What does {planet} in the {ordinal} house mean?",
+    "What happens if {planet} is in the {ordinal_word} house?",
+]
+HOUSE_GEMSTONE_TEMPLATES = [
+    "Which gemstone is recommended for the {ordinal} house?",
+    "What is the gemstone for house {n}?",
+]
+PLANET_GEMSTONE_TEMPLATES = [
+    "What is the gemstone for {planet}?",
+    "Which gemstone should I wear for {planet}?",
+]
+HOUSE_LORD_TEMPLATES = [
+    "Who is the lord of the {ordinal} house?",
+    "Which planet rules the {ordinal_word} house?",
+]
+
+_WORD_FOR_NUMBER = {n: w for w, n in ORDINAL_WORDS.items()}
+
+
+def _ordinal(n: int) -> str:
+    if 10 <= n % 100 <= 20:
+        suffix = "th"
+    else:
+        suffix = {1: "st", 2: "nd", 3: "rd"}.get(n % 10, "th")
+    return f"{n}{suffix}"
+
+
+def _expand(templates: List[str], **kw) -> List[str]:
+    return [t.format(**kw) for t in templates]
+
+
+def build_catalogue() -> List[Dict[str, Any]]:
+    """
+    Template-expanded catalogue of canonical questions:
+    12 houses, 9 planets, 108 planet-in-house combinations,
+    house and planet gemstones, and house lords.
+
+    Each item:
+    {
+      "key": "planet_in_house:1:Sun",
+      "entities": {"planets": [...], "houses": [...], "intents": [...]},
+      "questions": ["What does Sun in the 1st house mean?", ...]
+    }
+    """
+    items: List[Dict[str, Any]] = []
+
+    def add(key: str, planets: List[str], houses: List[int], intents: List[str], questions: List[str]):
+        items.append({
+            "key": key,
+            "entities": {"planets": planets, "houses": houses, "intents": intents},
+            "questions": questions,
+        })
+
+    for n in range(1, 13):
+        kw = {"n": n, "ordinal": _ordinal(n), "ordinal_word": _WORD_FOR_NUMBER[n]}
+        add(f"house:{n}", [], [n], [], _expand(HOUSE_TEMPLATES, **kw))
+        add(f"house_gemstone:{n}", [], [n], ["gemstone"], _expand(HOUSE_GEMSTONE_TEMPLATES, **kw))
+        add(f"house_lord:{n}", [], [n], ["lord"], _expand(HOUSE_LORD_TEMPLATES, **kw))
+        for planet in PLANETS:
+            add(
+                f"planet_in_house:{n}:{planet}", [planet], [n], [],
+                _expand(PLANET_IN_HOUSE_TEMPLATES, planet=planet, **kw),
+            )
+
+    for planet in PLANETS:
+        add(f"planet:{planet}", [planet], [], [], _expand(PLANET_TEMPLATES, planet=planet))
+        add(
+            f"planet_gemstone:{planet}", [planet], [], ["gemstone"],
+            _expand(PLANET_GEMSTONE_TEMPLATES, planet=planet),
+        )
+
+    return items
+
+
+def _same_entities(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    return (
+        set(a.get("planets", [])) == set(b.get("planets", []))
+        and set(a.get("houses", [])) == set(b.get("houses", []))
+        and set(a.get("intents", [])) == set(b.get("intents", []))
+    )
+
+
+def encode_vector(vec: List[float]) -> str:
+    return base64.b64encode(np.asarray(vec, dtype=np.float32).tobytes()).decode("ascii")
+
+
+def decode_vector(raw: str) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(raw), dtype=np.float32)
+
+
+# -------------------------------------------------
+# 2. The store itself
+# -------------------------------------------------
+
+class AnswerStore:
+    """
+    Read side of the precomputed answer store (see app/precompute.py for the batch job).
+
+    File layout (JSON):
+    {
+      "format": 1,
+      "version": "<domain content hash>",
+      "chat_models": {"<tier>": "<model>", ...},   # routing.route_models() at build time
+      "embedding_model": "...",
+      "built_at": "...",
+      "entries": {
+        "<key>": {"question", "answer", "chunk_ids", "preview", "k", "route", "model", "entities", "entry_version"}
+      },
+      "phrasings": [{"text": "...", "key": "...", "embedding": "<base64 float32>"}]
+    }
+
+    A store built from other domain content or other models is ignored,
+    so a stale answer is never served.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._mtime: Optional[float] = None
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._by_text: Dict[str, str] = {}
+        self._phrase_keys: List[str] = []
+        self._matrix: Optional[np.ndarray] = None
+
+    def _reset(self):
+        self._entries = {}
+        self._by_text = {}
+        self._phrase_keys = []
+        self._matrix = None
+
+    def _refresh(self):
+        """Reload the file when it changed on disk (cheap stat otherwise)."""
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            self._mtime = None
+            self._reset()
+            return
+        if mtime == self._mtime:
+            return
+        self._mtime = mtime
+        self._reset()
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+        if not self.is_current(raw):
+            print(f"[ANSWER_STORE] Ignoring stale store at {self.path}")
+            return
+
+        self._entries = raw.get("entries", {})
+        vectors = []
+        for ph in raw.get("phrasings", []):
+            if ph["key"] not in self._entries:
+                continue
+            self._by_text[normalize_query(ph["text"])] = ph["key"]
+            if ph.get("embedding"):
+                self._phrase_keys.append(ph["key"])
+                vectors.append(decode_vector(ph["embedding"]))
+        if vectors:
+            matrix = np.vstack(vectors)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            self._matrix = matrix / np.where(norms == 0, 1.0, norms)
+
+    @staticmethod
+    def is_current(raw: Optional[Dict[str, Any]]) -> bool:
+        return bool(raw) and (
+            raw.get("format") == STORE_FORMAT
+            and raw.get("version") == domain_content_hash()
+            and raw.get("chat_models") == route_models()
+            and raw.get("embedding_model") == vector_store.provider.model
+        )
+
+    def read_raw(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, payload: Dict[str, Any]):
+        """Atomic write: readers see either the old or the new store, never half of one."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def __len__(self) -> int:
+        self._refresh()
+        return len(self._entries)
+
+    def match_key(self, query: str) -> Optional[Dict[str, Any]]:
+        self._refresh()
+        key = self._by_text.get(normalize_query(query))
+        return self._entries.get(key) if key else None
+
+    def match_embedding(self, query: str, query_emb: np.ndarray) -> Optional[Dict[str, Any]]:
+        """
+        Nearest canonical phrasing by cosine similarity. Only accepted when it is
+        above answer_store_min_similarity AND it names the same planets/houses/intents
+        as the query ("Sun in 1st" and "Sun in 2nd" embed very close together).
+        """
+        self._refresh()
+        if self._matrix is None:
+            return None
+        q = np.asarray(query_emb, dtype=np.float32)
+        if q.shape[0] != self._matrix.shape[1]:
+            return None
+        q_norm = float(np.linalg.norm(q)) or 1.0
+        sims = self._matrix @ (q / q_norm)
+        best = int(np.argmax(sims))
+        if float(sims[best]) < settings.answer_store_min_similarity:
+            return None
+        entry = self._entries[self._phrase_keys[best]]
+        if not _same_entities(extract_entities(query), entry.get("entities", {})):
+            return None
+        return entry
+
+    async def lookup(self, query: str) -> Tuple[Optional[Dict[str, Any]], Optional[np.ndarray]]:
+        """
+        Returns (entry or None, query embedding or None).
+        The embedding is only computed when the store can use it; callers pass it on
+        to retrieval so a miss does not cost a second embedding call.
+        """
+        entry = self.match_key(query)
+        if entry is not None or self._matrix is None:
+            return entry, None
+        query_emb = await vector_store.embed_query(query)
+        return self.match_embedding(query, query_emb), query_emb
+
+
+answer_store = AnswerStore(settings.answer_store_path)
@@ -0,0 +1,198 @@
+import os
+import gzip
+import time
+import queue
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Any, Iterator, List, Optional
+
+import orjson
+from fastapi import HTTPException
+
+from .config import settings
+from .metrics import metrics
+from .models_openai import collect_usage
+from .profiling import collect_stages
+
+# -------------------------------------------------
+# Opt-in traffic capture of /chat/rag (CAPTURE_ENABLED).
+# Each request becomes one JSON record:
+#   ts, endpoint, request (the body as sent), status, latency_s,
+#   stages_s (embedding/search/generation/...), ids (retrieved chunks), k, degraded,
+#   usage (prompt / cached / completion tokens of the chat calls)
+# The request path only puts the record on a bounded queue (dropped, and
+# counted in capture_dropped_total, when the writer falls behind); a
+# background thread appends batches to CAPTURE_DIR/capture-<utc>.jsonl.gz,
+# one gzip member per batch, so a crash loses at most the current batch.
+# The log rotates at CAPTURE_MAX_BYTES and keeps CAPTURE_MAX_FILES files.
+# Replay with `python -m app.replay` (app/replay.py).
+# -------------------------------------------------
+
+CAPTURE_PREFIX = "capture-"
+CAPTURE_SUFFIX = ".jsonl.gz"
+WRITE_BATCH = 512
+
+
+def capture_files(directory: str) -> List[str]:
+    """Capture logs in `directory`, oldest first."""
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return []
+    return sorted(
+        os.path.join(directory, n) for n in names if n.startswith(CAPTURE_PREFIX) and n.endswith(CAPTURE_SUFFIX)
+    )
+
+
+def read_capture(path: str) -> Iterator[Dict[str, Any]]:
+    """Records of one capture log, or of every log in a directory, in capture order."""
+    paths = capture_files(path) if os.path.isdir(path) else [path]
+    for p in paths:
+        try:
+            with gzip.open(p, "rb") as f:
+                for line in f:
+                    if line.strip():
+                        yield orjson.loads(line)
+        except EOFError:
+            # last member cut short (process killed mid-write); earlier records are intact
+            print(f"[CAPTURE] {p} ends with an incomplete batch; skipped it.")
+
+
+class CaptureWriter:
+    """Bounded queue + one daemon thread appending compressed batches."""
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int,
+        max_files: int,
+        queue_size: int,
+        flush_seconds: float,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.flush_seconds = flush_seconds
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.path: Optional[str] = None
+
+    def submit(self, record: Dict[str, Any]) -> bool:
+        """Queue a record without blocking; False (and counted) when the queue is full."""
+        if self._thread is None:
+            self.start()
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            metrics.inc("capture_dropped_total")
+            return False
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="traffic-capture", daemon=True)
+                self._thread.start()
+
+    def close(self, timeout: float = 5.0):
+        """Write what is queued and stop the thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout)
+
+    def _run(self):
+        stop = False
+        while not stop:
+            try:
+                first = self._queue.get(timeout=self.flush_seconds)
+            except queue.Empty:
+                continue
+            batch = []
+            item = first
+            while True:
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+                if len(batch) >= WRITE_BATCH:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    self._write(batch)
+                except OSError as e:
+                    metrics.inc("capture_dropped_total", len(batch))
+                    print(f"[CAPTURE] Could not write {len(batch)} records: {e}")
+
+    def _write(self, batch: List[Dict[str, Any]]):
+        if self.path is None or not os.path.exists(self.path) or os.path.getsize(self.path) >= self.max_bytes:
+            self._rotate()
+        payload = b"".join(orjson.dumps(r) + b"\n" for r in batch)
+        with open(self.path, "ab") as f:
+            f.write(gzip.compress(payload))
+        metrics.inc("capture_records_total", len(batch))
+
+    def _rotate(self):
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        self.path = os.path.join(self.directory, f"{CAPTURE_PREFIX}{stamp}{CAPTURE_SUFFIX}")
+        files = capture_files(self.directory)
+        for old in files[:max(0, len(files) + 1 - self.max_files)]:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+
+capture_writer = CaptureWriter(
+    settings.capture_dir,
+    settings.capture_max_bytes,
+    settings.capture_max_files,
+    settings.capture_queue_size,
+    settings.capture_flush_seconds,
+)
+
+
+@contextmanager
+def capture_request(endpoint: str, body: Any):
+    """
+    Wrap one request. Yields a dict the endpoint fills with "ids" (and
+    "k", "degraded"); status, latency, stage timings and token usage are added on exit.
+    A no-op beyond an empty dict when capture is off.
+    """
+    record: Dict[str, Any] = {}
+    if not settings.capture_enabled:
+        yield record
+        return
+    ts = time.time()
+    t0 = time.perf_counter()
+    status = 200
+    with collect_stages() as stages, collect_usage() as usage:
+        try:
+            yield record
+        except HTTPException as e:
+            status = e.status_code
+            raise
+        except Exception:
+            status = 500
+            raise
+        finally:
+            capture_writer.submit({
+                "ts": ts,
+                "endpoint": endpoint,
+                "request": body.model_dump(exclude_none=True),
+                "status": status,
+                "latency_s": time.perf_counter() - t0,
+                "stages_s": dict(stages),
+                "ids": record.get("ids", []),
+                "k": record.get("k"),
+                "degraded": record.get("degraded", False),
+                "usage": dict(usage),
+            })
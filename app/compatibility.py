@@ -0,0 +1,260 @@
+import os
+import sys
+import json
+from typing import Dict, Any, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .config import settings
+from .ephemeris import PLANETS, compute_charts, parse_birth_time
+from .logic_interpret import load_house_lords_map
+from .utils_chunk import planet_key
+
+# -------------------------------------------------
+# Chart compatibility: one chart against many stored profiles.
+#
+# A chart is encoded as int8[9]: the house (1..12) of each planet in
+# PLANETS order, 0 when the planet is not placed. N profiles are one
+# (N, 9) int8 array (same layout as ephemeris.compute_charts()["houses"]),
+# i.e. 9 bytes per profile.
+#
+# score(a, b) = sum over planet pairs (p in a, q in b) sharing a house h of
+#     conjunction_weight * REL[p, q]
+#   + lord_weight * (LORD[h, p] + LORD[h, q])
+#
+# REL is the natural (naisargika) friendship of the two planets, LORD is
+# each planet's friendship with the natural lord of h (house_lords.json).
+# For a fixed chart a this collapses to a (13, 9) table, so scoring N
+# profiles is one gather + one row sum.
+# -------------------------------------------------
+
+HOUSE_LORDS_PATH = "app/domain/house_lords.json"
+
+FRIEND, NEUTRAL, ENEMY = 1.0, 0.0, -1.0
+
+# planet -> (friends, enemies); everything else is neutral
+NATURAL_RELATIONSHIPS = {
+    "Sun": (["Moon", "Mars", "Jupiter"], ["Venus", "Saturn", "Rahu", "Ketu"]),
+    "Moon": (["Sun", "Mercury"], ["Rahu", "Ketu"]),
+    "Mars": (["Sun", "Moon", "Jupiter", "Ketu"], ["Mercury", "Rahu"]),
+    "Mercury": (["Sun", "Venus", "Rahu"], ["Moon"]),
+    "Jupiter": (["Sun", "Moon", "Mars", "Ketu"], ["Mercury", "Venus", "Rahu"]),
+    "Venus": (["Mercury", "Saturn", "Rahu", "Ketu"], ["Sun", "Moon"]),
+    "Saturn": (["Mercury", "Venus", "Rahu", "Ketu"], ["Sun", "Moon", "Mars"]),
+    "Rahu": (["Mercury", "Venus", "Saturn"], ["Sun", "Moon", "Mars"]),
+    "Ketu": (["Mars", "Jupiter", "Venus"], ["Sun", "Moon"]),
+}
+
+_PLANET_INDEX = {p: i for i, p in enumerate(PLANETS)}
+
+
+def relationship_matrix() -> np.ndarray:
+    """
+    (9, 9) symmetric planet relationship: the mean of how p sees q and how q sees p.
+    A planet is its own friend.
+    """
+    rel = np.zeros((len(PLANETS), len(PLANETS)), dtype=np.float32)
+    for p, (friends, enemies) in NATURAL_RELATIONSHIPS.items():
+        i = _PLANET_INDEX[p]
+        for q in friends:
+            rel[i, _PLANET_INDEX[q]] = FRIEND
+        for q in enemies:
+            rel[i, _PLANET_INDEX[q]] = ENEMY
+    np.fill_diagonal(rel, FRIEND)
+    return (rel + rel.T) / 2.0
+
+
+def lord_matrix(house_lords_map: Dict[str, Any], rel: np.ndarray) -> np.ndarray:
+    """
+    (13, 9): row h = how each planet relates to the natural lord(s) of house h.
+    "Mars/Ketu" style co-lords are averaged. Row 0 (unplaced) stays zero.
+    """
+    out = np.zeros((13, len(PLANETS)), dtype=np.float32)
+    for hn, entry in house_lords_map.items():
+        lords = [_PLANET_INDEX[l.strip()] for l in entry["natural_lord"].split("/") if l.strip() in _PLANET_INDEX]
+        if lords:
+            out[int(hn)] = rel[:, lords].mean(axis=1)
+    return out
+
+
+class CompatibilityWeights:
+    """Precomputed relationship tables; build once, reuse for every query."""
+
+    def __init__(
+        self,
+        house_lords_map: Optional[Dict[str, Any]] = None,
+        conjunction_weight: Optional[float] = None,
+        lord_weight: Optional[float] = None,
+    ):
+        if house_lords_map is None:
+            house_lords_map = load_house_lords_map(HOUSE_LORDS_PATH)
+        self.conjunction_weight = settings.compat_conjunction_weight if conjunction_weight is None else conjunction_weight
+        self.lord_weight = settings.compat_lord_weight if lord_weight is None else lord_weight
+        self.rel = relationship_matrix()
+        self.lord = lord_matrix(house_lords_map, self.rel)
+
+    def table_for(self, chart: np.ndarray) -> np.ndarray:
+        """
+        (13, 9) gather table for one encoded chart: entry [h, q] is what a profile
+        planet q placed in house h adds to the score.
+        """
+        table = np.zeros((13, len(PLANETS)), dtype=np.float32)
+        for p, h in enumerate(chart):
+            if h == 0:
+                continue
+            table[h] += (
+                self.conjunction_weight * self.rel[p]
+                + self.lord_weight * (self.lord[h] + self.lord[h, p])
+            )
+        return table
+
+
+# -------------------------------------------------
+# Encoding
+# -------------------------------------------------
+
+_HOUSE_KEYS = {str(h): h for h in range(1, 13)}
+# "Ketu (South Node)" / "ketu" -> index, matched by key like rerank and routing
+_PLANET_KEYS = {planet_key(p): i for i, p in enumerate(PLANETS)}
+
+
+def encode_chart(houses: Dict[str, Union[str, List[str]]]) -> np.ndarray:
+    """
+    `houses` map (as consumed by interpret_chart) -> int8[9] planet -> house.
+    Planet names are matched by key ("ketu", "Ketu (South Node)" -> Ketu).
+    Raises ValueError for a house key other than "1".."12" or an unknown planet.
+    """
+    out = np.zeros(len(PLANETS), dtype=np.int8)
+    for house_num, occupants in houses.items():
+        house = _HOUSE_KEYS.get(str(house_num).strip())
+        if house is None:
+            raise ValueError(f"House must be 1..12, got {house_num!r}")
+        for planet in ([occupants] if isinstance(occupants, str) else occupants):
+            idx = _PLANET_KEYS.get(planet_key(planet))
+            if idx is None:
+                raise ValueError(f"Unknown planet {planet!r}; expected one of {', '.join(PLANETS)}")
+            out[idx] = house
+    return out
+
+
+def encode_charts(maps: Sequence[Dict[str, Union[str, List[str]]]]) -> np.ndarray:
+    out = np.zeros((len(maps), len(PLANETS)), dtype=np.int8)
+    for i, m in enumerate(maps):
+        out[i] = encode_chart(m)
+    return out
+
+
+def occupancy(charts: np.ndarray) -> np.ndarray:
+    """(N, 9) encoded charts -> (N, 12, 9) bool house x planet occupancy."""
+    charts = np.atleast_2d(charts)
+    return charts[:, None, :] == np.arange(1, 13, dtype=np.int8)[None, :, None]
+
+
+# -------------------------------------------------
+# Scoring
+# -------------------------------------------------
+
+def score_many(chart: np.ndarray, profiles: np.ndarray, weights: CompatibilityWeights) -> np.ndarray:
+    """One chart vs (N, 9) encoded profiles -> float32 scores (N,)."""
+    table = weights.table_for(chart)
+    return table[profiles, np.arange(len(PLANETS))].sum(axis=1)
+
+
+def top_n(scores: np.ndarray, n: int) -> np.ndarray:
+    """Indices of the n best scores, best first (argpartition, no full sort)."""
+    n = min(n, scores.shape[0])
+    if n <= 0:
+        return np.zeros(0, dtype=np.int64)
+    idx = np.argpartition(-scores, n - 1)[:n]
+    return idx[np.argsort(-scores[idx], kind="stable")]
+
+
+class ProfileIndex:
+    """
+    Stored profiles on disk as .npz: {"ids": str[N], "houses": int8[N, 9]}.
+    Reloaded when the file changes (same pattern as the answer store).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._mtime: Optional[float] = None
+        self.ids = np.zeros(0, dtype=str)
+        self.houses = np.zeros((0, len(PLANETS)), dtype=np.int8)
+
+    def _refresh(self):
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            self._mtime = None
+            self.ids = np.zeros(0, dtype=str)
+            self.houses = np.zeros((0, len(PLANETS)), dtype=np.int8)
+            return
+        if mtime == self._mtime:
+            return
+        with np.load(self.path, allow_pickle=False) as data:
+            self.ids = data["ids"]
+            self.houses = data["houses"].astype(np.int8, copy=False)
+        self._mtime = mtime
+        print(f"[COMPAT] Loaded {len(self.ids)} profiles from {self.path}")
+
+    def __len__(self) -> int:
+        self._refresh()
+        return len(self.ids)
+
+    def save(self, ids: Sequence[str], houses: np.ndarray):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = f"{self.path}.tmp.npz"
+        np.savez(tmp, ids=np.asarray(ids, dtype=str), houses=np.asarray(houses, dtype=np.int8))
+        os.replace(tmp, self.path)
+
+    def rank(self, chart: np.ndarray, n: int, weights: CompatibilityWeights) -> List[Tuple[str, float]]:
+        self._refresh()
+        if not len(self.ids):
+            return []
+        scores = score_many(chart, self.houses, weights)
+        return [(str(self.ids[i]), float(scores[i])) for i in top_n(scores, n)]
+
+
+def profiles_from_records(records: List[Dict[str, Any]]) -> Tuple[List[str], np.ndarray]:
+    """
+    Records carry either a `houses` map or dob/lat/long; the birth-data ones are
+    computed together in one vectorized ephemeris call.
+    """
+    ids = [str(r["id"]) for r in records]
+    houses = np.zeros((len(records), len(PLANETS)), dtype=np.int8)
+    births = [i for i, r in enumerate(records) if not r.get("houses")]
+    for i, r in enumerate(records):
+        if r.get("houses"):
+            houses[i] = encode_chart(r["houses"])
+    if births:
+        chart = compute_charts(
+            np.array([parse_birth_time(records[i]["dob"]) for i in births]),
+            np.array([float(records[i]["lat"]) for i in births]),
+            np.array([float(records[i]["long"]) for i in births]),
+        )
+        houses[births] = chart["houses"]
+    return ids, houses
+
+
+profile_index = ProfileIndex(settings.compat_profiles_path)
+
+
+# -------------------------------------------------
+# Import stored profiles:
+#   python -m app.compatibility --import profiles.json
+# profiles.json: [{"id": "...", "houses": {...}} | {"id", "dob", "lat", "long"}]
+# -------------------------------------------------
+
+def _main(argv: List[str]):
+    if "--import" not in argv:
+        print("usage: python -m app.compatibility --import <profiles.json>")
+        return
+    with open(argv[argv.index("--import") + 1], "r", encoding="utf-8") as f:
+        records = json.load(f)
+    ids, houses = profiles_from_records(records)
+    profile_index.save(ids, houses)
+    print(f"[COMPAT] Stored {len(ids)} profiles at {profile_index.path}")
+
+
+if __name__ == "__main__":
+    _main(sys.argv[1:])
@@ -15,6 +15,11 @@ class Settings(BaseModel):
         default="text-embedding-3-large",
         description="Embedding model for semantic retrieval"
     )
+    embedding_provider: str = Field(
+        default="openai",
+        description="Embedding provider for NEW collections: 'openai' (remote) or 'local' (offline hashing)"
+    )
+    local_embedding_dim: int = Field(default=512, description="Dimension of the local hashing embeddings")
     chroma_persist_dir: str = Field(
         default="./chroma_storage",
         description="Local directory where ChromaDB persists the collection"
@@ -28,16 +33,244 @@ class Settings(BaseModel):
         default=4000,
         description="Hard cap on combined retrieved context passed to LLM"
     )
+    context_tier_width: float = Field(
+        default=0.1,
+        description="Distance bucket of a relevance tier; chunks in one tier go into the prompt in ID order (0 = rank order)"
+    )
+    answer_store_enabled: bool = Field(
+        default=True,
+        description="Serve precomputed answers for canonical questions when available"
+    )
+    answer_store_path: str = Field(
+        default="./chroma_storage/precomputed_answers.json",
+        description="JSON file holding the precomputed canonical answer store"
+    )
+    answer_store_min_similarity: float = Field(
+        default=0.93,
+        description="Minimum cosine similarity for an embedding match against the answer store"
+    )
+    routing_enabled: bool = Field(
+        default=True,
+        description="Route each query to a model tier; when off every query uses the standard tier"
+    )
+    route_lookup_model: str = Field(
+        default="gpt-4o-mini",
+        description="Small, fast model for single-entity lookup questions"
+    )
+    route_lookup_max_tokens: int = Field(default=300, description="Completion cap for the lookup tier")
+    route_standard_model: str = Field(
+        default="gpt-4o-mini",
+        description="Model for ordinary questions (defaults to OPENAI_CHAT_MODEL)"
+    )
+    route_standard_max_tokens: int = Field(default=600, description="Completion cap for the standard tier")
+    route_complex_model: str = Field(
+        default="gpt-4o-mini",
+        description="Model for multi-house / comparative questions (defaults to OPENAI_CHAT_MODEL)"
+    )
+    route_complex_max_tokens: int = Field(default=900, description="Completion cap for the complex tier")
+    rerank_enabled: bool = Field(
+        default=True,
+        description="Over-fetch candidates and rerank them locally before building the context"
+    )
+    rerank_overfetch: int = Field(
+        default=4,
+        description="Candidates fetched from Chroma = top_k * rerank_overfetch"
+    )
+    rerank_keep: int = Field(default=3, description="Chunks passed to the LLM after reranking")
+    adaptive_k_enabled: bool = Field(
+        default=True,
+        description="Choose how many chunks to keep per query from the distance profile instead of a fixed count"
+    )
+    adaptive_min_k: int = Field(default=1, description="Fewest chunks kept by adaptive depth")
+    adaptive_max_k: int = Field(default=5, description="Most chunks kept by adaptive depth")
+    adaptive_max_distance: float = Field(
+        default=0.9, description="Candidates farther than this (cosine distance) are cut"
+    )
+    adaptive_jump: float = Field(
+        default=2.0,
+        description="Cut where the distance gap to the previous candidate exceeds this many times the average gap"
+    )
+    retrieval_granularity: str = Field(
+        default="record",
+        description="'record': search whole records; 'parent': search field sub-chunks, return their records; "
+                    "'fields': search field sub-chunks, return only the matched fields of each record"
+    )
+    graph_expansion_enabled: bool = Field(
+        default=True,
+        description="Add the house / planet / house-lord chunks linked to retrieved planet-in-house chunks (ID lookup)"
+    )
+    graph_expansion_max: int = Field(default=3, description="Most linked chunks added per question")
+    query_expansion_enabled: bool = Field(
+        default=False, description="Search with rule-based rewrites of the question too, fused by rank"
+    )
+    query_expansion_max: int = Field(default=2, description="Max extra query variants per question")
+    session_max: int = Field(default=1000, description="Max live chat sessions kept in memory (LRU beyond)")
+    session_ttl_seconds: float = Field(default=1800.0, description="Idle time after which a session expires")
+    session_max_chunks: int = Field(default=24, description="Retrieved chunks cached per session for reuse")
+    session_max_turns: int = Field(default=6, description="Turns kept for the rolling summary")
+    session_summary_chars: int = Field(
+        default=600,
+        description="Hard cap on the rolling conversation summary sent with each turn"
+    )
+    compat_profiles_path: str = Field(
+        default="./chroma_storage/profiles.npz",
+        description="Stored chart profiles (ids + house occupancy) ranked by /chart/compatibility"
+    )
+    compat_conjunction_weight: float = Field(
+        default=1.0, description="Weight of the planet-relationship term for planets sharing a house"
+    )
+    compat_lord_weight: float = Field(
+        default=0.5, description="Weight of the planets' relationship to the shared house's natural lord"
+    )
+    compat_max_top_n: int = Field(default=100, description="Upper bound on matches returned per request")
+    dasha_batch_max: int = Field(default=10000, description="Max people per /chart/dasha request")
+    request_deadline_seconds: float = Field(
+        default=20.0, description="Default end-to-end budget of a chat request (X-Request-Timeout-Ms overrides)"
+    )
+    request_deadline_max_seconds: float = Field(
+        default=60.0, description="Upper bound on a client-supplied request budget"
+    )
+    deadline_min_generation_seconds: float = Field(
+        default=1.5,
+        description="Below this much remaining budget generation is not started; the extractive answer is returned"
+    )
+    admission_enabled: bool = Field(default=True, description="Cap concurrent RAG requests and shed overload")
+    admission_max_inflight: int = Field(default=16, description="RAG requests running at once per worker")
+    admission_max_queue: int = Field(default=64, description="Requests allowed to wait for a slot")
+    admission_max_queue_seconds: float = Field(
+        default=10.0, description="Longest a request waits for a slot before it is shed"
+    )
+    admission_api_keys: str = Field(
+        default="", description="Priority per API key (X-API-Key), e.g. 'key1:high,key2:low'"
+    )
+    admission_default_priority: str = Field(
+        default="normal", description="Priority class for requests without a known API key"
+    )
+    admin_token: str = Field(
+        default="", description="Required in X-Admin-Token for /admin routes; admin routes are off when empty"
+    )
+    reindex_batch_size: int = Field(default=32, description="Chunks embedded and written per re-ingestion step")
+    reindex_smoke_queries: int = Field(
+        default=5, description="Chunks used as self-retrieval smoke queries before a new version goes live"
+    )
+    reindex_keep_versions: int = Field(
+        default=2, description="Previous collection versions kept for rollback by garbage collection"
+    )
+    snapshot_path: str = Field(
+        default="snapshots/index.npz", description="Index snapshot written by --export and loaded at startup"
+    )
+    snapshot_load_on_startup: bool = Field(
+        default=True, description="Import the snapshot at startup when the active collection is empty"
+    )
+    profiling_enabled: bool = Field(default=False, description="Allow per-request profiling (X-Profile or sampling)")
+    profile_sample_rate: float = Field(default=0.0, description="Share of requests profiled without X-Profile")
+    profile_dir: str = Field(default="profiles", description="Where request profiles are written")
+    profile_max_files: int = Field(default=50, description="Newest profiles kept; older ones are deleted")
+    profile_interval: float = Field(default=0.001, description="Profiler sampling interval in seconds")
+    capture_enabled: bool = Field(default=False, description="Record /chat/rag traffic for replay")
+    capture_dir: str = Field(default="captures", description="Where traffic capture logs are written")
+    capture_max_bytes: int = Field(
+        default=16 * 1024 * 1024, description="Compressed size at which the capture log rotates to a new file"
+    )
+    capture_max_files: int = Field(default=20, description="Newest capture logs kept; older ones are deleted")
+    capture_queue_size: int = Field(
+        default=10000, description="Records buffered for the background writer; beyond that they are dropped"
+    )
+    capture_flush_seconds: float = Field(default=1.0, description="Longest a captured record waits to be written")
+    upstream_stub: bool = Field(
+        default=False, description="Answer from a local stub instead of the chat model (load tests, replay)"
+    )
+    upstream_stub_latency: float = Field(default=0.8, description="Simulated generation time of the stub, seconds")
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    raw = os.getenv(name)
+    if raw is None:
+        return default
+    return raw.strip().lower() in ("1", "true", "yes", "on")
 
 
 def get_settings() -> Settings:
+    chroma_persist_dir = os.getenv("CHROMA_PERSIST_DIR", "./chroma_storage")
+    chat_model = os.getenv("OPENAI_CHAT_MODEL", "gpt-4o-mini")
     return Settings(
         OPENAI_API_KEY=os.getenv("OPENAI_API_KEY"),
         # Allow overriding models via env vars if provided
-        openai_chat_model=os.getenv("OPENAI_CHAT_MODEL", "gpt-4o-mini"),
+        openai_chat_model=chat_model,
         openai_embedding_model=os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-large"),
-        chroma_persist_dir=os.getenv("CHROMA_PERSIST_DIR", "./chroma_storage"),
+        embedding_provider=os.getenv("EMBEDDING_PROVIDER", "openai"),
+        local_embedding_dim=int(os.getenv("LOCAL_EMBEDDING_DIM", "512")),
+        chroma_persist_dir=chroma_persist_dir,
         chroma_collection=os.getenv("CHROMA_COLLECTION", "astrology_knowledge"),
+        top_k=int(os.getenv("TOP_K", "5")),
+        context_tier_width=float(os.getenv("CONTEXT_TIER_WIDTH", "0.1")),
+        # The answer store lives next to the index it was generated from
+        answer_store_enabled=_env_bool("ANSWER_STORE_ENABLED", True),
+        answer_store_path=os.getenv(
+            "ANSWER_STORE_PATH", os.path.join(chroma_persist_dir, "precomputed_answers.json")
+        ),
+        answer_store_min_similarity=float(os.getenv("ANSWER_STORE_MIN_SIMILARITY", "0.93")),
+        # Model tiers; standard/complex follow OPENAI_CHAT_MODEL unless set explicitly
+        routing_enabled=_env_bool("ROUTING_ENABLED", True),
+        route_lookup_model=os.getenv("ROUTE_LOOKUP_MODEL", "gpt-4o-mini"),
+        route_lookup_max_tokens=int(os.getenv("ROUTE_LOOKUP_MAX_TOKENS", "300")),
+        route_standard_model=os.getenv("ROUTE_STANDARD_MODEL", chat_model),
+        route_standard_max_tokens=int(os.getenv("ROUTE_STANDARD_MAX_TOKENS", "600")),
+        route_complex_model=os.getenv("ROUTE_COMPLEX_MODEL", chat_model),
+        route_complex_max_tokens=int(os.getenv("ROUTE_COMPLEX_MAX_TOKENS", "900")),
+        rerank_enabled=_env_bool("RERANK_ENABLED", True),
+        rerank_overfetch=int(os.getenv("RERANK_OVERFETCH", "4")),
+        rerank_keep=int(os.getenv("RERANK_KEEP", "3")),
+        adaptive_k_enabled=_env_bool("ADAPTIVE_K_ENABLED", True),
+        adaptive_min_k=int(os.getenv("ADAPTIVE_MIN_K", "1")),
+        adaptive_max_k=int(os.getenv("ADAPTIVE_MAX_K", "5")),
+        adaptive_max_distance=float(os.getenv("ADAPTIVE_MAX_DISTANCE", "0.9")),
+        adaptive_jump=float(os.getenv("ADAPTIVE_JUMP", "2.0")),
+        retrieval_granularity=os.getenv("RETRIEVAL_GRANULARITY", "record"),
+        graph_expansion_enabled=_env_bool("GRAPH_EXPANSION_ENABLED", True),
+        graph_expansion_max=int(os.getenv("GRAPH_EXPANSION_MAX", "3")),
+        query_expansion_enabled=_env_bool("QUERY_EXPANSION_ENABLED", False),
+        query_expansion_max=int(os.getenv("QUERY_EXPANSION_MAX", "2")),
+        session_max=int(os.getenv("SESSION_MAX", "1000")),
+        session_ttl_seconds=float(os.getenv("SESSION_TTL_SECONDS", "1800")),
+        session_max_chunks=int(os.getenv("SESSION_MAX_CHUNKS", "24")),
+        session_max_turns=int(os.getenv("SESSION_MAX_TURNS", "6")),
+        session_summary_chars=int(os.getenv("SESSION_SUMMARY_CHARS", "600")),
+        compat_profiles_path=os.getenv(
+            "COMPAT_PROFILES_PATH", os.path.join(chroma_persist_dir, "profiles.npz")
+        ),
+        compat_conjunction_weight=float(os.getenv("COMPAT_CONJUNCTION_WEIGHT", "1.0")),
+        compat_lord_weight=float(os.getenv("COMPAT_LORD_WEIGHT", "0.5")),
+        compat_max_top_n=int(os.getenv("COMPAT_MAX_TOP_N", "100")),
+        dasha_batch_max=int(os.getenv("DASHA_BATCH_MAX", "10000")),
+        request_deadline_seconds=float(os.getenv("REQUEST_DEADLINE_SECONDS", "20")),
+        request_deadline_max_seconds=float(os.getenv("REQUEST_DEADLINE_MAX_SECONDS", "60")),
+        deadline_min_generation_seconds=float(os.getenv("DEADLINE_MIN_GENERATION_SECONDS", "1.5")),
+        admission_enabled=_env_bool("ADMISSION_ENABLED", True),
+        admission_max_inflight=int(os.getenv("ADMISSION_MAX_INFLIGHT", "16")),
+        admission_max_queue=int(os.getenv("ADMISSION_MAX_QUEUE", "64")),
+        admission_max_queue_seconds=float(os.getenv("ADMISSION_MAX_QUEUE_SECONDS", "10")),
+        admission_api_keys=os.getenv("ADMISSION_API_KEYS", ""),
+        admission_default_priority=os.getenv("ADMISSION_DEFAULT_PRIORITY", "normal"),
+        admin_token=os.getenv("ADMIN_TOKEN", ""),
+        reindex_batch_size=int(os.getenv("REINDEX_BATCH_SIZE", "32")),
+        reindex_smoke_queries=int(os.getenv("REINDEX_SMOKE_QUERIES", "5")),
+        reindex_keep_versions=int(os.getenv("REINDEX_KEEP_VERSIONS", "2")),
+        snapshot_path=os.getenv("SNAPSHOT_PATH", "snapshots/index.npz"),
+        snapshot_load_on_startup=_env_bool("SNAPSHOT_LOAD_ON_STARTUP", True),
+        profiling_enabled=_env_bool("PROFILING_ENABLED", False),
+        profile_sample_rate=float(os.getenv("PROFILE_SAMPLE_RATE", "0")),
+        profile_dir=os.getenv("PROFILE_DIR", "profiles"),
+        profile_max_files=int(os.getenv("PROFILE_MAX_FILES", "50")),
+        profile_interval=float(os.getenv("PROFILE_INTERVAL", "0.001")),
+        capture_enabled=_env_bool("CAPTURE_ENABLED", False),
+        capture_dir=os.getenv("CAPTURE_DIR", "captures"),
+        capture_max_bytes=int(os.getenv("CAPTURE_MAX_BYTES", str(16 * 1024 * 1024))),
+        capture_max_files=int(os.getenv("CAPTURE_MAX_FILES", "20")),
+        capture_queue_size=int(os.getenv("CAPTURE_QUEUE_SIZE", "10000")),
+        capture_flush_seconds=float(os.getenv("CAPTURE_FLUSH_SECONDS", "1.0")),
+        upstream_stub=_env_bool("UPSTREAM_STUB", False),
+        upstream_stub_latency=float(os.getenv("UPSTREAM_STUB_LATENCY", "0.8")),
     )
 
 
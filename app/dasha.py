@@ -0,0 +1,202 @@
+from typing import Dict, Any, List, Optional, Union
+
+import numpy as np
+
+from .ephemeris import julian_day, sidereal_longitudes
+from .logic_interpret import PLANET_ARCHETYPES
+
+# -------------------------------------------------
+# Vimshottari dasha, vectorized over many people.
+#
+# The Moon's nakshatra at birth picks the first mahadasha lord; the part
+# of the nakshatra the Moon has already crossed is the part of that
+# mahadasha already spent before birth. The nine lords then follow in a
+# fixed 120-year cycle. Each mahadasha of lord M is split into nine
+# antardashas starting with M, each lasting years(M) * years(sub) / 120.
+#
+# Everything below works on arrays: N people are N rows, and the
+# per-lord cycles are small (9, 9) lookup tables.
+# -------------------------------------------------
+
+DASHA_SEQUENCE = ["Ketu", "Venus", "Sun", "Moon", "Mars", "Rahu", "Jupiter", "Saturn", "Mercury"]
+DASHA_YEARS = np.array([7, 20, 6, 10, 7, 18, 16, 19, 17], dtype=np.float64)
+CYCLE_YEARS = 120.0
+YEAR_SECONDS = 365.25 * 86400.0   # Julian year, the usual Vimshottari convention
+
+NAKSHATRAS = [
+    "Ashwini", "Bharani", "Krittika", "Rohini", "Mrigashira", "Ardra", "Punarvasu",
+    "Pushya", "Ashlesha", "Magha", "Purva Phalguni", "Uttara Phalguni", "Hasta",
+    "Chitra", "Swati", "Vishakha", "Anuradha", "Jyeshtha", "Mula", "Purva Ashadha",
+    "Uttara Ashadha", "Shravana", "Dhanishta", "Shatabhisha", "Purva Bhadrapada",
+    "Uttara Bhadrapada", "Revati",
+]
+NAKSHATRA_SPAN = 360.0 / 27.0
+
+# row s: the nine lords in order starting from lord s
+_ORDER = (np.arange(9)[:, None] + np.arange(9)[None, :]) % 9
+# row s: end of each mahadasha (years after the start of the cycle) when the cycle starts at s
+_MAHA_END = np.cumsum(DASHA_YEARS[_ORDER], axis=1)
+# row m: end of each antardasha (years after the start of mahadasha m)
+_ANTAR_END = DASHA_YEARS[:, None] * np.cumsum(DASHA_YEARS[_ORDER], axis=1) / CYCLE_YEARS
+
+
+# -------------------------------------------------
+# Inputs: Moon longitude from birth time or nakshatra
+# -------------------------------------------------
+
+def moon_from_birth(birth) -> np.ndarray:
+    """Sidereal (Lahiri) Moon longitude for UTC datetime64 births (N,)."""
+    return sidereal_longitudes(julian_day(np.atleast_1d(birth)))[:, 1]
+
+
+def nakshatra_index(nakshatra: Union[int, str]) -> int:
+    """1-based number (1 = Ashwini) or name -> 0-based index."""
+    if isinstance(nakshatra, str) and not nakshatra.strip().isdigit():
+        names = [n.lower() for n in NAKSHATRAS]
+        key = nakshatra.strip().lower()
+        if key not in names:
+            raise ValueError(f"Unknown nakshatra '{nakshatra}'")
+        return names.index(key)
+    n = int(nakshatra)
+    if not 1 <= n <= 27:
+        raise ValueError(f"Nakshatra number must be 1..27, got {n}")
+    return n - 1
+
+
+def moon_from_nakshatra(nakshatra, fraction=0.5) -> np.ndarray:
+    """
+    Moon longitude from 0-based nakshatra indexes. Without the exact longitude the
+    position inside the nakshatra is unknown; the midpoint keeps the error on the
+    first mahadasha balance within half of that dasha.
+    """
+    return (np.asarray(nakshatra, dtype=np.float64) + np.asarray(fraction, dtype=np.float64)) * NAKSHATRA_SPAN
+
+
+def birth_balance(moon_longitude) -> Dict[str, np.ndarray]:
+    """
+    Per person:
+    - nakshatra: 0..26
+    - lord: index into DASHA_SEQUENCE of the mahadasha running at birth
+    - elapsed: years of that mahadasha already spent before birth
+    """
+    moon = np.mod(np.atleast_1d(np.asarray(moon_longitude, dtype=np.float64)), 360.0)
+    nak = np.minimum((moon // NAKSHATRA_SPAN).astype(np.int64), 26)
+    frac = (moon - nak * NAKSHATRA_SPAN) / NAKSHATRA_SPAN
+    lord = nak % 9
+    return {"nakshatra": nak, "lord": lord, "elapsed": frac * DASHA_YEARS[lord]}
+
+
+def _to_datetime(origin_s: np.ndarray, years: np.ndarray) -> np.ndarray:
+    return np.round(origin_s + years * YEAR_SECONDS).astype(np.int64).astype("datetime64[s]")
+
+
+# -------------------------------------------------
+# Queries
+# -------------------------------------------------
+
+def active_periods(moon_longitude, birth, at) -> Dict[str, np.ndarray]:
+    """
+    Mahadasha and antardasha running at `at` for every person, in one pass.
+
+    moon_longitude: (N,) sidereal degrees; birth: (N,) UTC datetime64;
+    at: a single datetime64 or (N,).
+
+    Returns arrays (N,): maha / antar (indexes into DASHA_SEQUENCE) and
+    maha_start, maha_end, antar_start, antar_end (datetime64[s]).
+    Raises ValueError when `at` is before a birth (no period is running then).
+    """
+    bal = birth_balance(moon_longitude)
+    lord, elapsed = bal["lord"], bal["elapsed"]
+    birth_s = np.atleast_1d(np.asarray(birth, dtype="datetime64[s]")).astype(np.int64).astype(np.float64)
+    at_s = np.broadcast_to(np.asarray(at, dtype="datetime64[s]").astype(np.int64), birth_s.shape).astype(np.float64)
+    before = at_s < birth_s
+    if before.any():
+        raise ValueError(f"Date is before birth for {int(before.sum())} of {len(before)} people")
+
+    origin_s = birth_s - elapsed * YEAR_SECONDS          # start of the first mahadasha
+    t = (at_s - origin_s) / YEAR_SECONDS                  # years into the dasha sequence
+    cycle = np.floor(t / CYCLE_YEARS)
+    t_in = np.minimum(t - cycle * CYCLE_YEARS, np.nextafter(CYCLE_YEARS, 0))
+
+    k = np.argmax(t_in[:, None] < _MAHA_END[lord], axis=1)
+    maha = _ORDER[lord, k]
+    maha_end = cycle * CYCLE_YEARS + _MAHA_END[lord, k]
+    maha_start = maha_end - DASHA_YEARS[maha]
+
+    within = np.minimum(t - maha_start, np.nextafter(DASHA_YEARS[maha], 0))
+    j = np.argmax(within[:, None] < _ANTAR_END[maha], axis=1)
+    antar = _ORDER[maha, j]
+    antar_end = maha_start + _ANTAR_END[maha, j]
+    antar_start = antar_end - DASHA_YEARS[maha] * DASHA_YEARS[antar] / CYCLE_YEARS
+
+    return {
+        "nakshatra": bal["nakshatra"],
+        "maha": maha.astype(np.int8),
+        "maha_start": _to_datetime(origin_s, maha_start),
+        "maha_end": _to_datetime(origin_s, maha_end),
+        "antar": antar.astype(np.int8),
+        "antar_start": _to_datetime(origin_s, antar_start),
+        "antar_end": _to_datetime(origin_s, antar_end),
+    }
+
+
+def dasha_timeline(moon_longitude, birth) -> Dict[str, np.ndarray]:
+    """
+    Full 120-year timeline from the birth mahadasha, for a modest number of people
+    (memory is N x 90 timestamps; use active_periods() for whole tables).
+
+    Returns:
+    {
+      "maha":         (N, 9)     lord indexes in order
+      "maha_starts":  (N, 10)    boundaries, the last one is the end of the 9th
+      "antar":        (N, 9, 9)  antardasha lords of each mahadasha
+      "antar_starts": (N, 9, 10) antardasha boundaries
+    }
+    """
+    bal = birth_balance(moon_longitude)
+    lord, elapsed = bal["lord"], bal["elapsed"]
+    birth_s = np.atleast_1d(np.asarray(birth, dtype="datetime64[s]")).astype(np.int64).astype(np.float64)
+    origin_s = birth_s - elapsed * YEAR_SECONDS
+
+    maha = _ORDER[lord]                                                        # (N, 9)
+    maha_bounds = np.concatenate([np.zeros((len(lord), 1)), _MAHA_END[lord]], axis=1)
+    antar = _ORDER[maha]                                                       # (N, 9, 9)
+    antar_bounds = maha_bounds[:, :-1, None] + np.concatenate(
+        [np.zeros(maha.shape + (1,)), _ANTAR_END[maha]], axis=2
+    )
+    return {
+        "maha": maha.astype(np.int8),
+        "maha_starts": _to_datetime(origin_s[:, None], maha_bounds),
+        "antar": antar.astype(np.int8),
+        "antar_starts": _to_datetime(origin_s[:, None, None], antar_bounds),
+    }
+
+
+def period_archetype(lord: int) -> Dict[str, Any]:
+    """Ruling planet of a period with its PLANET_ARCHETYPES text."""
+    planet = DASHA_SEQUENCE[int(lord)]
+    arch = PLANET_ARCHETYPES.get(planet, {})
+    return {"planet": planet, "keywords": arch.get("keywords"), "style": arch.get("style")}
+
+
+def resolve_moon_longitudes(
+    births: np.ndarray,
+    moon_longitudes: List[Optional[float]],
+    nakshatras: List[Optional[Union[int, str]]],
+) -> np.ndarray:
+    """
+    Per person: the given Moon longitude, else the nakshatra midpoint, else the
+    Moon computed from the birth time. Ephemeris rows are computed in one call.
+    """
+    moon = np.empty(len(births), dtype=np.float64)
+    need_ephemeris = []
+    for i, (lon, nak) in enumerate(zip(moon_longitudes, nakshatras)):
+        if lon is not None:
+            moon[i] = float(lon)
+        elif nak is not None:
+            moon[i] = moon_from_nakshatra(nakshatra_index(nak))
+        else:
+            need_ephemeris.append(i)
+    if need_ephemeris:
+        moon[need_ephemeris] = moon_from_birth(births[need_ephemeris])
+    return moon
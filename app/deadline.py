@@ -0,0 +1,75 @@
+import math
+import time
+import asyncio
+from typing import Optional, Callable, Awaitable, TypeVar
+
+from .config import settings
+from .profiling import record_stage
+
+# -------------------------------------------------
+# Per-request time budget.
+# Created when the request arrives (so queueing counts against it) and
+# passed down the pipeline; every stage is bounded by what remains.
+# -------------------------------------------------
+
+DEADLINE_HEADER = "x-request-timeout-ms"
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(Exception):
+    def __init__(self, stage: str):
+        super().__init__(f"Request deadline exceeded during {stage}.")
+        self.stage = stage
+
+
+class Deadline:
+    def __init__(self, seconds: float, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self.budget = seconds
+        self.expires_at = clock() + seconds
+        # set by the pipeline when it answered with the extractive fallback
+        self.degraded = False
+        self.degraded_stage: Optional[str] = None
+
+    @classmethod
+    def from_header(cls, raw: Optional[str]) -> "Deadline":
+        """
+        Budget from X-Request-Timeout-Ms, else REQUEST_DEADLINE_SECONDS; capped at the configured max.
+        Values that are not a positive, finite number of milliseconds are ignored.
+        """
+        seconds = settings.request_deadline_seconds
+        if raw:
+            try:
+                requested = float(raw) / 1000.0
+            except ValueError:
+                requested = None
+            if requested is not None and math.isfinite(requested) and requested > 0.0:
+                seconds = requested
+        return cls(min(seconds, settings.request_deadline_max_seconds))
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - self._clock())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+    async def run(self, aw: Awaitable[T], stage: str) -> T:
+        """Await `aw` for at most the remaining budget; cancels it and raises DeadlineExceeded after that."""
+        remaining = self.remaining()
+        if remaining <= 0.0:
+            if asyncio.iscoroutine(aw):
+                aw.close()
+            raise DeadlineExceeded(stage)
+        t0 = time.perf_counter()
+        try:
+            return await asyncio.wait_for(aw, timeout=remaining)
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded(stage)
+        finally:
+            record_stage(stage, time.perf_counter() - t0)
+
+    def mark_degraded(self, stage: str):
+        self.degraded = True
+        self.degraded_stage = stage
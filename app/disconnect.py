@@ -0,0 +1,54 @@
+import asyncio
+from typing import Awaitable, Callable, TypeVar
+
+from .metrics import metrics
+
+# -------------------------------------------------
+# Stop working for clients that have gone away.
+# The request's work (admission wait, retrieval, generation) runs as its
+# own task next to a watcher that waits for the ASGI "http.disconnect"
+# message (no polling). Whichever finishes first wins: on a disconnect the
+# work task is cancelled, which leaves the admission queue or frees the slot,
+# and unwinds the open httpx request to the chat model so the upstream
+# connection is closed instead of waiting up to 60s for a completion
+# nobody will read. Chroma searches already running in a worker thread
+# finish in the background; their result is dropped.
+#
+# Only the request's own task is cancelled. Work shared with other waiters
+# must be awaited through asyncio.shield() so it keeps running for them.
+# -------------------------------------------------
+
+T = TypeVar("T")
+
+
+class ClientDisconnected(Exception):
+    pass
+
+
+async def wait_for_disconnect(receive: Callable[[], Awaitable[dict]]):
+    """Return once the client has disconnected (the request body must already be read)."""
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+async def cancel_on_disconnect(receive: Callable[[], Awaitable[dict]], aw: Awaitable[T], endpoint: str) -> T:
+    """
+    Await `aw`, cancelling it when the client disconnects first.
+    Raises ClientDisconnected then, and counts it in rag_cancelled_total{endpoint}.
+    """
+    work = asyncio.ensure_future(aw)
+    watcher = asyncio.ensure_future(wait_for_disconnect(receive))
+    try:
+        await asyncio.wait((work, watcher), return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        watcher.cancel()
+        if not work.done():
+            work.cancel()
+            # let the work unwind (admission release, upstream connection close) before returning
+            await asyncio.gather(work, return_exceptions=True)
+            metrics.inc("rag_cancelled_total", endpoint=endpoint)
+    if work.cancelled():
+        raise ClientDisconnected()
+    return work.result()
@@ -0,0 +1,156 @@
+import re
+import math
+import zlib
+from typing import List, Dict
+
+import numpy as np
+
+from .config import settings
+from .models_openai import generate_embedding, generate_embeddings
+
+# -------------------------------------------------
+# Embedding providers.
+# A collection is embedded by exactly one provider; the choice is
+# recorded in the collection metadata (see VectorStore) so queries
+# are always embedded into the same space as the index.
+# Vectors are float32 NumPy arrays end to end: embed() -> (D,),
+# embed_many() -> (N, D); VectorStore hands them to Chroma as they are.
+# -------------------------------------------------
+
+
+class EmbeddingProvider:
+    """
+    Interface used by VectorStore.
+    - name: short ID stored in collection metadata ("openai", "local")
+    - model: model identifier (stored too, for staleness checks)
+    """
+
+    name: str = ""
+    model: str = ""
+
+    @classmethod
+    def for_model(cls, model: str) -> "EmbeddingProvider":
+        """Provider for a model identifier recorded in collection metadata."""
+        return cls(model)
+
+    async def embed(self, text: str) -> np.ndarray:
+        raise NotImplementedError
+
+    async def embed_many(self, texts: List[str]) -> np.ndarray:
+        vectors = [await self.embed(t) for t in texts]
+        return np.stack(vectors) if vectors else np.empty((0, 0), dtype=np.float32)
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    """Remote embeddings via the OpenAI /embeddings route (one network round trip per call)."""
+
+    name = "openai"
+    # inputs per /embeddings request (the API accepts up to 2048)
+    batch_size = 256
+
+    def __init__(self, model: str = None):
+        self.model = model or settings.openai_embedding_model
+
+    async def embed(self, text: str) -> np.ndarray:
+        return await generate_embedding(text)
+
+    async def embed_many(self, texts: List[str]) -> np.ndarray:
+        batches = [
+            await generate_embeddings(texts[i:i + self.batch_size]) for i in range(0, len(texts), self.batch_size)
+        ]
+        if len(batches) == 1:
+            return batches[0]
+        return np.concatenate(batches) if batches else np.empty((0, 0), dtype=np.float32)
+
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+class LocalHashEmbeddingProvider(EmbeddingProvider):
+    """
+    Fully local, CPU-only embeddings: signed feature hashing of word unigrams,
+    word bigrams and character trigrams into a fixed float32 space, with
+    sublinear term frequency and L2 normalization.
+
+    No model download, no network, deterministic across processes
+    (crc32, not Python's salted hash()). Quality is lexical, not semantic,
+    but good enough for this small, keyword-heavy domain, for tests and for
+    offline benchmarks.
+    """
+
+    name = "local"
+    MODEL_PREFIX = "hash-ngram-"
+
+    def __init__(self, dim: int = None):
+        self.dim = int(dim or settings.local_embedding_dim)
+        self.model = f"{self.MODEL_PREFIX}{self.dim}"
+
+    @classmethod
+    def for_model(cls, model: str) -> "LocalHashEmbeddingProvider":
+        dim = model[len(cls.MODEL_PREFIX):] if model.startswith(cls.MODEL_PREFIX) else ""
+        if not dim.isdigit() or int(dim) <= 0:
+            raise RuntimeError(f"Unknown local embedding model '{model}' (expected '{cls.MODEL_PREFIX}<dim>').")
+        return cls(dim=int(dim))
+
+    def _features(self, text: str) -> Dict[str, int]:
+        words = _WORD_RE.findall((text or "").lower())
+        feats: Dict[str, int] = {}
+
+        def add(f: str):
+            feats[f] = feats.get(f, 0) + 1
+
+        for i, w in enumerate(words):
+            add("w:" + w)
+            if i:
+                add("b:" + words[i - 1] + " " + w)
+            padded = f"<{w}>"
+            for j in range(len(padded) - 2):
+                add("c:" + padded[j:j + 3])
+        return feats
+
+    def embed_sync(self, text: str) -> np.ndarray:
+        feats = self._features(text)
+        vec = np.zeros(self.dim, dtype=np.float32)
+        if not feats:
+            return vec
+        n = len(feats)
+        idx = np.empty(n, dtype=np.int64)
+        weights = np.empty(n, dtype=np.float32)
+        for k, (f, tf) in enumerate(feats.items()):
+            h = zlib.crc32(f.encode("utf-8"))
+            idx[k] = h % self.dim
+            sign = 1.0 if (h >> 31) & 1 else -1.0
+            # word features carry more signal than char trigrams
+            kind_w = 1.0 if f[0] == "w" else (0.7 if f[0] == "b" else 0.4)
+            weights[k] = sign * kind_w * (1.0 + math.log(tf))
+        vec = np.bincount(idx, weights=weights, minlength=self.dim).astype(np.float32)
+        norm = float(np.linalg.norm(vec))
+        return vec / norm if norm else vec
+
+    async def embed(self, text: str) -> np.ndarray:
+        return self.embed_sync(text)
+
+    def embed_many_sync(self, texts: List[str]) -> np.ndarray:
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        for i, t in enumerate(texts):
+            out[i] = self.embed_sync(t)
+        return out
+
+    async def embed_many(self, texts: List[str]) -> np.ndarray:
+        return self.embed_many_sync(texts)
+
+
+PROVIDERS = {
+    OpenAIEmbeddingProvider.name: OpenAIEmbeddingProvider,
+    LocalHashEmbeddingProvider.name: LocalHashEmbeddingProvider,
+}
+
+
+def get_provider(name: str = None, model: str = None) -> EmbeddingProvider:
+    """Configured provider; with `model`, the one that embeds into that model's space (same dimension)."""
+    name = (name or settings.embedding_provider).lower()
+    if name not in PROVIDERS:
+        raise RuntimeError(
+            f"Unknown embedding provider '{name}'. Choose one of: {', '.join(sorted(PROVIDERS))}."
+        )
+    return PROVIDERS[name].for_model(model) if model else PROVIDERS[name]()
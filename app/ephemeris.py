@@ -0,0 +1,279 @@
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Sequence, Union
+
+import numpy as np
+
+# -------------------------------------------------
+# Offline, low-precision sidereal ephemeris.
+#
+# Orbital elements and perturbation terms follow Paul Schlyter's
+# "How to compute planetary positions" (elements of date, so the
+# longitudes are tropical of date). Typical error vs Swiss Ephemeris
+# is a few arcminutes: plenty for sign / whole-sign house placement,
+# not meant for degree-exact work near sign cusps.
+#
+# Everything is vectorized over the first axis: pass arrays of
+# thousands of birth records and get arrays back, no Python loops.
+# -------------------------------------------------
+
+PLANETS = ["Sun", "Moon", "Mars", "Mercury", "Venus", "Jupiter", "Saturn", "Rahu", "Ketu"]
+SIGNS = [
+    "Aries", "Taurus", "Gemini", "Cancer", "Leo", "Virgo",
+    "Libra", "Scorpio", "Sagittarius", "Capricorn", "Aquarius", "Pisces",
+]
+
+J2000 = 2451545.0
+_RAD = np.pi / 180.0
+_UNIX_EPOCH_JD = 2440587.5
+
+# name -> (N, i, w, a, e, M) as (value at d=0, rate per day); d = JD - 2451543.5
+_ELEMENTS = {
+    "Sun": ((0.0, 0.0), (0.0, 0.0), (282.9404, 4.70935e-5), (1.0, 0.0), (0.016709, -1.151e-9), (356.0470, 0.9856002585)),
+    "Moon": ((125.1228, -0.0529538083), (5.1454, 0.0), (318.0634, 0.1643573223), (60.2666, 0.0), (0.054900, 0.0), (115.3654, 13.0649929509)),
+    "Mercury": ((48.3313, 3.24587e-5), (7.0047, 5.00e-8), (29.1241, 1.01444e-5), (0.387098, 0.0), (0.205635, 5.59e-10), (168.6562, 4.0923344368)),
+    "Venus": ((76.6799, 2.46590e-5), (3.3946, 2.75e-8), (54.8910, 1.38374e-5), (0.723330, 0.0), (0.006773, -1.302e-9), (48.0052, 1.6021302244)),
+    "Mars": ((49.5574, 2.11081e-5), (1.8497, -1.78e-8), (286.5016, 2.92961e-5), (1.523688, 0.0), (0.093405, 2.516e-9), (18.6021, 0.5240207766)),
+    "Jupiter": ((100.4542, 2.76854e-5), (1.3030, -1.557e-7), (273.8777, 1.64505e-5), (5.20256, 0.0), (0.048498, 4.469e-9), (19.8950, 0.0830853001)),
+    "Saturn": ((113.6634, 2.38980e-5), (2.4886, -1.081e-7), (339.3939, 2.97661e-5), (9.55475, 0.0), (0.055546, -9.499e-9), (316.9670, 0.0334442282)),
+}
+
+
+def _rev(x: np.ndarray) -> np.ndarray:
+    return np.mod(x, 360.0)
+
+
+def _sin(deg):
+    return np.sin(deg * _RAD)
+
+
+def _cos(deg):
+    return np.cos(deg * _RAD)
+
+
+def _elements(name: str, d: np.ndarray):
+    return [v0 + rate * d for v0, rate in _ELEMENTS[name]]
+
+
+def _eccentric_anomaly(M: np.ndarray, e: np.ndarray) -> np.ndarray:
+    """Kepler's equation by Newton iteration, degrees in / degrees out."""
+    E = M + (180.0 / np.pi) * e * _sin(M) * (1.0 + e * _cos(M))
+    for _ in range(5):
+        E = E - (E - (180.0 / np.pi) * e * _sin(E) - M) / (1.0 - e * _cos(E))
+    return E
+
+
+def _orbit_xyz(name: str, d: np.ndarray):
+    """Ecliptic rectangular coordinates in the orbit's own frame of reference (heliocentric / geocentric for Moon)."""
+    N, i, w, a, e, M = _elements(name, d)
+    M = _rev(M)
+    E = _eccentric_anomaly(M, e)
+    xv = a * (_cos(E) - e)
+    yv = a * np.sqrt(1.0 - e * e) * _sin(E)
+    v = np.degrees(np.arctan2(yv, xv))
+    r = np.hypot(xv, yv)
+    vw = v + w
+    x = r * (_cos(N) * _cos(vw) - _sin(N) * _sin(vw) * _cos(i))
+    y = r * (_sin(N) * _cos(vw) + _cos(N) * _sin(vw) * _cos(i))
+    z = r * _sin(vw) * _sin(i)
+    return x, y, z, M, N, w
+
+
+def _sun(d: np.ndarray):
+    """Geocentric Sun: longitude (deg), distance (AU), mean anomaly, mean longitude."""
+    _, _, _, _, e, M = _elements("Sun", d)
+    w = _ELEMENTS["Sun"][2][0] + _ELEMENTS["Sun"][2][1] * d
+    M = _rev(M)
+    E = _eccentric_anomaly(M, e)
+    xv = _cos(E) - e
+    yv = np.sqrt(1.0 - e * e) * _sin(E)
+    v = np.degrees(np.arctan2(yv, xv))
+    r = np.hypot(xv, yv)
+    lon = _rev(v + w)
+    return lon, r, M, _rev(M + w)
+
+
+def _moon_longitude(d: np.ndarray, sun_M: np.ndarray, sun_L: np.ndarray) -> np.ndarray:
+    x, y, _, Mm, Nm, wm = _orbit_xyz("Moon", d)
+    lon = np.degrees(np.arctan2(y, x))
+    Lm = Nm + wm + Mm                  # Moon mean longitude
+    D = Lm - sun_L                     # mean elongation
+    F = Lm - Nm                        # argument of latitude
+    lon = lon + (
+        -1.274 * _sin(Mm - 2 * D)      # evection
+        + 0.658 * _sin(2 * D)          # variation
+        - 0.186 * _sin(sun_M)          # yearly equation
+        - 0.059 * _sin(2 * Mm - 2 * D)
+        - 0.057 * _sin(Mm - 2 * D + sun_M)
+        + 0.053 * _sin(Mm + 2 * D)
+        + 0.046 * _sin(2 * D - sun_M)
+        + 0.041 * _sin(Mm - sun_M)
+        - 0.035 * _sin(D)              # parallactic equation
+        - 0.031 * _sin(Mm + sun_M)
+        - 0.015 * _sin(2 * F - 2 * D)
+        + 0.011 * _sin(Mm - 4 * D)
+    )
+    return _rev(lon)
+
+
+def _planet_longitude(name: str, d: np.ndarray, sun_lon: np.ndarray, sun_r: np.ndarray) -> np.ndarray:
+    x, y, z, _, _, _ = _orbit_xyz(name, d)
+
+    if name in ("Jupiter", "Saturn"):
+        Mj = _rev(_ELEMENTS["Jupiter"][5][0] + _ELEMENTS["Jupiter"][5][1] * d)
+        Ms = _rev(_ELEMENTS["Saturn"][5][0] + _ELEMENTS["Saturn"][5][1] * d)
+        r = np.sqrt(x * x + y * y + z * z)
+        lon = np.degrees(np.arctan2(y, x))
+        lat = np.degrees(np.arcsin(z / r))
+        if name == "Jupiter":
+            lon = lon + (
+                -0.332 * _sin(2 * Mj - 5 * Ms - 67.6)
+                - 0.056 * _sin(2 * Mj - 2 * Ms + 21)
+                + 0.042 * _sin(3 * Mj - 5 * Ms + 21)
+                - 0.036 * _sin(Mj - 2 * Ms)
+                + 0.022 * _cos(Mj - Ms)
+                + 0.023 * _sin(2 * Mj - 3 * Ms + 52)
+                - 0.016 * _sin(Mj - 5 * Ms - 69)
+            )
+        else:
+            lon = lon + (
+                0.812 * _sin(2 * Mj - 5 * Ms - 67.6)
+                - 0.229 * _cos(2 * Mj - 4 * Ms - 2)
+                + 0.119 * _sin(Mj - 2 * Ms - 3)
+                + 0.046 * _sin(2 * Mj - 6 * Ms - 69)
+                + 0.014 * _sin(Mj - 3 * Ms + 32)
+            )
+            lat = lat + (-0.020 * _cos(2 * Mj - 4 * Ms - 2) + 0.018 * _sin(2 * Mj - 6 * Ms - 49))
+        x = r * _cos(lon) * _cos(lat)
+        y = r * _sin(lon) * _cos(lat)
+
+    # heliocentric -> geocentric
+    xg = x + sun_r * _cos(sun_lon)
+    yg = y + sun_r * _sin(sun_lon)
+    return _rev(np.degrees(np.arctan2(yg, xg)))
+
+
+# -------------------------------------------------
+# Time, ayanamsa, ascendant
+# -------------------------------------------------
+
+def julian_day(when: Union[np.ndarray, Sequence]) -> np.ndarray:
+    """UTC datetime64 array (any unit) -> Julian Day (UT)."""
+    ts = np.asarray(when, dtype="datetime64[s]").astype(np.int64)
+    return ts / 86400.0 + _UNIX_EPOCH_JD
+
+
+def lahiri_ayanamsa(jd: np.ndarray) -> np.ndarray:
+    """
+    Lahiri (Chitrapaksha) ayanamsa in degrees: 23°51'11" at J2000 plus
+    general precession in longitude. Within ~1' of Swiss Ephemeris for 1800-2100.
+    """
+    T = (np.asarray(jd, dtype=np.float64) - J2000) / 36525.0
+    return 23.85306 + (5028.796195 * T + 1.1054348 * T * T) / 3600.0
+
+
+def _obliquity(jd: np.ndarray) -> np.ndarray:
+    return 23.4393 - 3.563e-7 * (jd - 2451543.5)
+
+
+def ascendant_tropical(jd: np.ndarray, lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """Tropical ecliptic longitude of the ascendant (degrees). East longitudes positive."""
+    T = (jd - J2000) / 36525.0
+    gmst = 280.46061837 + 360.98564736629 * (jd - J2000) + 0.000387933 * T * T
+    ramc = _rev(gmst + lon)
+    eps = _obliquity(jd)
+    asc = np.degrees(np.arctan2(_cos(ramc), -(_sin(ramc) * _cos(eps) + np.tan(lat * _RAD) * _sin(eps))))
+    return _rev(asc)
+
+
+# -------------------------------------------------
+# Public API
+# -------------------------------------------------
+
+def tropical_longitudes(jd: np.ndarray) -> np.ndarray:
+    """(N,) Julian Days -> (N, 9) tropical longitudes in PLANETS order (mean nodes)."""
+    jd = np.atleast_1d(np.asarray(jd, dtype=np.float64))
+    d = jd - 2451543.5
+    sun_lon, sun_r, sun_M, sun_L = _sun(d)
+
+    out = np.empty((jd.shape[0], len(PLANETS)), dtype=np.float64)
+    out[:, 0] = sun_lon
+    out[:, 1] = _moon_longitude(d, sun_M, sun_L)
+    for col, name in ((2, "Mars"), (3, "Mercury"), (4, "Venus"), (5, "Jupiter"), (6, "Saturn")):
+        out[:, col] = _planet_longitude(name, d, sun_lon, sun_r)
+    rahu = _rev(_ELEMENTS["Moon"][0][0] + _ELEMENTS["Moon"][0][1] * d)   # mean ascending node
+    out[:, 7] = rahu
+    out[:, 8] = _rev(rahu + 180.0)
+    return out
+
+
+def sidereal_longitudes(jd: np.ndarray) -> np.ndarray:
+    """(N, 9) Lahiri sidereal longitudes in PLANETS order."""
+    jd = np.atleast_1d(np.asarray(jd, dtype=np.float64))
+    return _rev(tropical_longitudes(jd) - lahiri_ayanamsa(jd)[:, None])
+
+
+def compute_charts(when, lat, lon) -> Dict[str, np.ndarray]:
+    """
+    Vectorized chart computation for many births at once.
+
+    when: UTC datetime64 array (N,); lat/lon: degrees (N,) or scalars, east positive.
+
+    Returns:
+    {
+      "longitudes": (N, 9) sidereal longitudes, PLANETS order
+      "ascendant":  (N,)   sidereal ascendant longitude
+      "signs":      (N, 9) sign index 0..11 (0 = Aries)
+      "houses":     (N, 9) whole-sign house 1..12 counted from the ascendant sign
+    }
+    """
+    jd = np.atleast_1d(julian_day(when))
+    lat = np.broadcast_to(np.asarray(lat, dtype=np.float64), jd.shape)
+    lon = np.broadcast_to(np.asarray(lon, dtype=np.float64), jd.shape)
+
+    ayan = lahiri_ayanamsa(jd)
+    longs = _rev(tropical_longitudes(jd) - ayan[:, None])
+    asc = _rev(ascendant_tropical(jd, lat, lon) - ayan)
+
+    signs = (longs // 30).astype(np.int8)
+    asc_sign = (asc // 30).astype(np.int8)
+    houses = (np.mod(signs - asc_sign[:, None], 12) + 1).astype(np.int8)
+    return {"longitudes": longs, "ascendant": asc, "signs": signs, "houses": houses}
+
+
+def houses_maps(houses: np.ndarray) -> List[Dict[str, List[str]]]:
+    """
+    (N, 9) house numbers -> the `houses` map interpret_chart consumes, one per chart:
+    {"1": ["Sun", "Mercury"], "4": ["Moon"], ...} (only occupied houses, in house order).
+    """
+    out = []
+    keys = [str(h) for h in range(13)]
+    for row in np.atleast_2d(houses).tolist():
+        by_house: Dict[int, List[str]] = {}
+        for planet, h in zip(PLANETS, row):
+            by_house.setdefault(h, []).append(planet)
+        out.append({keys[h]: by_house[h] for h in sorted(by_house)})
+    return out
+
+
+def parse_birth_time(dob: str) -> np.datetime64:
+    """
+    ISO 8601 birth time -> UTC datetime64.
+    "1990-05-14T06:30:00+05:30" is exact; a naive time is taken as UTC and a bare
+    date as 12:00 UTC (planet signs are then fine, the ascendant is not reliable).
+    """
+    dt = datetime.fromisoformat(str(dob).strip().replace("Z", "+00:00"))
+    if len(str(dob).strip()) <= 10:
+        dt = dt.replace(hour=12)
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return np.datetime64(dt, "s")
+
+
+def chart_from_payload(user_payload: Dict[str, Any]) -> Dict[str, List[str]]:
+    """`houses` map for one user payload carrying dob / lat / long."""
+    chart = compute_charts(
+        np.array([parse_birth_time(user_payload["dob"])]),
+        float(user_payload["lat"]),
+        float(user_payload["long"]),
+    )
+    return houses_maps(chart["houses"])[0]
@@ -1,13 +1,16 @@
 import asyncio
-from .utils_chunk import load_domain_jsons, flatten_astrology_docs
+from .utils_chunk import load_domain_jsons, flatten_astrology_docs, index_chunks, token_report
 from .vectorstore import vector_store
+from .reindex import reindex
 
 
 async def ingest_domain_knowledge():
     """
     1. Load domain JSON files from /app/domain
-    2. Chunk them
-    3. Upsert into Chroma
+    2. Chunk them (records + field sub-chunks)
+    3. Build a new collection version, validate it and switch to it (reindex.reindex),
+       so the collection serving queries is never written to; the first build
+       activates the first version the same way
     """
     print("[INGEST] Loading domain JSON...")
     docs = load_domain_jsons()
@@ -16,11 +19,27 @@ async def ingest_domain_knowledge():
     if not chunks:
         raise RuntimeError("No chunks generated from domain JSON. Check data format.")
 
-    print(f"[INGEST] Upserting {len(chunks)} chunks into Chroma...")
-    await vector_store.upsert_chunks(chunks)
+    report = token_report(chunks)
+    rows = index_chunks(chunks)
+    print(
+        f"[INGEST] Building a new version with {len(chunks)} chunks and "
+        f"{len(rows) - len(chunks)} field sub-chunks..."
+    )
+    print(
+        f"[INGEST] Embedding tokens: {report['embed_tokens']} "
+        f"(saved {report['embed_tokens_saved']} vs verbose chunks), "
+        f"context tokens: {report['context_tokens']} (saved {report['context_tokens_saved']})"
+    )
+    # also refreshes the precomputed answers (keyed by chunk IDs) when enabled
+    result = await reindex(vector_store, rows)
 
     print("[INGEST] DONE ✅")
+    return result
+
+
+async def main():
+    await ingest_domain_knowledge()
 
 
 if __name__ == "__main__":
-    asyncio.run(ingest_domain_knowledge())
+    asyncio.run(main())
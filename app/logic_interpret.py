@@ -1,5 +1,6 @@
 import json
 from typing import Dict, Any, List
+from .ephemeris import chart_from_payload
 
 # -------------------------------------------------
 # 1. Static knowledge bases for planet behavior
@@ -388,14 +389,16 @@ def interpret_chart(user_payload: Dict[str, Any], house_lords_map: Dict[str, Any
       "long": ...,
       "houses": {
         "1": "Sun",
-        "2": "Mars",
+        "2": ["Mars", "Mercury"],   # several occupants as a list
         ...
       }
     }
+    When "houses" is missing, it is computed from dob / lat / long with the
+    built-in sidereal ephemeris (Lahiri, whole-sign houses; see app/ephemeris.py).
 
     Steps:
     - For each house_number in user_payload["houses"]:
-        - get planet sitting there
+        - get planet(s) sitting there
         - get house meta (theme, natural_lord)
         - get planet-in-house meaning from PLANET_IN_HOUSE_LIBRARY
         - build host_guest_dynamics text using planet + house natural lord
@@ -405,12 +408,19 @@ def interpret_chart(user_payload: Dict[str, Any], house_lords_map: Dict[str, Any
     dob = user_payload.get("dob")
     lat = user_payload.get("lat")
     long_ = user_payload.get("long")
-    houses = user_payload.get("houses", {})
+    houses = user_payload.get("houses") or {}
+    if not houses and dob and lat is not None and long_ is not None:
+        houses = chart_from_payload(user_payload)
+
+    placements = []
+    for house_num, occupants in houses.items():
+        for planet in ([occupants] if isinstance(occupants, str) else occupants):
+            placements.append((house_num, planet))
 
     interpretations_out: List[Dict[str, Any]] = []
     summary_points_for_user: List[str] = []
 
-    for house_num, planet in houses.items():
+    for house_num, planet in placements:
         house_info = house_lords_map.get(str(house_num))
         if not house_info:
             continue
@@ -1,18 +1,45 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from .router_chat import router as chat_router  # RAG Q&A route
-# from .router_chart import router as chart_router  # NEW personalized chart route
+from .metrics import metrics
+from .router_chart import router as chart_router  # personalized chart route
+from .router_admin import router as admin_router  # re-ingestion admin routes
+from .snapshot import load_on_startup
+from .profiling import ProfilingMiddleware
+from .capture import capture_writer
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Fresh containers start from the bundled index snapshot instead of re-ingesting
+    await load_on_startup()
+    yield
+    # write out captured traffic still queued
+    capture_writer.close()
+
 
 app = FastAPI(
     title="Vedic Astrology RAG API",
     version="1.1.0",
-    description="RAG + personalized chart interpretation API"
+    description="RAG + personalized chart interpretation API",
+    lifespan=lifespan,
 )
 
+# Opt-in per-request profiles (PROFILING_ENABLED + X-Profile header or PROFILE_SAMPLE_RATE)
+app.add_middleware(ProfilingMiddleware)
+
 app.include_router(chat_router)
-# app.include_router(chart_router)
+app.include_router(chart_router)
+app.include_router(admin_router)
+
 
 @app.get("/", tags=["health"])
 async def root():
     return JSONResponse({"status": "ok", "service": "vedic-rag"})
 
+
+@app.get("/metrics", tags=["health"])
+async def metrics_endpoint():
+    return PlainTextResponse(metrics.render_prometheus())
@@ -0,0 +1,110 @@
+import threading
+from typing import Dict, Tuple, List
+
+# -------------------------------------------------
+# Tiny in-process metrics registry.
+# Exposed in Prometheus text format on GET /metrics.
+# -------------------------------------------------
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+DEFAULT_BUCKETS: List[float] = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0]
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _fmt_labels(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    items = list(key) + list(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+class MetricsRegistry:
+    """
+    Counters, gauges and fixed-bucket histograms keyed by (name, labels).
+    Thread-safe; cheap enough to call on every request.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, List[float]]] = {}
+        self._buckets: Dict[str, List[float]] = {}
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def set_gauge(self, name: str, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._gauges.setdefault(name, {})[key] = float(value)
+
+    def observe(self, name: str, value: float, buckets: List[float] = None, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            bounds = self._buckets.setdefault(name, list(buckets or DEFAULT_BUCKETS))
+            series = self._histograms.setdefault(name, {})
+            # layout: [bucket counts..., +Inf count, sum]
+            state = series.get(key)
+            if state is None:
+                state = [0.0] * (len(bounds) + 2)
+                series[key] = state
+            for i, b in enumerate(bounds):
+                if value <= b:
+                    state[i] += 1
+            state[len(bounds)] += 1
+            state[len(bounds) + 1] += value
+
+    def get_counter(self, name: str, **labels) -> float:
+        with self._lock:
+            return self._counters.get(name, {}).get(_label_key(labels), 0.0)
+
+    def get_gauge(self, name: str, **labels) -> float:
+        with self._lock:
+            return self._gauges.get(name, {}).get(_label_key(labels), 0.0)
+
+    def get_histogram_count(self, name: str, **labels) -> int:
+        with self._lock:
+            state = self._histograms.get(name, {}).get(_label_key(labels))
+            if state is None:
+                return 0
+            return int(state[len(self._buckets[name])])
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+            self._buckets.clear()
+
+    def render_prometheus(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                for key, v in series.items():
+                    lines.append(f"{name}{_fmt_labels(key)} {v}")
+            for name, series in sorted(self._gauges.items()):
+                lines.append(f"# TYPE {name} gauge")
+                for key, v in series.items():
+                    lines.append(f"{name}{_fmt_labels(key)} {v}")
+            for name, series in sorted(self._histograms.items()):
+                bounds = self._buckets[name]
+                lines.append(f"# TYPE {name} histogram")
+                for key, state in series.items():
+                    for i, b in enumerate(bounds):
+                        lines.append(f"{name}_bucket{_fmt_labels(key, (('le', str(b)),))} {state[i]}")
+                    lines.append(f"{name}_bucket{_fmt_labels(key, (('le', '+Inf'),))} {state[len(bounds)]}")
+                    lines.append(f"{name}_count{_fmt_labels(key)} {state[len(bounds)]}")
+                    lines.append(f"{name}_sum{_fmt_labels(key)} {state[len(bounds) + 1]}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
@@ -1,7 +1,13 @@
 import os
+import base64
+import asyncio
 import httpx
-from typing import List
+import numpy as np
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
 from .config import settings
+from .metrics import metrics
 
 OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")  # we can override this in .env if you're on Azure or a proxy
 # Guard against missing "/v1" when pointing to api.openai.com
@@ -11,12 +17,32 @@ CHAT_ENDPOINT = f"{OPENAI_BASE_URL}/chat/completions"
 EMBED_ENDPOINT = f"{OPENAI_BASE_URL}/embeddings"
 
 
-async def generate_embedding(text: str) -> List[float]:
+def decode_embedding(value: Any) -> np.ndarray:
     """
-    Create an embedding vector for a given text using OpenAI embeddings.
-    If you're on Azure OpenAI, set OPENAI_BASE_URL in .env to your Azure endpoint, e.g.:
-    https://my-resource.openai.azure.com/openai/deployments/my-embedding-model
+    One embedding from an /embeddings response as a float32 vector.
+    base64 (encoding_format=base64) is viewed in place over the decoded bytes
+    (np.frombuffer, read-only, no per-element Python floats); a plain float
+    list, from a proxy that ignores encoding_format, is converted.
     """
+    if isinstance(value, str):
+        return np.frombuffer(base64.b64decode(value), dtype=np.float32)
+    return np.asarray(value, dtype=np.float32)
+
+
+def decode_embeddings(data: List[Dict[str, Any]]) -> np.ndarray:
+    """(N, D) float32 from the response `data` items, in input order (items carry their index)."""
+    items = sorted(data, key=lambda d: d.get("index", 0))
+    if not items:
+        return np.empty((0, 0), dtype=np.float32)
+    first = decode_embedding(items[0]["embedding"])
+    out = np.empty((len(items), first.shape[0]), dtype=np.float32)
+    out[0] = first
+    for i, item in enumerate(items[1:], start=1):
+        out[i] = decode_embedding(item["embedding"])   # one memcpy per row
+    return out
+
+
+async def _post_embeddings(inputs: Any) -> List[Dict[str, Any]]:
     async with httpx.AsyncClient(timeout=30.0) as client:
         resp = await client.post(
             EMBED_ENDPOINT,
@@ -26,7 +52,9 @@ async def generate_embedding(text: str) -> List[float]:
             },
             json={
                 "model": settings.openai_embedding_model,
-                "input": text
+                "input": inputs,
+                # little-endian float32 bytes, base64: a few strings instead of thousands of JSON floats
+                "encoding_format": "base64",
             }
         )
 
@@ -37,30 +65,117 @@ async def generate_embedding(text: str) -> List[float]:
         raise RuntimeError(
             f"OpenAI embedding call failed ({e.response.status_code}): {e.response.text}"
         )
+    return resp.json()["data"]
 
-    data = resp.json()
-    return data["data"][0]["embedding"]
+
+async def generate_embedding(text: str) -> np.ndarray:
+    """
+    Create an embedding vector (float32, shape (D,)) for a given text using OpenAI embeddings.
+    If you're on Azure OpenAI, set OPENAI_BASE_URL in .env to your Azure endpoint, e.g.:
+    https://my-resource.openai.azure.com/openai/deployments/my-embedding-model
+    """
+    data = await _post_embeddings(text)
+    return decode_embedding(data[0]["embedding"])
 
 
-async def generate_answer(system_prompt: str, user_question: str, context: str) -> str:
+async def generate_embeddings(texts: List[str]) -> np.ndarray:
     """
-    Generate an answer from GPT-5 Thinking (or your chosen chat model)
-    using the standard /v1/chat/completions route.
+    Embed several texts in ONE /embeddings request (`input` accepts a list).
+    Returns an (N, D) float32 array in input order.
     """
-    messages = [
+    if not texts:
+        return np.empty((0, 0), dtype=np.float32)
+    return decode_embeddings(await _post_embeddings(texts))
+
+
+# prompt / cached / completion tokens of the chat calls made for the current request; None when not collecting
+_usage: ContextVar[Optional[Dict[str, int]]] = ContextVar("chat_usage", default=None)
+
+
+@contextmanager
+def collect_usage():
+    """Sum the token usage of the chat calls made inside the block into the yielded dict (nested use shares it)."""
+    usage = _usage.get()
+    if usage is not None:
+        yield usage
+        return
+    usage = {}
+    token = _usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _usage.reset(token)
+
+
+def record_usage(model: str, usage: Optional[Dict[str, Any]]):
+    """
+    Count a completion's usage payload. cached_tokens is the part of the prompt
+    prefix the provider served from its prompt cache (billed at a discount, and
+    not recomputed); it stays 0 below the provider's minimum prefix length.
+    """
+    if not usage:
+        return
+    counts = {
+        "prompt_tokens": int(usage.get("prompt_tokens") or 0),
+        "cached_tokens": int((usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0),
+        "completion_tokens": int(usage.get("completion_tokens") or 0),
+    }
+    metrics.inc("rag_prompt_tokens_total", counts["prompt_tokens"], model=model)
+    metrics.inc("rag_prompt_cached_tokens_total", counts["cached_tokens"], model=model)
+    metrics.inc("rag_completion_tokens_total", counts["completion_tokens"], model=model)
+    collected = _usage.get()
+    if collected is not None:
+        for k, v in counts.items():
+            collected[k] = collected.get(k, 0) + v
+
+
+def build_messages(system_prompt: str, user_question: str, context: str) -> List[Dict[str, str]]:
+    """
+    Chat messages, laid out for provider-side prompt-prefix caching: the static
+    system prompt (all instructions) comes first and is byte-identical across
+    requests; everything that varies follows in the user message, CONTEXT
+    (deterministic for a given set of chunks, see rag_pipeline.build_context)
+    before the question.
+    """
+    return [
         {"role": "system", "content": system_prompt},
-        {
-            "role": "user",
-            "content": (
-                "You are an expert Vedic Astrology assistant.\n"
-                "Answer ONLY using the CONTEXT below. If context is insufficient, say so.\n\n"
-                f"CONTEXT:\n{context}\n\n"
-                f"USER QUESTION:\n{user_question}"
-            ),
-        },
+        {"role": "user", "content": f"CONTEXT:\n{context}\n\nUSER QUESTION:\n{user_question}"},
     ]
 
-    async with httpx.AsyncClient(timeout=60.0) as client:
+
+async def stub_answer(user_question: str, context: str, max_tokens: int) -> str:
+    """
+    Offline stand-in for the chat model (UPSTREAM_STUB=true): waits
+    UPSTREAM_STUB_LATENCY seconds and echoes the start of the context, so load
+    tests and traffic replays exercise everything but the paid call, deterministically.
+    """
+    await asyncio.sleep(settings.upstream_stub_latency)
+    lines = [l for l in context.splitlines() if l.strip() and l.strip() != "[source]"]
+    words = " ".join(lines[:3]).split()[:max_tokens]
+    return f"[stub] {user_question.strip()} -> {' '.join(words) or 'no context'}"
+
+
+async def generate_answer(
+    system_prompt: str,
+    user_question: str,
+    context: str,
+    model: Optional[str] = None,
+    max_tokens: int = 600,
+    timeout: Optional[float] = None,
+) -> str:
+    """
+    Generate an answer from GPT-5 Thinking (or your chosen chat model)
+    using the standard /v1/chat/completions route.
+    `model` defaults to settings.openai_chat_model (see app/routing.py for per-query tiers).
+    `timeout` (seconds) shortens the default 60s, e.g. to what is left of a request deadline.
+    Token usage, cached prompt tokens included, is recorded (record_usage).
+    """
+    if settings.upstream_stub:
+        return await stub_answer(user_question, context, max_tokens)
+    model = model or settings.openai_chat_model
+    messages = build_messages(system_prompt, user_question, context)
+
+    async with httpx.AsyncClient(timeout=min(60.0, timeout) if timeout else 60.0) as client:
         resp = await client.post(
             CHAT_ENDPOINT,
             headers={
@@ -68,10 +183,10 @@ async def generate_answer(system_prompt: str, user_question: str, context: str)
                 "Content-Type": "application/json",
             },
             json={
-                "model": settings.openai_chat_model,
+                "model": model,
                 "messages": messages,
                 "temperature": 0.4,
-                "max_tokens": 600,
+                "max_tokens": max_tokens,
             },
         )
 
@@ -93,7 +208,7 @@ async def generate_answer(system_prompt: str, user_question: str, context: str)
                 "model" in message.lower() and "not found" in message.lower()
             ):
                 raise RuntimeError(
-                    f"OpenAI model not found: '{settings.openai_chat_model}'. "
+                    f"OpenAI model not found: '{model}'. "
                     "Set OPENAI_CHAT_MODEL to a valid Chat Completions model, e.g. 'gpt-4o-mini' or 'gpt-4o'."
                 )
             detail = message or str(err_json)
@@ -113,4 +228,5 @@ async def generate_answer(system_prompt: str, user_question: str, context: str)
         )
 
     data = resp.json()
+    record_usage(model, data.get("usage"))
     return data["choices"][0]["message"]["content"].strip()
@@ -0,0 +1,97 @@
+import asyncio
+import hashlib
+import sys
+from datetime import datetime, timezone
+from typing import Dict, Any
+
+from .models_openai import generate_answer
+from .routing import choose_route, route_models
+from .vectorstore import vector_store
+from .rag_pipeline import SYSTEM_PROMPT, build_context, build_preview, retrieve_selected
+from .answer_store import STORE_FORMAT, answer_store, build_catalogue, encode_vector
+from .utils_chunk import domain_content_hash
+
+# Keep the batch job polite towards the API rate limits
+MAX_CONCURRENCY = 4
+
+
+async def _answer_item(item: Dict[str, Any], sem: asyncio.Semaphore) -> Dict[str, Any]:
+    async with sem:
+        embeddings = await vector_store.provider.embed_many(item["questions"])
+        primary = item["questions"][0]
+
+        results, k = await retrieve_selected(primary, query_embedding=embeddings[0])
+        context_str, used = build_context(results)
+        # the tier a live request for this question would be routed to
+        route = choose_route(primary, results)
+        answer = await generate_answer(
+            system_prompt=SYSTEM_PROMPT,
+            user_question=primary,
+            context=context_str,
+            model=route.model,
+            max_tokens=route.max_tokens,
+        )
+
+    chunk_ids = [r["id"] for r in used]
+    entry_version = hashlib.sha256(
+        "|".join([item["key"], route.model, *chunk_ids]).encode("utf-8")
+    ).hexdigest()[:16]
+
+    return {
+        "key": item["key"],
+        "entry": {
+            "question": primary,
+            "answer": answer,
+            "chunk_ids": chunk_ids,
+            "preview": [p.model_dump() for p in build_preview(results)],
+            "k": k,
+            "route": route.name,
+            "model": route.model,
+            "entities": item["entities"],
+            "entry_version": entry_version,
+        },
+        "phrasings": [
+            {"text": q, "key": item["key"], "embedding": encode_vector(e)}
+            for q, e in zip(item["questions"], embeddings)
+        ],
+    }
+
+
+async def build_answer_store(force: bool = False) -> bool:
+    """
+    Offline batch job:
+    1. Expand the canonical question catalogue
+    2. Retrieve + generate an answer for each canonical question
+    3. Embed every phrasing for the query-time embedding lookup
+    4. Write the store, versioned by the domain content hash
+
+    Skips the work when the existing store is already current.
+    Returns True when a new store was written.
+    """
+    if not force and answer_store.is_current(answer_store.read_raw()):
+        print("[PRECOMPUTE] Answer store is up to date, nothing to do.")
+        return False
+
+    catalogue = build_catalogue()
+    print(f"[PRECOMPUTE] Generating answers for {len(catalogue)} canonical questions...")
+
+    sem = asyncio.Semaphore(MAX_CONCURRENCY)
+    done = await asyncio.gather(*[_answer_item(item, sem) for item in catalogue])
+
+    payload = {
+        "format": STORE_FORMAT,
+        "version": domain_content_hash(),
+        "chat_models": route_models(),
+        "embedding_model": vector_store.provider.model,
+        "built_at": datetime.now(timezone.utc).isoformat(),
+        "entries": {d["key"]: d["entry"] for d in done},
+        "phrasings": [ph for d in done for ph in d["phrasings"]],
+    }
+    answer_store.save(payload)
+
+    print(f"[PRECOMPUTE] Wrote {len(payload['entries'])} answers to {answer_store.path} ✅")
+    return True
+
+
+if __name__ == "__main__":
+    asyncio.run(build_answer_store(force="--force" in sys.argv[1:]))
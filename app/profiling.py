@@ -0,0 +1,147 @@
+import os
+import re
+import hmac
+import json
+import time
+import uuid
+import random
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+
+from .config import settings
+
+try:  # optional: profiling stays off without it
+    from pyinstrument import Profiler
+except ImportError:  # pragma: no cover
+    Profiler = None
+
+# -------------------------------------------------
+# Opt-in per-request profiling.
+# A request is profiled when it carries X-Profile with the admin token, or
+# is picked by PROFILE_SAMPLE_RATE. pyinstrument samples the request
+# (wall clock, async-aware: time spent awaiting is attributed to the
+# awaiting coroutine) and the profile is written to PROFILE_DIR as
+#   <timestamp>_<request id>.html   call tree
+#   <timestamp>_<request id>.json   request id, path, status, stage timings
+# Only the PROFILE_MAX_FILES newest profiles are kept.
+# Unprofiled requests pass straight through (one header scan, no wrapping).
+# -------------------------------------------------
+
+PROFILE_HEADER = b"x-profile"
+REQUEST_ID_HEADER = b"x-request-id"
+# client ids become part of a file name, so anything else gets a generated id
+_SAFE_REQUEST_ID = re.compile(r"[A-Za-z0-9._-]{1,64}")
+
+# stage -> seconds for the request being profiled; None when not profiling
+_stages: ContextVar[Optional[Dict[str, float]]] = ContextVar("profile_stages", default=None)
+
+
+def record_stage(stage: str, seconds: float):
+    """Add a stage timing to the profile of the current request (no-op when not profiling)."""
+    stages = _stages.get()
+    if stages is not None:
+        stages[stage] = stages.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def collect_stages():
+    """
+    Collect record_stage() timings of the current request into the yielded dict.
+    Nested use (profiling + traffic capture) shares the outer dict.
+    """
+    stages = _stages.get()
+    if stages is not None:
+        yield stages
+        return
+    stages = {}
+    token = _stages.set(stages)
+    try:
+        yield stages
+    finally:
+        _stages.reset(token)
+
+
+def should_profile(headers: Dict[bytes, bytes]) -> bool:
+    if Profiler is None:
+        return False
+    token = headers.get(PROFILE_HEADER)
+    if token is not None and settings.admin_token and hmac.compare_digest(token, settings.admin_token.encode("utf-8")):
+        return True
+    return settings.profile_sample_rate > 0 and random.random() < settings.profile_sample_rate
+
+
+def enforce_retention(directory: str, max_profiles: int) -> List[str]:
+    """Delete the oldest profiles beyond `max_profiles` (html + json pairs); returns deleted stems."""
+    try:
+        stems = sorted({os.path.splitext(n)[0] for n in os.listdir(directory) if n.endswith((".html", ".json"))})
+    except OSError:
+        return []
+    excess = stems[:max(0, len(stems) - max_profiles)]
+    for stem in excess:
+        for ext in (".html", ".json"):
+            try:
+                os.remove(os.path.join(directory, stem + ext))
+            except OSError:
+                pass
+    return excess
+
+
+def write_profile(directory: str, request_id: str, html: str, meta: Dict[str, Any]) -> str:
+    os.makedirs(directory, exist_ok=True)
+    stem = f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')}_{request_id}"
+    with open(os.path.join(directory, stem + ".html"), "w", encoding="utf-8") as f:
+        f.write(html)
+    with open(os.path.join(directory, stem + ".json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    enforce_retention(directory, settings.profile_max_files)
+    return stem
+
+
+class ProfilingMiddleware:
+    """Plain ASGI middleware, so unprofiled requests add no extra task or response wrapping."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.profiling_enabled:
+            return await self.app(scope, receive, send)
+        headers = dict(scope.get("headers") or [])
+        if not should_profile(headers):
+            return await self.app(scope, receive, send)
+
+        raw_id = headers.get(REQUEST_ID_HEADER, b"").decode("latin-1")
+        request_id = raw_id if _SAFE_REQUEST_ID.fullmatch(raw_id) else uuid.uuid4().hex
+        status = {"code": None}
+
+        async def send_tagged(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        profiler = Profiler(interval=settings.profile_interval, async_mode="enabled")
+        t0 = time.perf_counter()
+        with collect_stages() as stages:
+            profiler.start()
+            try:
+                await self.app(scope, receive, send_tagged)
+            finally:
+                profiler.stop()
+                meta = {
+                    "request_id": request_id,
+                    "method": scope.get("method"),
+                    "path": scope.get("path"),
+                    "status": status["code"],
+                    "duration_s": time.perf_counter() - t0,
+                    "stages_s": stages,
+                }
+                try:
+                    await asyncio.to_thread(
+                        write_profile, settings.profile_dir, request_id, profiler.output_html(), meta
+                    )
+                except OSError as e:
+                    print(f"[PROFILE] Could not write profile {request_id}: {e}")
@@ -0,0 +1,140 @@
+import json
+from typing import Dict, List, Optional, Tuple
+
+from .retrieval import content_tokens
+from .utils_query import extract_entities
+
+# -------------------------------------------------
+# Rule-based query expansion for vague questions.
+# A question becomes up to N extra variants:
+# - house-theme rewrites: the houses whose name/theme in house_lords.json
+#   share words with the question, phrased like the house chunks
+# - a synonym rewrite from a small local table
+# All variants are embedded in one call and searched in one batched
+# Chroma query (see rag_pipeline.retrieve_candidates).
+# -------------------------------------------------
+
+HOUSE_LORDS_PATH = "app/domain/house_lords.json"
+
+THEME_SYNONYMS: Dict[str, List[str]] = {
+    "career": ["profession", "job", "reputation", "status"],
+    "job": ["career", "work", "profession"],
+    "work": ["job", "service", "career"],
+    "problem": ["obstacles", "enemies", "stress"],
+    "trouble": ["obstacles", "crisis", "stress"],
+    "money": ["wealth", "finances", "income", "gains"],
+    "wealth": ["money", "gains", "finances"],
+    "income": ["gains", "wealth", "money"],
+    "marriage": ["spouse", "partnership", "relationship"],
+    "relationship": ["partnership", "spouse", "love"],
+    "love": ["romance", "relationship"],
+    "children": ["kids", "progeny", "creativity"],
+    "kid": ["children", "progeny"],
+    "health": ["illness", "disease", "immunity", "vitality"],
+    "illness": ["health", "disease", "immunity"],
+    "home": ["mother", "property", "roots"],
+    "mother": ["home", "emotional"],
+    "father": ["guru", "dharma"],
+    "spirituality": ["moksha", "spiritual", "surrender"],
+    "loss": ["expenses", "release", "isolation"],
+    "travel": ["journeys", "abroad", "foreign"],
+    "abroad": ["foreign", "journeys"],
+    "education": ["learning", "wisdom", "knowledge"],
+    "friend": ["network", "gains", "community"],
+    "sibling": ["brothers", "sisters", "courage"],
+    "death": ["transformation", "longevity", "crisis"],
+    "emotion": ["feelings", "emotional", "mind"],
+    "fame": ["reputation", "recognition", "visibility"],
+}
+
+# weights of where a word appears in a house_lords.json entry
+W_HOUSE_NAME = 2.0
+W_THEME = 1.0
+W_NOTES = 0.5
+W_SYNONYM = 0.5   # a synonym of a question word counts half
+MIN_HOUSE_SCORE = 1.0   # at least one theme-level match; a word in the notes alone is not enough
+
+
+def _stem(token: str) -> str:
+    """Crude singular form, enough to match "problems"/"problem", "losses"/"loss"."""
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 4 and token.endswith("sses"):
+        return token[:-2]
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def _stems(text: str) -> set:
+    return {_stem(t) for t in content_tokens(text)}
+
+
+def build_theme_index(house_lords_map: Dict[str, Dict]) -> Tuple[Dict[str, Dict[int, float]], Dict[int, str]]:
+    """
+    word -> {house_number: weight} from house names, themes and notes, plus the
+    rewrite text for each house ("House 10 - Tenth House (...): <theme>").
+    """
+    index: Dict[str, Dict[int, float]] = {}
+    rewrites: Dict[int, str] = {}
+    for hn, entry in house_lords_map.items():
+        n = int(hn)
+        rewrites[n] = f"House {n} - {entry['house_name']}: {entry['theme']}"
+        for field, weight in (("house_name", W_HOUSE_NAME), ("theme", W_THEME), ("notes", W_NOTES)):
+            for tok in _stems(entry.get(field, "")):
+                houses = index.setdefault(tok, {})
+                houses[n] = max(houses.get(n, 0.0), weight)
+    return index, rewrites
+
+
+_theme_index: Optional[Tuple[Dict[str, Dict[int, float]], Dict[int, str]]] = None
+
+
+def theme_index() -> Tuple[Dict[str, Dict[int, float]], Dict[int, str]]:
+    global _theme_index
+    if _theme_index is None:
+        with open(HOUSE_LORDS_PATH, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+        _theme_index = build_theme_index({str(e["house_number"]): e for e in raw["house_lords"]})
+    return _theme_index
+
+
+def expand_query(query: str, max_expansions: int) -> List[str]:
+    """
+    [query, variant1, ...] with at most `max_expansions` variants.
+    Questions that already name both a planet and a house are precise enough
+    and are not expanded; house rewrites are only added when no house is named.
+    """
+    if max_expansions <= 0:
+        return [query]
+    entities = extract_entities(query)
+    if entities["planets"] and entities["houses"]:
+        return [query]
+
+    words = _stems(query)
+    synonyms: List[str] = []
+    for w in sorted(words):
+        for s in THEME_SYNONYMS.get(w, []):
+            if _stem(s) not in words and s not in synonyms:
+                synonyms.append(s)
+
+    house_variants: List[str] = []
+    if not entities["houses"]:
+        index, rewrites = theme_index()
+        scores: Dict[int, float] = {}
+        for tokens, factor in ((words, 1.0), ({_stem(s) for s in synonyms}, W_SYNONYM)):
+            for tok in tokens:
+                for n, weight in index.get(tok, {}).items():
+                    scores[n] = scores.get(n, 0.0) + weight * factor
+        best = sorted(
+            ((n, sc) for n, sc in scores.items() if sc >= MIN_HOUSE_SCORE), key=lambda kv: (-kv[1], kv[0])
+        )
+        house_variants = [rewrites[n] for n, _ in best]
+
+    variants: List[str] = []
+    if house_variants:
+        variants.append(house_variants.pop(0))
+    if synonyms:
+        variants.append(f"{query} {' '.join(synonyms[:6])}")
+    variants.extend(house_variants)
+    return [query] + variants[:max_expansions]
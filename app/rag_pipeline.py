@@ -1,60 +1,351 @@
-from typing import List
+import time
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
 from .config import settings
+from .deadline import Deadline, DeadlineExceeded
 from .vectorstore import vector_store
 from .models_openai import generate_answer
+from .answer_store import answer_store
+from .routing import ROUTE_STANDARD, choose_route
+from .retrieval import adaptive_k, extractive_answer, fuse_ranked, group_by_parent, neighbour_ids, rerank
+from .query_expansion import expand_query
+from .metrics import metrics
+from .sessions import Session, resolve_followup
 from .schemas import RetrievedChunk
+from .utils_chunk import estimate_tokens
 
 
+# The static prefix of every chat request: keep it byte-identical across
+# requests (no timestamps, IDs or per-query text) so the provider's prompt
+# cache can serve it; anything per-request belongs in the user message.
 SYSTEM_PROMPT = (
     "You are a Retrieval-Augmented Vedic Astrology Knowledge Assistant.\n"
-    "- You answer based ONLY on provided context.\n"
+    "- Answer ONLY using the CONTEXT in the user message. If the context is insufficient, say so honestly.\n"
     "- You avoid medical/political/legal predictions.\n"
-    "- If context is missing, say so honestly.\n"
     "- Be clear and human, not robotic."
 )
 
 
-async def run_rag(query: str) -> (str, List[RetrievedChunk]):
+def context_order(used: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
-    1. Retrieve top_k matches from Chroma.
-    2. Build context (truncate to max_context_chars).
-    3. Call GPT-5.
-    4. Return final answer + preview chunks.
+    Prompt order of the chunks that fit: relevance tiers (distance bucketed by
+    context_tier_width) best first, chunk ID within a tier. The same set of
+    chunks then always renders the same CONTEXT bytes, whatever order close
+    scores came back in, which keeps the prompt prefix cacheable.
     """
+    width = settings.context_tier_width
+    if width <= 0:
+        return used
+    return sorted(used, key=lambda r: (int(float(r.get("score", 0.0)) // width), r["id"]))
 
-    results = await vector_store.similarity_search(
-        query=query,
-        top_k=settings.top_k
-    )
 
-    # Build final context for the LLM
-    context_parts = []
+def build_context(results: List[Dict[str, Any]]) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Join retrieved chunks into the CONTEXT block (truncated to max_context_chars,
+    filled in relevance order, rendered in context_order).
+    Returns the context string and the results that actually made it in.
+    """
+    used = []
     total_chars = 0
     for r in results:
         block = f"[source]\n{r['text']}\n"
         if total_chars + len(block) > settings.max_context_chars:
             break
-        context_parts.append(block)
+        used.append(r)
         total_chars += len(block)
 
-    context_str = "\n\n".join(context_parts)
+    return "\n\n".join(f"[source]\n{r['text']}\n" for r in context_order(used)), used
+
+
+def record_context_tokens(used: List[Dict[str, Any]]):
+    """
+    Prompt tokens the context costs, and tokens saved against the previous verbose
+    chunk rendering (chunks carry its size as metadata "legacy_tokens").
+    """
+    tokens = sum(estimate_tokens(r["text"]) for r in used)
+    legacy = sum((r.get("meta") or {}).get("legacy_tokens", 0) for r in used)
+    metrics.inc("rag_context_tokens_total", tokens)
+    if legacy:
+        metrics.inc("rag_context_tokens_saved_total", max(0, legacy - tokens))
+
+
+def build_preview(results: List[Dict[str, Any]]) -> List[RetrievedChunk]:
+    """
+    Short previews so UI/debug can show what was used.
+    Fields come straight from our own store, so validation is skipped.
+    """
+    return [
+        RetrievedChunk.model_construct(
+            id=r["id"],
+            score=r["score"],
+            text=r["text"][:250],
+            meta=r["meta"]
+        )
+        for r in results
+    ]
+
+
+K_BUCKETS = [1, 2, 3, 4, 5, 6, 8, 10, 15, 20]
+
+# field sub-chunk hits fetched per wanted record (several fields of one record often match)
+FIELD_HITS_PER_RECORD = 3
+
+
+async def to_parents(
+    subs: List[Dict[str, Any]], fields_only: bool, limit: Optional[int] = None, store=None
+) -> List[Dict[str, Any]]:
+    """Field sub-chunk hits -> their parent records, fetched by ID (see retrieval.group_by_parent)."""
+    store = store or vector_store
+    order = list(dict.fromkeys(r["meta"]["parent_id"] for r in subs if (r.get("meta") or {}).get("parent_id")))
+    parents = {p["id"]: p for p in await store.get_by_ids(order)}
+    return group_by_parent(subs, parents, fields_only)[:limit]
+
+
+async def retrieve_candidates(
+    query: str, query_embedding=None, top_k: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Vector search; over-fetches the deepest possible selection * rerank_overfetch
+    when reranking is on. With query expansion on, the question and its rewrites
+    are embedded in one call, searched in one batched query and fused by rank.
+    With RETRIEVAL_GRANULARITY parent/fields (and a collection that has field
+    sub-chunks) the search runs over sub-chunks and returns their parent records,
+    whole or cut down to the matched fields.
+    """
+    depth = max(settings.top_k, settings.adaptive_max_k, top_k or 0)
+    n = depth * settings.rerank_overfetch if settings.rerank_enabled else depth
+    fields = settings.retrieval_granularity in ("parent", "fields") and vector_store.has_field_chunks()
+    search_kw = {"level": "field"} if fields else {}
+    n_hits = n * FIELD_HITS_PER_RECORD if fields else n
+
+    variants = expand_query(query, settings.query_expansion_max) if settings.query_expansion_enabled else [query]
+    if len(variants) == 1:
+        hits = await vector_store.similarity_search(
+            query=query,
+            top_k=n_hits,
+            query_embedding=query_embedding,
+            **search_kw
+        )
+    else:
+        metrics.inc("rag_query_expansion_total", variants=len(variants) - 1)
+        if query_embedding is None:
+            embeddings = await vector_store.embed_many(variants)
+        else:
+            rewrites = await vector_store.embed_many(variants[1:])
+            embeddings = np.vstack([np.asarray(query_embedding, dtype=np.float32), rewrites])
+        result_lists = await vector_store.similarity_search_many(embeddings, top_k=n_hits, **search_kw)
+        hits = fuse_ranked(result_lists, limit=n_hits)
+
+    if not fields:
+        return hits
+    return await to_parents(hits, fields_only=settings.retrieval_granularity == "fields", limit=n)
+
+
+def select_chunks(
+    query: str,
+    candidates: List[Dict[str, Any]],
+    top_k: Optional[int] = None,
+    max_distance: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Keep the chunks that go into the prompt, best first (local metadata-aware rerank).
+    How many:
+    - adaptive (default, or whenever `max_distance` is given): retrieval.adaptive_k()
+      on the candidates' distances, between adaptive_min_k and adaptive_max_k
+      (`top_k` caps it when both are given)
+    - fixed: `top_k`, else rerank_keep (reranking on) / settings.top_k
+    """
+    if max_distance is not None or (top_k is None and settings.adaptive_k_enabled):
+        k = adaptive_k(
+            candidates,
+            min_k=settings.adaptive_min_k,
+            max_k=top_k or settings.adaptive_max_k,
+            max_distance=settings.adaptive_max_distance if max_distance is None else max_distance,
+            jump=settings.adaptive_jump,
+        )
+    else:
+        k = top_k or (settings.rerank_keep if settings.rerank_enabled else settings.top_k)
+    metrics.observe("rag_retrieval_k", k, buckets=K_BUCKETS)
+    if not settings.rerank_enabled:
+        return candidates[:k]
+    return rerank(query, candidates, keep=k)
+
+
+async def add_neighbours(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Append up to graph_expansion_max chunks linked to `results` at ingest
+    (planet-in-house -> house, planet, house lord), fetched by ID rather than
+    by searching deeper. They go after the selected chunks, so build_context
+    drops them first when the context is full.
+    """
+    if not settings.graph_expansion_enabled or settings.graph_expansion_max <= 0:
+        return results
+    wanted = neighbour_ids(results, settings.graph_expansion_max)
+    if not wanted:
+        return results
+    scores = dict(wanted)
+    neighbours = await vector_store.get_by_ids([i for i, _ in wanted])
+    for n in neighbours:
+        n["score"] = scores[n["id"]]
+    metrics.inc("rag_graph_neighbours_total", len(neighbours))
+    return results + neighbours
+
+
+async def retrieve_selected(
+    query: str, query_embedding=None, top_k: Optional[int] = None, max_distance: Optional[float] = None
+) -> Tuple[List[Dict[str, Any]], int]:
+    """Chunks for the prompt (selected + linked neighbours) and k, how many select_chunks chose."""
+    candidates = await retrieve_candidates(query, query_embedding, top_k=top_k)
+    selected = select_chunks(query, candidates, top_k=top_k, max_distance=max_distance)
+    return await add_neighbours(selected), len(selected)
+
+
+async def retrieve(
+    query: str, query_embedding=None, top_k: Optional[int] = None, max_distance: Optional[float] = None
+) -> List[Dict[str, Any]]:
+    results, _ = await retrieve_selected(query, query_embedding, top_k=top_k, max_distance=max_distance)
+    return results
+
+
+def count_precomputed(hit: Dict[str, Any]):
+    """A served precomputed answer counts for the tier it was generated with (precompute.py)."""
+    metrics.inc("rag_route_total", route=hit.get("route", ROUTE_STANDARD))
+    metrics.inc("answer_store_hits_total")
+
+
+async def generate_within_deadline(
+    question: str, context_str: str, results: List[Dict[str, Any]], deadline: Deadline
+) -> str:
+    """
+    Model answer bounded by the remaining budget. When the budget is too small to
+    start, or runs out mid-generation, the extractive answer built from `results`
+    is returned instead and the deadline is marked degraded.
+    """
+    route = choose_route(question, results)
+    metrics.inc("rag_route_total", route=route.name)
+
+    stage = "budget"
+    if deadline.remaining() >= settings.deadline_min_generation_seconds:
+        t0 = time.perf_counter()
+        try:
+            llm_answer = await deadline.run(
+                generate_answer(
+                    system_prompt=SYSTEM_PROMPT,
+                    user_question=question,
+                    context=context_str,
+                    model=route.model,
+                    max_tokens=route.max_tokens,
+                    timeout=deadline.remaining(),
+                ),
+                "generation",
+            )
+            metrics.observe("rag_generation_seconds", time.perf_counter() - t0, route=route.name)
+            return llm_answer
+        except DeadlineExceeded:
+            stage = "generation"
+
+    deadline.mark_degraded(stage)
+    metrics.inc("rag_degraded_total", stage=stage)
+    return extractive_answer(question, results)
+
+
+async def run_rag(
+    query: str,
+    deadline: Optional[Deadline] = None,
+    top_k: Optional[int] = None,
+    max_distance: Optional[float] = None,
+) -> (str, List[RetrievedChunk], int):
+    """
+    0. Serve a precomputed answer if the query is a known canonical question
+       (not when the request overrides the retrieval depth).
+    1. Retrieve matches from Chroma (over-fetch + rerank, adaptive depth; see select_chunks),
+       plus the chunks linked to them at ingest (add_neighbours).
+    2. Build context (truncate to max_context_chars).
+    3. Pick a model tier for the query and call it.
+    4. Return final answer + preview chunks + k, the number of chunks select_chunks
+       chose (the preview also lists the linked neighbours).
+
+    Every stage runs within what is left of `deadline` (REQUEST_DEADLINE_SECONDS
+    when not given). Embedding/search overruns raise DeadlineExceeded; a
+    generation overrun falls back to an extractive answer (deadline.degraded).
+    """
+    deadline = deadline or Deadline(settings.request_deadline_seconds)
+
+    query_emb = None
+    if settings.answer_store_enabled and top_k is None and max_distance is None:
+        hit, query_emb = await deadline.run(answer_store.lookup(query), "embedding")
+        if hit is not None:
+            count_precomputed(hit)
+            preview = [RetrievedChunk(**p) for p in hit["preview"]]
+            return hit["answer"], preview, hit.get("k", len(preview))
 
-    llm_answer = await generate_answer(
-        system_prompt=SYSTEM_PROMPT,
-        user_question=query,
-        context=context_str
+    results, k = await deadline.run(
+        retrieve_selected(query, query_embedding=query_emb, top_k=top_k, max_distance=max_distance), "search"
     )
 
-    # Return previews so UI/debug can show what was used
-    retrieved_preview: List[RetrievedChunk] = []
-    for r in results:
-        retrieved_preview.append(
-            RetrievedChunk(
-                id=r["id"],
-                score=r["score"],
-                text=r["text"][:250],
-                meta=r["meta"]
+    # Build final context for the LLM
+    context_str, used = build_context(results)
+    record_context_tokens(used)
+
+    llm_answer = await generate_within_deadline(query, context_str, results, deadline)
+    return llm_answer, build_preview(results), k
+
+
+async def run_rag_session(
+    session: Session,
+    query: str,
+    deadline: Optional[Deadline] = None,
+    top_k: Optional[int] = None,
+    max_distance: Optional[float] = None,
+) -> (str, List[RetrievedChunk], int):
+    """
+    One turn of a conversation:
+    1. Resolve the follow-up against the previous turn's planets/houses.
+    2. Reuse chunks already retrieved in this session when they cover the question,
+       otherwise search (and remember the candidates).
+    3. Prompt = bounded rolling summary + bounded context, so it does not grow
+       with the length of the conversation.
+    Same deadline handling, depth overrides and return value as run_rag.
+    """
+    deadline = deadline or Deadline(settings.request_deadline_seconds)
+    resolved_query, entities, carried = resolve_followup(query, session.entities)
+
+    query_emb = None
+    hit = None
+    if settings.answer_store_enabled and not carried and top_k is None and max_distance is None:
+        hit, query_emb = await deadline.run(answer_store.lookup(query), "embedding")
+
+    if hit is not None:
+        count_precomputed(hit)
+        llm_answer = hit["answer"]
+        preview = [RetrievedChunk(**p) for p in hit["preview"]]
+        k = hit.get("k", len(preview))
+    else:
+        cached = session.covering_chunks(entities)
+        if cached is not None:
+            metrics.inc("session_chunk_reuse_total")
+            candidates = cached
+        else:
+            candidates = await deadline.run(
+                retrieve_candidates(resolved_query, query_embedding=query_emb, top_k=top_k), "search"
             )
-        )
+            session.remember_chunks(candidates)
+        selected = select_chunks(resolved_query, candidates, top_k=top_k, max_distance=max_distance)
+        k = len(selected)
+        results = await deadline.run(add_neighbours(selected), "search")
+
+        context_str, used = build_context(results)
+        record_context_tokens(used)
+        summary = session.summary()
+        if summary:
+            # after the retrieved chunks: it changes every turn, they often do not
+            context_str = f"{context_str}\n\n[conversation so far]\n{summary}"
+
+        llm_answer = await generate_within_deadline(resolved_query, context_str, results, deadline)
+        preview = build_preview(results)
 
-    return llm_answer, retrieved_preview
+    if entities["planets"] or entities["houses"]:
+        session.entities = entities
+    session.add_turn(query, llm_answer)
+    return llm_answer, preview, k
@@ -0,0 +1,235 @@
+import sys
+import asyncio
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+
+from .config import settings
+from .metrics import metrics
+from .utils_chunk import load_domain_jsons, flatten_astrology_docs, index_chunks
+from .embeddings import EmbeddingProvider
+from .vectorstore import VectorStore, read_pointer, vector_store, write_pointer
+
+# -------------------------------------------------
+# Blue/green re-ingestion.
+# 1. build a new versioned collection next to the live one
+# 2. validate it with smoke queries
+# 3. switch the active-collection pointer (atomic file replace)
+# Queries keep using the live collection until step 3, and the Chroma
+# writes run in a worker thread so the event loop never stalls.
+# Older versions stay for rollback until garbage-collected.
+# -------------------------------------------------
+
+VERSION_SEP = "_v"
+
+
+def versioned_name(base: str, now: Optional[datetime] = None) -> str:
+    now = now or datetime.now(timezone.utc)
+    return f"{base}{VERSION_SEP}{now.strftime('%Y%m%d%H%M%S%f')}"
+
+
+async def embed_batch(provider: EmbeddingProvider, texts: List[str]):
+    """Embed for a build; CPU-bound providers (local hashing) run in a worker thread too."""
+    if hasattr(provider, "embed_many_sync"):
+        return await asyncio.to_thread(provider.embed_many_sync, texts)
+    return await provider.embed_many(texts)
+
+
+def list_versions(store: VectorStore = vector_store) -> List[str]:
+    """Versioned collections of the configured base name, oldest first."""
+    prefix = settings.chroma_collection + VERSION_SEP
+    names = [c.name for c in store.client.list_collections()]
+    return sorted(n for n in names if n.startswith(prefix))
+
+
+async def build_version(store: VectorStore = vector_store, chunks: Optional[List[Dict[str, Any]]] = None) -> str:
+    """Create and fill a new versioned collection; returns its name. Does not activate it."""
+    if chunks is None:
+        chunks = index_chunks(flatten_astrology_docs(load_domain_jsons()))
+    if not chunks:
+        raise RuntimeError("No chunks generated from domain JSON. Check data format.")
+
+    name = versioned_name(settings.chroma_collection)
+    # Same embedding provider as the live collection unless EMBEDDING_PROVIDER asks otherwise
+    collection, provider = store.bind_collection(name, create=True)
+    print(f"[REINDEX] Building '{name}' with {len(chunks)} chunks...")
+
+    ids, documents, embed_texts, metadatas = VectorStore._prepare(chunks)
+    step = max(1, settings.reindex_batch_size)
+    try:
+        for i in range(0, len(ids), step):
+            embeddings = await embed_batch(provider, embed_texts[i:i + step])
+            await asyncio.to_thread(
+                collection.upsert,
+                ids=ids[i:i + step],
+                documents=documents[i:i + step],
+                metadatas=metadatas[i:i + step],
+                embeddings=embeddings,
+            )
+    except BaseException:
+        # a half-filled version must not linger (or be picked by a later rollback)
+        await asyncio.to_thread(store.client.delete_collection, name=name)
+        raise
+    return name
+
+
+async def validate_version(
+    store: VectorStore, name: str, chunks: Optional[List[Dict[str, Any]]] = None
+) -> Dict[str, Any]:
+    """
+    Smoke checks before a version may go live:
+    - row count equals the number of chunks
+    - a few chunks, used as queries, retrieve themselves in the top 3
+    Raises RuntimeError on failure.
+    """
+    if chunks is None:
+        chunks = index_chunks(flatten_astrology_docs(load_domain_jsons()))
+    ids, _, embed_texts, _ = VectorStore._prepare(chunks)
+    collection, provider = store.bind_collection(name)
+
+    count = await asyncio.to_thread(collection.count)
+    if count != len(set(ids)):
+        raise RuntimeError(f"Collection '{name}' has {count} rows, expected {len(set(ids))}.")
+
+    n = min(settings.reindex_smoke_queries, len(ids))
+    picks = [round(k * (len(ids) - 1) / max(n - 1, 1)) for k in range(n)]
+    query_embs = await embed_batch(provider, [embed_texts[k] for k in picks])
+    res = await asyncio.to_thread(collection.query, query_embeddings=query_embs, n_results=min(3, count))
+    missed = [ids[k] for k, got in zip(picks, res["ids"]) if ids[k] not in got]
+    if missed:
+        raise RuntimeError(f"Smoke queries failed on '{name}': {len(missed)}/{n} chunks not retrieved.")
+    return {"rows": count, "smoke_queries": n}
+
+
+def activate(store: VectorStore, name: str):
+    """Atomically point every worker at `name`; the previous collection goes to the rollback history."""
+    previous = store.active_name
+    pointer = read_pointer(store.persist_dir) or {}
+    history = [previous] + [h for h in pointer.get("history", []) if h not in (previous, name)]
+    write_pointer(store.persist_dir, {
+        "active": name,
+        "history": history,
+        "switched_at": datetime.now(timezone.utc).isoformat(),
+    })
+    store.switch_to(name)
+
+
+async def rollback(store: VectorStore = vector_store) -> str:
+    """Switch back to the most recent previous collection that still exists."""
+    existing = {c.name for c in await asyncio.to_thread(store.client.list_collections)}
+    pointer = await asyncio.to_thread(read_pointer, store.persist_dir)
+    for name in (pointer or {}).get("history", []):
+        if name in existing:
+            await asyncio.to_thread(activate, store, name)
+            return name
+    raise RuntimeError("No previous collection version to roll back to.")
+
+
+async def garbage_collect(store: VectorStore = vector_store, keep: Optional[int] = None) -> List[str]:
+    """
+    Delete versioned collections that are neither active nor among the `keep`
+    most recent rollback targets. The unversioned base collection is never touched.
+    """
+    keep = settings.reindex_keep_versions if keep is None else keep
+    if keep < 0:
+        raise ValueError(f"keep must be 0 or more, got {keep}")
+    active = store.active_name
+    history = ((await asyncio.to_thread(read_pointer, store.persist_dir)) or {}).get("history", [])
+    protected = {active, *history[:keep]}
+    deleted = []
+    for name in await asyncio.to_thread(list_versions, store):
+        if name not in protected:
+            await asyncio.to_thread(store.client.delete_collection, name=name)
+            deleted.append(name)
+    if deleted:
+        print(f"[REINDEX] Deleted old versions: {', '.join(deleted)}")
+    return deleted
+
+
+async def reindex(store: VectorStore = vector_store, chunks: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """
+    Build, validate, switch. A failed build never becomes active and is dropped.
+    `chunks` are index rows (utils_chunk.index_chunks); the domain data when not given.
+    """
+    if chunks is None:
+        chunks = index_chunks(flatten_astrology_docs(load_domain_jsons()))
+    name = await build_version(store, chunks)
+    try:
+        report = await validate_version(store, name, chunks)
+    except Exception:
+        await asyncio.to_thread(store.client.delete_collection, name=name)
+        metrics.inc("reindex_total", result="failed")
+        raise
+    previous = store.active_name
+    await asyncio.to_thread(activate, store, name)
+    metrics.inc("reindex_total", result="switched")
+    print(f"[REINDEX] Switched '{previous}' -> '{name}' ({report['rows']} rows)")
+
+    # Answers reference chunk IDs; rebuild them against the new collection when stale
+    if settings.answer_store_enabled:
+        from .precompute import build_answer_store
+        await build_answer_store()
+    return {"previous": previous, "active": name, **report}
+
+
+class ReindexJob:
+    """One background re-ingestion at a time per process."""
+
+    def __init__(self):
+        self.state: Dict[str, Any] = {"state": "idle"}
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, store: VectorStore = vector_store) -> bool:
+        """False when a job is already running."""
+        if self.running:
+            return False
+        self.state = {"state": "running", "started_at": datetime.now(timezone.utc).isoformat()}
+        self._task = asyncio.create_task(self._run(store))
+        return True
+
+    async def _run(self, store: VectorStore):
+        try:
+            result = await reindex(store)
+            self.state = {**self.state, "state": "succeeded", **result}
+        except Exception as e:
+            print(f"[REINDEX] Failed: {e}")
+            self.state = {**self.state, "state": "failed", "error": str(e)}
+        self.state["finished_at"] = datetime.now(timezone.utc).isoformat()
+
+    async def status(self) -> Dict[str, Any]:
+        versions = await asyncio.to_thread(list_versions)
+        return {**self.state, "active": vector_store.active_name, "versions": versions}
+
+
+reindex_job = ReindexJob()
+
+
+# -------------------------------------------------
+# CLI:
+#   python -m app.reindex            build + validate + switch
+#   python -m app.reindex --rollback
+#   python -m app.reindex --gc [--keep N]
+#   python -m app.reindex --list
+# -------------------------------------------------
+
+async def _main(argv: List[str]):
+    if "--rollback" in argv:
+        print(f"[REINDEX] Active collection: {await rollback()}")
+    elif "--gc" in argv:
+        keep = int(argv[argv.index("--keep") + 1]) if "--keep" in argv else None
+        if keep is not None and keep < 0:
+            raise SystemExit("[REINDEX] --keep must be 0 or more.")
+        await garbage_collect(keep=keep)
+    elif "--list" in argv:
+        print(f"active: {vector_store.active_name}")
+        for name in list_versions():
+            print(f"  {name}")
+    else:
+        await reindex()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main(sys.argv[1:]))
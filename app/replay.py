@@ -0,0 +1,185 @@
+import sys
+import json
+import time
+import asyncio
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+
+import httpx
+import numpy as np
+
+from .capture import read_capture
+
+# -------------------------------------------------
+# Deterministic replay of captured /chat/rag traffic (app/capture.py).
+# Requests are re-sent in capture order, each at its original offset from
+# the first one divided by --speed (2 = twice as fast, 0 = no pauses),
+# against any instance. Whether that instance calls the real chat model or
+# the local stub is its own setting (UPSTREAM_STUB).
+# A run is saved as JSON and two runs can be compared:
+#   latency percentiles, throughput, errors, retrieval agreement.
+# -------------------------------------------------
+
+DEFAULT_CONCURRENCY = 64
+
+
+def schedule(records: List[Dict[str, Any]], speed: float) -> List[float]:
+    """Send offsets in seconds from the start of the replay."""
+    if not records:
+        return []
+    t0 = records[0]["ts"]
+    if speed <= 0:
+        return [0.0] * len(records)
+    return [max(0.0, (r["ts"] - t0) / speed) for r in records]
+
+
+async def replay(
+    records: List[Dict[str, Any]],
+    url: str,
+    speed: float = 1.0,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    timeout: float = 60.0,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+) -> Dict[str, Any]:
+    """Re-send `records` to the instance at `url`; returns the run (per-request results + summary)."""
+    offsets = schedule(records, speed)
+    gate = asyncio.Semaphore(max(1, concurrency))
+    results: List[Optional[Dict[str, Any]]] = [None] * len(records)
+
+    async with httpx.AsyncClient(base_url=url, timeout=timeout, transport=transport) as client:
+        start = time.perf_counter()
+
+        async def send(i: int, record: Dict[str, Any]):
+            delay = offsets[i] - (time.perf_counter() - start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            async with gate:
+                sent = time.perf_counter()
+                try:
+                    resp = await client.post(
+                        record["endpoint"], json=record["request"], headers={"X-Request-Id": f"replay-{i}"}
+                    )
+                    status = resp.status_code
+                    body = resp.json() if status == 200 else {}
+                except httpx.HTTPError as e:
+                    status, body = 0, {"error": str(e)}
+                done = time.perf_counter()
+            results[i] = {
+                "i": i,
+                "status": status,
+                "sent_s": sent - start,
+                "latency_s": done - sent,
+                "ids": [c["id"] for c in body.get("retrieved_context_preview", [])],
+                "degraded": body.get("degraded", False),
+                "captured_ids": record.get("ids", []),
+            }
+
+        await asyncio.gather(*(send(i, r) for i, r in enumerate(records)))
+        wall = time.perf_counter() - start
+
+    return {
+        "url": url,
+        "speed": speed,
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "wall_s": wall,
+        "results": results,
+        "summary": summarize(results, wall),
+    }
+
+
+def summarize(results: List[Dict[str, Any]], wall_s: float) -> Dict[str, Any]:
+    ok = [r for r in results if r["status"] == 200]
+    lat = np.array([r["latency_s"] for r in ok]) if ok else np.zeros(1)
+    with_ids = [r for r in ok if r["captured_ids"]]
+    return {
+        "requests": len(results),
+        "ok": len(ok),
+        "errors": len(results) - len(ok),
+        "degraded": sum(1 for r in ok if r["degraded"]),
+        "throughput_rps": len(ok) / wall_s if wall_s > 0 else 0.0,
+        "latency_mean_s": float(lat.mean()),
+        "latency_p50_s": float(np.percentile(lat, 50)),
+        "latency_p95_s": float(np.percentile(lat, 95)),
+        "latency_p99_s": float(np.percentile(lat, 99)),
+        # same chunks as when the traffic was captured (index/tuning drift)
+        "ids_match_capture": (
+            sum(1 for r in with_ids if r["ids"] == r["captured_ids"]) / len(with_ids) if with_ids else None
+        ),
+    }
+
+
+def compare(a: Dict[str, Any], b: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Summary metrics of run `a` vs run `b`, with b's change relative to a."""
+    rows = []
+    for key, va in a["summary"].items():
+        vb = b["summary"].get(key)
+        change = (vb - va) / va if isinstance(va, (int, float)) and isinstance(vb, (int, float)) and va else None
+        rows.append({"metric": key, "a": va, "b": vb, "change": change})
+
+    # requests both runs answered: did they retrieve the same chunks?
+    pairs = [
+        (ra, rb) for ra, rb in zip(a["results"], b["results"]) if ra["status"] == 200 and rb["status"] == 200
+    ]
+    same = sum(1 for ra, rb in pairs if ra["ids"] == rb["ids"]) / len(pairs) if pairs else None
+    rows.append({"metric": "ids_match_between_runs", "a": same, "b": same, "change": None})
+    return rows
+
+
+def format_report(rows: List[Dict[str, Any]]) -> str:
+    def fmt(v):
+        if v is None:
+            return "-"
+        return f"{v:.4f}" if isinstance(v, float) else str(v)
+
+    lines = [f"{'metric':<24}{'a':>12}{'b':>12}{'change':>10}"]
+    for r in rows:
+        change = f"{r['change']:+.1%}" if r["change"] is not None else "-"
+        lines.append(f"{r['metric']:<24}{fmt(r['a']):>12}{fmt(r['b']):>12}{change:>10}")
+    return "\n".join(lines)
+
+
+# -------------------------------------------------
+# CLI:
+#   python -m app.replay run <capture file|dir> [--url http://localhost:8000]
+#                        [--speed 1.0] [--concurrency 64] [--limit N] [--out run.json]
+#   python -m app.replay compare <run_a.json> <run_b.json>
+# -------------------------------------------------
+
+def _opt(argv: List[str], name: str, default):
+    if name in argv:
+        return type(default)(argv[argv.index(name) + 1])
+    return default
+
+
+def _main(argv: List[str]):
+    if argv[:1] == ["run"] and len(argv) > 1:
+        records = [r for r in read_capture(argv[1]) if r.get("endpoint") and r.get("request")]
+        limit = _opt(argv, "--limit", 0)
+        if limit:
+            records = records[:limit]
+        run = asyncio.run(replay(
+            records,
+            _opt(argv, "--url", "http://localhost:8000"),
+            speed=_opt(argv, "--speed", 1.0),
+            concurrency=_opt(argv, "--concurrency", DEFAULT_CONCURRENCY),
+        ))
+        out = _opt(argv, "--out", f"replay-{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')}.json")
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(run, f)
+        print(json.dumps(run["summary"], indent=2))
+        print(f"[REPLAY] {len(records)} requests replayed; run saved to {out}")
+    elif argv[:1] == ["compare"] and len(argv) > 2:
+        with open(argv[1], "r", encoding="utf-8") as f:
+            a = json.load(f)
+        with open(argv[2], "r", encoding="utf-8") as f:
+            b = json.load(f)
+        print(format_report(compare(a, b)))
+    else:
+        print(
+            "usage: python -m app.replay run <capture> [--url URL] [--speed X] [--concurrency N] [--limit N] [--out F]\n"
+            "       python -m app.replay compare <run_a.json> <run_b.json>"
+        )
+
+
+if __name__ == "__main__":
+    _main(sys.argv[1:])
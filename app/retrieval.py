@@ -0,0 +1,223 @@
+import re
+from typing import List, Dict, Any, Tuple
+
+from .utils_chunk import planet_key
+from .utils_query import extract_entities
+
+# -------------------------------------------------
+# Post-retrieval stages that run locally on the candidates
+# Chroma returned (no extra model or network calls).
+# -------------------------------------------------
+
+# Weights for the rerank score; similarity is 1 - cosine distance (0..1)
+W_SIMILARITY = 1.0
+W_PLANET_MATCH = 0.35
+W_HOUSE_MATCH = 0.35
+W_TYPE_MATCH = 0.2
+W_MISMATCH = -0.3
+W_LEXICAL = 0.3
+
+STOPWORDS = {
+    "a", "an", "the", "of", "in", "on", "is", "are", "what", "which", "who", "how", "does",
+    "do", "my", "me", "i", "it", "to", "for", "and", "or", "with", "about", "tell", "when",
+    "if", "be", "mean", "means", "house", "planet",
+}
+_TOKEN_RE = re.compile(r"[a-z]+")
+
+
+def content_tokens(text: str) -> set:
+    return {t for t in _TOKEN_RE.findall((text or "").lower()) if t not in STOPWORDS and len(t) > 2}
+
+
+def wanted_type(entities: Dict[str, Any]) -> str:
+    """Chunk type a question most likely needs, or "" when it is unclear."""
+    if entities["planets"] and entities["houses"]:
+        return "planet_in_house"
+    if entities["houses"]:
+        return "house"
+    if entities["planets"]:
+        return "planet"
+    return ""
+
+
+def rerank_score(result: Dict[str, Any], entities: Dict[str, Any], query_tokens: set) -> float:
+    meta = result.get("meta") or {}
+    score = W_SIMILARITY * (1.0 - float(result.get("score", 1.0)))
+
+    planet = meta.get("planet_name")
+    if planet and entities["planets"]:
+        # metadata names nodes in full ("Ketu (South Node)"), questions by their short name
+        matched = planet_key(planet) in {planet_key(p) for p in entities["planets"]}
+        score += W_PLANET_MATCH if matched else W_MISMATCH
+
+    house = meta.get("house_number")
+    if house is not None and entities["houses"]:
+        score += W_HOUSE_MATCH if house in entities["houses"] else W_MISMATCH
+
+    want = wanted_type(entities)
+    if want and meta.get("type") == want:
+        score += W_TYPE_MATCH
+
+    if query_tokens:
+        overlap = len(query_tokens & content_tokens(result.get("text", "")))
+        score += W_LEXICAL * overlap / len(query_tokens)
+
+    return score
+
+
+def rerank(query: str, results: List[Dict[str, Any]], keep: int) -> List[Dict[str, Any]]:
+    """
+    Re-score over-fetched candidates by vector similarity, agreement between chunk
+    metadata (planet_name / house_number / type) and the entities in the question,
+    and lexical overlap. Returns the best `keep`, each with a "rerank_score".
+    """
+    entities = extract_entities(query)
+    query_tokens = content_tokens(query)
+
+    scored = []
+    for pos, r in enumerate(results):
+        s = rerank_score(r, entities, query_tokens)
+        # ties keep the vector-search order
+        scored.append((-s, pos, {**r, "rerank_score": s}))
+    scored.sort(key=lambda t: (t[0], t[1]))
+    return [r for _, _, r in scored[:keep]]
+
+
+def adaptive_k(
+    results: List[Dict[str, Any]], min_k: int, max_k: int, max_distance: float, jump: float
+) -> int:
+    """
+    How many chunks a question needs, from the distances of its candidates (best
+    first): cut before the first one farther than `max_distance`, or whose gap to
+    the previous one is more than `jump` times the average gap over all candidates.
+    The relative gap works the same for every embedding provider's distance scale.
+    A precise question whose best hit stands out keeps one chunk; a broad one with
+    many close hits keeps up to `max_k`.
+    """
+    dists = sorted(float(r.get("score", 1.0)) for r in results)
+    if not dists:
+        return 0
+    typical_gap = (dists[-1] - dists[0]) / max(len(dists) - 1, 1)
+    head = dists[:max(max_k, 1)]
+    k = len(head)
+    for i, d in enumerate(head):
+        if d > max_distance or (i and typical_gap > 0 and d - head[i - 1] > jump * typical_gap):
+            k = i
+            break
+    return min(max(k, min_k), len(head))
+
+
+def neighbour_ids(results: List[Dict[str, Any]], limit: int) -> List[Tuple[str, float]]:
+    """
+    Chunks linked from `results` by the ingest-time graph (metadata "related_ids",
+    see utils_chunk.link_related_chunks), best result's links first, skipping
+    chunks already in `results`. Each ID comes with its linking chunk's score.
+    """
+    have = {r["id"] for r in results}
+    out: List[Tuple[str, float]] = []
+    for r in results:
+        for rid in ((r.get("meta") or {}).get("related_ids") or "").split(","):
+            if len(out) >= limit:
+                return out
+            if rid and rid not in have:
+                have.add(rid)
+                out.append((rid, float(r.get("score", 0.0))))
+    return out
+
+
+def group_by_parent(
+    subs: List[Dict[str, Any]], parents: Dict[str, Dict[str, Any]], fields_only: bool
+) -> List[Dict[str, Any]]:
+    """
+    Field sub-chunk hits (best first) -> one result per parent record, in the
+    order of its best hit and with that hit's distance as "score". The text is
+    the whole record, or with `fields_only` the record title plus just the
+    matched fields in record order. meta gains "matched_fields" (comma-separated labels).
+    Hits whose parent is unknown are skipped.
+    """
+    grouped: Dict[str, List[Dict[str, Any]]] = {}
+    for r in subs:
+        pid = (r.get("meta") or {}).get("parent_id")
+        if pid in parents:
+            grouped.setdefault(pid, []).append(r)
+
+    out = []
+    for pid, hits in grouped.items():
+        parent = parents[pid]
+        hits = sorted(hits, key=lambda h: h["meta"].get("field_index", 0))
+        text = parent["text"]
+        if fields_only:
+            title = parent["text"].split("\n", 1)[0]
+            text = "\n".join([title] + [h["text"].split("\n", 1)[-1] for h in hits])
+        out.append({
+            **parent,
+            "score": min(float(h["score"]) for h in hits),
+            "text": text,
+            "meta": {**(parent.get("meta") or {}), "matched_fields": ",".join(h["meta"].get("field", "") for h in hits)},
+        })
+    return out
+
+
+# Reciprocal rank fusion constant (the usual 60: damps the weight of the very top ranks)
+RRF_K = 60
+
+
+def fuse_ranked(result_lists: List[List[Dict[str, Any]]], limit: int, k: int = RRF_K) -> List[Dict[str, Any]]:
+    """
+    Merge the result lists of several query variants by reciprocal rank fusion:
+    sum of 1 / (k + rank) over the lists a chunk appears in. The first list is the
+    original question, so it wins ties. Each chunk keeps its best (smallest)
+    distance as "score" and gets an "rrf_score".
+    """
+    fused: Dict[str, Dict[str, Any]] = {}
+    order: Dict[str, Any] = {}
+    for li, results in enumerate(result_lists):
+        for rank, r in enumerate(results):
+            entry = fused.get(r["id"])
+            if entry is None:
+                entry = fused[r["id"]] = {**r, "rrf_score": 0.0}
+                order[r["id"]] = (li, rank)
+            entry["rrf_score"] += 1.0 / (k + rank + 1)
+            entry["score"] = min(float(entry["score"]), float(r["score"]))
+    ranked = sorted(fused.values(), key=lambda e: (-e["rrf_score"], order[e["id"]]))
+    return ranked[:limit]
+
+
+# -------------------------------------------------
+# Extractive fallback: an answer assembled from the retrieved chunks
+# themselves, used when there is no time left to call the model.
+# -------------------------------------------------
+
+EXTRACTIVE_FIELDS = ("Meaning", "Summary", "Description", "Influence", "Positive", "Negative")
+EXTRACTIVE_NOTE = "Quick answer from the knowledge base (the detailed answer was not ready in time):"
+
+
+def extractive_answer(query: str, results: List[Dict[str, Any]], max_chars: int = 700, per_chunk: int = 2) -> str:
+    """
+    For each chunk (in rank order): its title line plus the `per_chunk` "Field: value"
+    lines that share the most words with the question (descriptive fields win ties).
+    """
+    query_tokens = content_tokens(query)
+    parts: List[str] = []
+    for r in results:
+        lines = [l.strip() for l in (r.get("text") or "").splitlines() if l.strip()]
+        if not lines:
+            continue
+        candidates = []
+        for pos, line in enumerate(lines[1:]):
+            key, sep, value = line.partition(":")
+            value = value.strip()
+            if not sep or not value or value.upper() == "N/A":
+                continue
+            overlap = len(query_tokens & content_tokens(value))
+            candidates.append((-overlap, key.strip() not in EXTRACTIVE_FIELDS, pos, line))
+        best = sorted(sorted(candidates)[:per_chunk], key=lambda c: c[2])
+        if best:
+            parts.append(lines[0].rstrip(":") + " — " + " ".join(c[3] for c in best))
+
+    if not parts:
+        return ""
+    body = "\n".join(parts)
+    if len(body) > max_chars:
+        body = body[:max_chars].rsplit(" ", 1)[0] + " …"
+    return f"{EXTRACTIVE_NOTE}\n{body}"
@@ -0,0 +1,59 @@
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+import hmac
+from typing import Any, Optional
+from .config import settings
+from .reindex import garbage_collect, reindex_job, rollback
+
+
+# ----------------------------------------------------
+# 🧩 Router setup
+# Admin routes are disabled unless ADMIN_TOKEN is set.
+# ----------------------------------------------------
+router = APIRouter(prefix="/admin", tags=["admin"], default_response_class=ORJSONResponse)
+
+
+def _check_token(token: Optional[str]):
+    if not settings.admin_token:
+        raise HTTPException(status_code=403, detail="Admin routes are disabled (set ADMIN_TOKEN).")
+    if token is None or not hmac.compare_digest(token.encode("utf-8"), settings.admin_token.encode("utf-8")):
+        raise HTTPException(status_code=401, detail="Invalid admin token.")
+
+
+@router.post("/reindex", status_code=202)
+async def start_reindex(x_admin_token: Optional[str] = Header(default=None)) -> Any:
+    """
+    🔁 Blue/green re-ingestion in the background
+
+    Builds a new versioned collection, validates it with smoke queries and
+    switches queries to it. Poll GET /admin/reindex for the outcome.
+    """
+    _check_token(x_admin_token)
+    if not reindex_job.start():
+        raise HTTPException(status_code=409, detail="A re-ingestion is already running.")
+    return await reindex_job.status()
+
+
+@router.get("/reindex")
+async def reindex_status(x_admin_token: Optional[str] = Header(default=None)) -> Any:
+    _check_token(x_admin_token)
+    return await reindex_job.status()
+
+
+@router.post("/reindex/rollback")
+async def reindex_rollback(x_admin_token: Optional[str] = Header(default=None)) -> Any:
+    _check_token(x_admin_token)
+    if reindex_job.running:
+        raise HTTPException(status_code=409, detail="A re-ingestion is running; roll back after it finishes.")
+    try:
+        return {"active": await rollback()}
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@router.post("/reindex/gc")
+async def reindex_gc(keep: Optional[int] = Query(None, ge=0), x_admin_token: Optional[str] = Header(default=None)) -> Any:
+    _check_token(x_admin_token)
+    if reindex_job.running:
+        raise HTTPException(status_code=409, detail="A re-ingestion is running; collect after it finishes.")
+    return {"deleted": await garbage_collect(keep=keep)}
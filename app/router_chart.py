@@ -0,0 +1,162 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import ORJSONResponse
+from datetime import datetime, timezone
+from typing import Any
+
+import numpy as np
+
+from .compatibility import CompatibilityWeights, encode_chart, profile_index
+from .config import settings
+from .dasha import NAKSHATRAS, active_periods, period_archetype, resolve_moon_longitudes
+from .ephemeris import chart_from_payload, parse_birth_time
+from .logic_interpret import interpret_chart, load_house_lords_map
+from .schemas import (
+    ChartRequest, CompatibilityRequest, CompatibilityResponse, DashaBatchRequest, DashaBatchResponse,
+)
+
+
+HOUSE_LORDS_PATH = "app/domain/house_lords.json"
+
+# ----------------------------------------------------
+# 🧩 Router setup
+# ----------------------------------------------------
+router = APIRouter(prefix="/chart", tags=["chart"], default_response_class=ORJSONResponse)
+
+_house_lords_map = None
+_compat_weights = None
+
+
+def get_house_lords_map():
+    global _house_lords_map
+    if _house_lords_map is None:
+        _house_lords_map = load_house_lords_map(HOUSE_LORDS_PATH)
+    return _house_lords_map
+
+
+def get_compat_weights() -> CompatibilityWeights:
+    global _compat_weights
+    if _compat_weights is None:
+        _compat_weights = CompatibilityWeights(get_house_lords_map())
+    return _compat_weights
+
+
+def _require_chart_input(body: ChartRequest):
+    if not body.houses and (body.dob is None or body.lat is None or body.long is None):
+        raise HTTPException(status_code=422, detail="Send either 'houses' or all of 'dob', 'lat' and 'long'.")
+
+
+@router.post("/interpret")
+async def interpret_chart_endpoint(body: ChartRequest) -> Any:
+    """
+    🪐 Personalized chart interpretation
+
+    Send either a ready `houses` map, or `dob` + `lat` + `long` and the
+    chart is computed in-process (sidereal/Lahiri, whole-sign houses).
+
+    Example Request:
+    {
+      "name": "Asha",
+      "dob": "1990-05-14T06:30:00+05:30",
+      "lat": 28.61,
+      "long": 77.21
+    }
+    """
+    _require_chart_input(body)
+    try:
+        return interpret_chart(body.model_dump(), get_house_lords_map())
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid birth data: {e}")
+
+
+@router.post("/compatibility", response_model=CompatibilityResponse)
+async def compatibility_endpoint(body: CompatibilityRequest) -> Any:
+    """
+    💞 Rank stored profiles by compatibility with one chart
+
+    The chart is given like /chart/interpret (houses, or dob + lat + long)
+    and scored against every stored profile in one vectorized pass.
+
+    Example Request:
+    {
+      "houses": {"1": "Sun", "7": ["Venus", "Moon"]},
+      "top_n": 5
+    }
+    """
+    _require_chart_input(body)
+    try:
+        houses = body.houses or chart_from_payload(body.model_dump())
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid birth data: {e}")
+    try:
+        chart = encode_chart(houses)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid houses: {e}")
+
+    n_profiles = len(profile_index)
+    if not n_profiles:
+        raise HTTPException(
+            status_code=503,
+            detail="No stored profiles. Import them with: python -m app.compatibility --import <profiles.json>",
+        )
+    top = min(body.top_n, settings.compat_max_top_n)
+    matches = profile_index.rank(chart, top, get_compat_weights())
+    return {
+        "matches": [{"profile_id": pid, "score": score} for pid, score in matches],
+        "profiles_scored": n_profiles,
+    }
+
+
+@router.post("/dasha", response_model=DashaBatchResponse)
+async def dasha_batch_endpoint(body: DashaBatchRequest) -> Any:
+    """
+    ⏳ Active Vimshottari periods for many people at one date
+
+    Each person needs `dob`, plus `moon_longitude` or `nakshatra` if known
+    (otherwise the Moon is computed from the birth time). All people are
+    evaluated in one vectorized call.
+
+    Example Request:
+    {
+      "at": "2026-01-01",
+      "people": [
+        {"id": "u1", "dob": "1990-05-14T06:30:00+05:30"},
+        {"id": "u2", "dob": "1985-02-02", "nakshatra": "Rohini"}
+      ]
+    }
+    """
+    if len(body.people) > settings.dasha_batch_max:
+        raise HTTPException(
+            status_code=413, detail=f"At most {settings.dasha_batch_max} people per request."
+        )
+    try:
+        births = np.array([parse_birth_time(p.dob) for p in body.people], dtype="datetime64[s]")
+        at = parse_birth_time(body.at) if body.at else np.datetime64(
+            datetime.now(timezone.utc).replace(tzinfo=None), "s"
+        )
+        moon = resolve_moon_longitudes(
+            births, [p.moon_longitude for p in body.people], [p.nakshatra for p in body.people]
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid birth data: {e}")
+    unborn = [p.id for p, b in zip(body.people, births) if b > at]
+    if unborn:
+        raise HTTPException(status_code=422, detail=f"`at` is before the birth of: {', '.join(unborn)}")
+
+    periods = active_periods(moon, births, at) if len(births) else None
+    results = []
+    for i, p in enumerate(body.people):
+        results.append({
+            "id": p.id,
+            "nakshatra": NAKSHATRAS[int(periods["nakshatra"][i])],
+            "mahadasha": {
+                **period_archetype(periods["maha"][i]),
+                "start": str(periods["maha_start"][i]),
+                "end": str(periods["maha_end"][i]),
+            },
+            "antardasha": {
+                **period_archetype(periods["antar"][i]),
+                "start": str(periods["antar_start"][i]),
+                "end": str(periods["antar_end"][i]),
+            },
+        })
+    return {"at": str(at), "results": results}
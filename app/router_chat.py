@@ -1,35 +1,44 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, Field
-from typing import Any, List
-from .rag_pipeline import run_rag
-from .schemas import RetrievedChunk
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import ORJSONResponse
+from typing import Any
+from .admission import AdmissionRejected, admission, priority_for
+from .capture import capture_request
+from .deadline import DEADLINE_HEADER, Deadline, DeadlineExceeded
+from .disconnect import ClientDisconnected, cancel_on_disconnect
+from .rag_pipeline import run_rag, run_rag_session
+from .schemas import ChatRequest, ChatResponse, SessionChatRequest, SessionChatResponse
+from .sessions import session_store
+from .serialization import chat_payload, render_response
 
 
 # ----------------------------------------------------
 # 🧩 Router setup
 # ----------------------------------------------------
-router = APIRouter(prefix="/chat", tags=["chat"])
+router = APIRouter(prefix="/chat", tags=["chat"], default_response_class=ORJSONResponse)
 
 
-# ----------------------------------------------------
-# 📥 Request / 📤 Response Models
-# ----------------------------------------------------
-class ChatRequest(BaseModel):
-    query: str = Field(..., description="User's natural language question or prompt.")
+def _priority(request: Request) -> str:
+    return priority_for(request.headers.get("x-api-key"), request.headers.get("x-priority"))
+
 
+def _busy(e: AdmissionRejected) -> HTTPException:
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
 
-class ChatResponse(BaseModel):
-    answer: str = Field(..., description="Final model-generated response to the query.")
-    retrieved_context_preview: List[RetrievedChunk] = Field(
-        ..., description="List of retrieved chunks used to answer the query."
-    )
+
+def _client_closed() -> HTTPException:
+    # nginx's "client closed request": nobody reads it, but access logs and traffic captures do
+    return HTTPException(status_code=499, detail="Client closed the request.")
 
 
 # ----------------------------------------------------
 # ⚙️ Core Endpoint
 # ----------------------------------------------------
-@router.post("/rag", response_model=ChatResponse)
-async def rag_chat_endpoint(body: ChatRequest) -> Any:
+@router.post(
+    "/rag",
+    response_model=ChatResponse,
+    responses={200: {"content": {"application/msgpack": {}}}},
+)
+async def rag_chat_endpoint(body: ChatRequest, request: Request) -> Any:
     """
     🔮 Retrieval-Augmented Chat Endpoint
 
@@ -39,6 +48,20 @@ async def rag_chat_endpoint(body: ChatRequest) -> Any:
       3️⃣ GPT-5 reasoning via OpenAI API using the context
       4️⃣ Returns final answer + preview of retrieved chunks
 
+    Serialization:
+      - JSON via orjson by default
+      - MessagePack when the client sends `Accept: application/msgpack`
+      - `"preview": "compact"` drops chunk text and metadata from the preview
+
+    Deadline:
+      - budget from `X-Request-Timeout-Ms` (else REQUEST_DEADLINE_SECONDS)
+      - generation that cannot finish in time is replaced by an extractive
+        answer from the top chunks, with `"degraded": true`
+
+    Disconnect:
+      - a client that goes away cancels the pipeline (queue wait, retrieval,
+        generation and the open upstream request); counted in rag_cancelled_total
+
     Example Request:
     {
       "query": "What happens if the Sun is in the first house?"
@@ -58,16 +81,89 @@ async def rag_chat_endpoint(body: ChatRequest) -> Any:
     }
     """
 
+    # the budget starts now, so time spent queued for a slot counts against it
+    deadline = Deadline.from_header(request.headers.get(DEADLINE_HEADER))
+    # opt-in traffic capture (CAPTURE_ENABLED) for offline replay, see app/capture.py
+    with capture_request("/chat/rag", body) as captured:
+        try:
+            async def work():
+                async with admission.slot(_priority(request)):
+                    return await run_rag(
+                        body.query, deadline=deadline, top_k=body.top_k, max_distance=body.max_distance
+                    )
+
+            # a closed tab cancels the queued/running pipeline and the upstream call
+            llm_answer, retrieved, k = await cancel_on_disconnect(request.receive, work(), "/chat/rag")
+
+            if not llm_answer:
+                raise HTTPException(status_code=404, detail="No relevant information found.")
+
+            # Built as plain data and rendered directly: the chunks were validated once
+            # in the pipeline, so the response model is only used for the OpenAPI schema.
+            payload = chat_payload(
+                llm_answer, retrieved, k, compact=body.preview == "compact", degraded=deadline.degraded
+            )
+            captured["ids"] = [c["id"] for c in payload["retrieved_context_preview"]]
+            captured["k"] = k
+            captured["degraded"] = deadline.degraded
+            return render_response(request, payload)
+
+        except AdmissionRejected as e:
+            raise _busy(e)
+        except ClientDisconnected:
+            raise _client_closed()
+        except DeadlineExceeded as e:
+            raise HTTPException(status_code=504, detail=str(e))
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"RAG pipeline error: {str(e)}")
+
+
+@router.post(
+    "/session",
+    response_model=SessionChatResponse,
+    responses={200: {"content": {"application/msgpack": {}}}},
+)
+async def session_chat_endpoint(body: SessionChatRequest, request: Request) -> Any:
+    """
+    💬 Conversational variant of /chat/rag
+
+    Follow-ups ("and what about Saturn there?") are resolved against the previous
+    turn, chunks already retrieved in the session are reused instead of searching
+    again, and only a short rolling summary of earlier turns is sent to the model.
+
+    Sessions live in memory on this worker (LRU + idle TTL); an unknown or expired
+    session_id silently starts a new session.
+    """
+
+    deadline = Deadline.from_header(request.headers.get(DEADLINE_HEADER))
+    session = session_store.get_or_create(body.session_id)
     try:
-        llm_answer, retrieved = await run_rag(body.query)
+        async def work():
+            async with admission.slot(_priority(request)):
+                return await run_rag_session(
+                    session, body.query, deadline=deadline, top_k=body.top_k, max_distance=body.max_distance
+                )
+
+        llm_answer, retrieved, k = await cancel_on_disconnect(request.receive, work(), "/chat/session")
 
         if not llm_answer:
             raise HTTPException(status_code=404, detail="No relevant information found.")
 
-        return ChatResponse(
-            answer=llm_answer,
-            retrieved_context_preview=retrieved
+        payload = chat_payload(
+            llm_answer, retrieved, k, compact=body.preview == "compact", degraded=deadline.degraded
         )
+        payload["session_id"] = session.id
+        return render_response(request, payload)
 
+    except AdmissionRejected as e:
+        raise _busy(e)
+    except ClientDisconnected:
+        raise _client_closed()
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"RAG pipeline error: {str(e)}")
@@ -0,0 +1,197 @@
+import sys
+import json
+import time
+import asyncio
+from typing import Dict, Any, List, NamedTuple
+
+import numpy as np
+
+from .config import settings
+from .utils_chunk import planet_key
+from .utils_query import extract_entities, normalize_query
+
+# -------------------------------------------------
+# Per-query model routing.
+# Classification is pure heuristics on the question and the
+# retrieved chunks: no model call, microseconds per query.
+# -------------------------------------------------
+
+ROUTE_LOOKUP = "lookup"
+ROUTE_STANDARD = "standard"
+ROUTE_COMPLEX = "complex"
+ROUTE_NAMES = [ROUTE_LOOKUP, ROUTE_STANDARD, ROUTE_COMPLEX]
+
+COMPARATIVE_WORDS = {
+    "compare", "comparison", "versus", "vs", "difference", "differences", "different",
+    "between", "both", "combined", "combination", "together", "whereas", "better", "worse",
+}
+LOOKUP_MAX_WORDS = 14
+COMPLEX_MIN_WORDS = 40
+
+
+class Route(NamedTuple):
+    name: str
+    model: str
+    max_tokens: int
+
+
+def route_for(name: str) -> Route:
+    if name == ROUTE_LOOKUP:
+        return Route(ROUTE_LOOKUP, settings.route_lookup_model, settings.route_lookup_max_tokens)
+    if name == ROUTE_COMPLEX:
+        return Route(ROUTE_COMPLEX, settings.route_complex_model, settings.route_complex_max_tokens)
+    return Route(ROUTE_STANDARD, settings.route_standard_model, settings.route_standard_max_tokens)
+
+
+def route_models() -> Dict[str, str]:
+    """Tier -> chat model choose_route() can pick with the current settings."""
+    if not settings.routing_enabled:
+        return {ROUTE_STANDARD: route_for(ROUTE_STANDARD).model}
+    return {name: route_for(name).model for name in ROUTE_NAMES}
+
+
+def _meta_matches(meta: Dict[str, Any], entities: Dict[str, Any]) -> bool:
+    """True when a chunk's metadata covers every planet/house named in the question."""
+    meta = meta or {}
+    for planet in entities["planets"]:
+        if planet_key(meta.get("planet_name")) != planet_key(planet):
+            return False
+    for house in entities["houses"]:
+        if meta.get("house_number") != house:
+            return False
+    return True
+
+
+def classify_query(query: str, results: List[Dict[str, Any]]) -> str:
+    """
+    - complex: comparative wording, several houses or planets, very long questions,
+      or retrieved chunks spread over many different houses
+    - lookup: short question about one placement, answered directly by the top chunk
+    - standard: everything else
+    """
+    entities = extract_entities(query)
+    words = normalize_query(query).split()
+    n_planets = len(entities["planets"])
+    n_houses = len(entities["houses"])
+
+    houses_in_results = {
+        (r.get("meta") or {}).get("house_number")
+        for r in results
+        if (r.get("meta") or {}).get("house_number") is not None
+    }
+
+    if (
+        COMPARATIVE_WORDS.intersection(words)
+        or n_planets >= 2
+        or n_houses >= 2
+        or len(words) >= COMPLEX_MIN_WORDS
+        or (n_planets + n_houses == 0 and len(houses_in_results) >= 4)
+    ):
+        return ROUTE_COMPLEX
+
+    if (
+        0 < n_planets + n_houses
+        and len(words) <= LOOKUP_MAX_WORDS
+        and results
+        and _meta_matches(results[0].get("meta"), entities)
+    ):
+        return ROUTE_LOOKUP
+
+    return ROUTE_STANDARD
+
+
+def choose_route(query: str, results: List[Dict[str, Any]]) -> Route:
+    if not settings.routing_enabled:
+        return route_for(ROUTE_STANDARD)
+    return route_for(classify_query(query, results))
+
+
+# -------------------------------------------------
+# Offline evaluation:
+#   python -m app.routing --eval benchmarks/queries.json [--out report.json]
+# Every query is answered by every tier on the same retrieved context.
+# Similarity is the embedding cosine against the complex-tier answer.
+# -------------------------------------------------
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    va = np.asarray(a, dtype=np.float32)
+    vb = np.asarray(b, dtype=np.float32)
+    denom = float(np.linalg.norm(va) * np.linalg.norm(vb)) or 1.0
+    return float(va @ vb) / denom
+
+
+async def evaluate_tiers(queries: List[str]) -> Dict[str, Any]:
+    from .models_openai import generate_answer, generate_embedding
+    from .rag_pipeline import SYSTEM_PROMPT, build_context, retrieve
+
+    rows = []
+    for q in queries:
+        results = await retrieve(q)
+        context_str, _ = build_context(results)
+
+        per_tier = {}
+        for name in ROUTE_NAMES:
+            route = route_for(name)
+            t0 = time.perf_counter()
+            answer = await generate_answer(
+                system_prompt=SYSTEM_PROMPT,
+                user_question=q,
+                context=context_str,
+                model=route.model,
+                max_tokens=route.max_tokens,
+            )
+            per_tier[name] = {"latency_s": time.perf_counter() - t0, "answer": answer}
+
+        reference = await generate_embedding(per_tier[ROUTE_COMPLEX]["answer"])
+        for name in ROUTE_NAMES:
+            emb = reference if name == ROUTE_COMPLEX else await generate_embedding(per_tier[name]["answer"])
+            per_tier[name]["similarity"] = _cosine(emb, reference)
+
+        rows.append({"query": q, "predicted_route": classify_query(q, results), "tiers": per_tier})
+
+    summary = {}
+    for name in ROUTE_NAMES:
+        lat = np.array([r["tiers"][name]["latency_s"] for r in rows]) if rows else np.zeros(1)
+        sim = np.array([r["tiers"][name]["similarity"] for r in rows]) if rows else np.zeros(1)
+        summary[name] = {
+            "model": route_for(name).model,
+            "max_tokens": route_for(name).max_tokens,
+            "latency_mean_s": float(lat.mean()),
+            "latency_p50_s": float(np.percentile(lat, 50)),
+            "latency_p95_s": float(np.percentile(lat, 95)),
+            "similarity_mean": float(sim.mean()),
+            "routed_queries": sum(1 for r in rows if r["predicted_route"] == name),
+        }
+
+    return {"queries": len(rows), "summary": summary, "rows": rows}
+
+
+def load_query_set(path: str) -> List[str]:
+    """Accepts a JSON list of strings or of {"query": ...} objects."""
+    with open(path, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    return [item["query"] if isinstance(item, dict) else item for item in raw]
+
+
+async def _main(argv: List[str]):
+    if "--eval" not in argv:
+        print("usage: python -m app.routing --eval <queries.json> [--out report.json]")
+        return
+    queries = load_query_set(argv[argv.index("--eval") + 1])
+    report = await evaluate_tiers(queries)
+
+    print(f"[ROUTING] Evaluated {report['queries']} queries")
+    print(f"{'tier':<10}{'model':<22}{'mean s':>8}{'p95 s':>8}{'sim':>7}{'routed':>8}")
+    for name, s in report["summary"].items():
+        print(
+            f"{name:<10}{s['model']:<22}{s['latency_mean_s']:>8.2f}{s['latency_p95_s']:>8.2f}"
+            f"{s['similarity_mean']:>7.3f}{s['routed_queries']:>8}"
+        )
+
+    if "--out" in argv:
+        with open(argv[argv.index("--out") + 1], "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    asyncio.run(_main(sys.argv[1:]))
@@ -1,18 +1,113 @@
 from pydantic import BaseModel, Field
-from typing import List, Any
+from typing import List, Dict, Any, Optional, Literal, Union
 
 
 class ChatRequest(BaseModel):
     query: str = Field(..., description="User's natural language question.")
+    preview: Literal["full", "compact"] = Field(
+        default="full",
+        description="'compact' leaves chunk text and metadata out of the preview (id + score only)."
+    )
+    top_k: Optional[int] = Field(
+        default=None, ge=1, le=20,
+        description="Use exactly this many chunks (with max_distance: at most this many)."
+    )
+    max_distance: Optional[float] = Field(
+        default=None, ge=0.0, le=2.0,
+        description="Adaptive depth with this distance cut-off instead of ADAPTIVE_MAX_DISTANCE."
+    )
 
 
 class RetrievedChunk(BaseModel):
     id: str
     score: float
-    text: str
-    meta: Any
+    text: Optional[str] = None
+    meta: Any = None
 
 
 class ChatResponse(BaseModel):
-    answer: str
-    retrieved_context_preview: List[RetrievedChunk]
+    answer: str = Field(..., description="Final model-generated response to the query.")
+    retrieved_context_preview: List[RetrievedChunk] = Field(
+        ..., description="List of retrieved chunks used to answer the query."
+    )
+    degraded: bool = Field(
+        default=False,
+        description="True when the model could not answer within the request deadline and the answer was extracted from the chunks."
+    )
+    k: int = Field(default=0, description="Number of chunks the answer was based on (the chosen retrieval depth).")
+
+
+class SessionChatRequest(ChatRequest):
+    session_id: Optional[str] = Field(
+        default=None,
+        description="Session returned by a previous turn; omit (or send an expired one) to start a new session."
+    )
+
+
+class SessionChatResponse(ChatResponse):
+    session_id: str = Field(..., description="Send this back with the next turn.")
+
+
+class ChartRequest(BaseModel):
+    name: Optional[str] = None
+    dob: Optional[str] = Field(
+        default=None,
+        description="ISO 8601 birth time, e.g. '1990-05-14T06:30:00+05:30' (a bare date is taken as 12:00 UTC)."
+    )
+    lat: Optional[float] = Field(default=None, description="Birth latitude in degrees, north positive.")
+    long: Optional[float] = Field(default=None, description="Birth longitude in degrees, east positive.")
+    houses: Optional[Dict[str, Union[str, List[str]]]] = Field(
+        default=None,
+        description="House number -> planet(s). Computed from dob/lat/long when omitted."
+    )
+
+
+class CompatibilityRequest(ChartRequest):
+    top_n: int = Field(default=10, ge=1, description="How many best-matching stored profiles to return.")
+
+
+class CompatibilityMatch(BaseModel):
+    profile_id: str
+    score: float
+
+
+class CompatibilityResponse(BaseModel):
+    matches: List[CompatibilityMatch]
+    profiles_scored: int = Field(..., description="Number of stored profiles the chart was ranked against.")
+
+
+class DashaPerson(BaseModel):
+    id: str
+    dob: str = Field(..., description="ISO 8601 birth time (UTC offset honoured).")
+    moon_longitude: Optional[float] = Field(
+        default=None, description="Sidereal Moon longitude in degrees; most precise input."
+    )
+    nakshatra: Optional[Union[int, str]] = Field(
+        default=None,
+        description="Birth nakshatra (1 = Ashwini, or its name) when the Moon longitude is unknown."
+    )
+
+
+class DashaBatchRequest(BaseModel):
+    people: List[DashaPerson]
+    at: Optional[str] = Field(default=None, description="Date to evaluate (ISO 8601); defaults to now.")
+
+
+class DashaPeriod(BaseModel):
+    planet: str
+    start: str
+    end: str
+    keywords: Optional[str] = None
+    style: Optional[str] = None
+
+
+class DashaResult(BaseModel):
+    id: str
+    nakshatra: str
+    mahadasha: DashaPeriod
+    antardasha: DashaPeriod
+
+
+class DashaBatchResponse(BaseModel):
+    at: str
+    results: List[DashaResult]
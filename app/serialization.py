@@ -0,0 +1,57 @@
+from typing import Any, Dict, List, Union
+
+from fastapi import Request
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import BaseModel
+
+try:  # optional: JSON keeps working without it
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+
+
+class MsgPackResponse(Response):
+    media_type = "application/msgpack"
+
+    def render(self, content: Any) -> bytes:
+        return msgpack.packb(content, use_bin_type=True)
+
+
+def wants_msgpack(request: Request) -> bool:
+    """Content negotiation on the Accept header (JSON stays the default)."""
+    if msgpack is None:
+        return False
+    accept = request.headers.get("accept", "").lower()
+    return any(mt in accept for mt in MSGPACK_MEDIA_TYPES)
+
+
+def chunk_payload(chunk: Union[BaseModel, Dict[str, Any]], compact: bool) -> Dict[str, Any]:
+    """
+    Plain dict for one preview chunk. Chunks are already validated when the
+    pipeline builds them, so no second model round-trip happens here.
+    """
+    if isinstance(chunk, BaseModel):
+        chunk = chunk.__dict__
+    if compact:
+        return {"id": chunk["id"], "score": chunk["score"]}
+    return {"id": chunk["id"], "score": chunk["score"], "text": chunk.get("text"), "meta": chunk.get("meta")}
+
+
+def chat_payload(
+    answer: str, chunks: List[Any], k: int, compact: bool = False, degraded: bool = False
+) -> Dict[str, Any]:
+    """k is the depth the pipeline chose, not len(chunks): the preview also lists linked neighbours."""
+    return {
+        "answer": answer,
+        "retrieved_context_preview": [chunk_payload(c, compact) for c in chunks],
+        "degraded": degraded,
+        "k": k,
+    }
+
+
+def render_response(request: Request, payload: Dict[str, Any]) -> Response:
+    if wants_msgpack(request):
+        return MsgPackResponse(payload)
+    return ORJSONResponse(payload)
@@ -0,0 +1,204 @@
+import re
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Dict, Any, List, Optional, Callable, Tuple
+
+from .config import settings
+from .metrics import metrics
+from .utils_chunk import planet_key
+from .utils_query import extract_entities, normalize_query
+
+# -------------------------------------------------
+# Bounded in-process conversation sessions.
+# - LRU + TTL eviction, so memory stays flat under load
+# - per-session cache of chunks already retrieved
+# - compact rolling summary instead of the full transcript
+# -------------------------------------------------
+
+FOLLOWUP_PREFIXES = ("and ", "what about ", "how about ", "also ", "then ")
+FOLLOWUP_WORDS = {"there", "it", "that", "this", "same"}
+FOLLOWUP_MAX_WORDS = 12
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+class Session:
+    def __init__(self, session_id: str, now: float):
+        self.id = session_id
+        self.created_at = now
+        self.last_seen = now
+        self.entities: Dict[str, Any] = {"planets": [], "houses": [], "intents": []}
+        self.chunks: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.turns: deque = deque(maxlen=settings.session_max_turns)
+
+    # ---- retrieved chunk cache ----
+
+    def remember_chunks(self, results: List[Dict[str, Any]]):
+        for r in results:
+            self.chunks[r["id"]] = r
+            self.chunks.move_to_end(r["id"])
+        while len(self.chunks) > settings.session_max_chunks:
+            self.chunks.popitem(last=False)
+
+    def covering_chunks(self, entities: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        """
+        Cached chunks that cover every placement the question needs, or None when
+        something is missing (the caller then searches again).
+        """
+        planets, houses = entities["planets"], entities["houses"]
+        if not planets and not houses:
+            return None
+
+        if planets and houses:
+            wanted = [("planet_in_house", h, p) for h in houses for p in planets]
+        elif houses:
+            wanted = [("house", h, None) for h in houses]
+        else:
+            wanted = [("planet", None, p) for p in planets]
+
+        found: List[Dict[str, Any]] = []
+        for typ, house, planet in wanted:
+            match = None
+            for r in reversed(self.chunks.values()):
+                meta = r.get("meta") or {}
+                if meta.get("type") != typ:
+                    continue
+                if house is not None and meta.get("house_number") != house:
+                    continue
+                if planet is not None and planet_key(meta.get("planet_name")) != planet_key(planet):
+                    continue
+                match = r
+                break
+            if match is None:
+                return None
+            found.append(match)
+
+        # related cached chunks (same house or planet) ride along for the reranker
+        found_ids = {r["id"] for r in found}
+        planet_keys = {planet_key(p) for p in planets}
+        extra = [
+            r for r in self.chunks.values()
+            if r["id"] not in found_ids and (
+                (r.get("meta") or {}).get("house_number") in houses
+                or planet_key((r.get("meta") or {}).get("planet_name")) in planet_keys
+            )
+        ]
+        return found + extra
+
+    # ---- rolling summary ----
+
+    def add_turn(self, query: str, answer: str):
+        first = _SENTENCE_RE.split((answer or "").strip(), maxsplit=1)[0]
+        self.turns.append(f"Q: {query.strip()} A: {first}")
+
+    def summary(self) -> str:
+        """Oldest turns fall off first once session_summary_chars is reached."""
+        out: List[str] = []
+        total = 0
+        for line in reversed(self.turns):
+            if total + len(line) + 1 > settings.session_summary_chars:
+                break
+            out.append(line)
+            total += len(line) + 1
+        return "\n".join(reversed(out))
+
+
+def is_followup(query: str) -> bool:
+    q = normalize_query(query)
+    words = q.split()
+    return len(words) <= FOLLOWUP_MAX_WORDS and (
+        q.startswith(FOLLOWUP_PREFIXES) or bool(FOLLOWUP_WORDS.intersection(words))
+    )
+
+
+def resolve_followup(query: str, previous: Dict[str, Any]) -> Tuple[str, Dict[str, Any], bool]:
+    """
+    Fill in what a follow-up leaves out from the previous turn's entities:
+    "and what about Saturn there?" after "Sun in the 1st house?" -> Saturn + house 1.
+
+    Returns (query to retrieve with, resolved entities, whether anything was carried over).
+    """
+    entities = extract_entities(query)
+    if not (previous["planets"] or previous["houses"]):
+        return query, entities, False
+
+    planets, houses = list(entities["planets"]), list(entities["houses"])
+    followup = is_followup(query)
+    if not planets and not houses:
+        if not followup:
+            return query, entities, False
+        planets, houses = list(previous["planets"]), list(previous["houses"])
+    elif followup and not houses:
+        houses = list(previous["houses"])
+    elif followup and not planets:
+        planets = list(previous["planets"])
+
+    if planets == entities["planets"] and houses == entities["houses"]:
+        return query, entities, False
+
+    resolved = {"planets": planets, "houses": houses, "intents": entities["intents"]}
+    parts = []
+    if planets:
+        parts.append(", ".join(planets))
+    if houses:
+        parts.append("in house " + ", ".join(str(h) for h in houses))
+    return f"{query} (about {' '.join(parts)})", resolved, True
+
+
+class SessionStore:
+    """
+    OrderedDict keyed by session ID, oldest-used first.
+    Expired sessions are dropped lazily on access and on every insert.
+    """
+
+    def __init__(self, max_sessions: int, ttl_seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _expired(self, s: Session, now: float) -> bool:
+        return now - s.last_seen > self.ttl_seconds
+
+    def _purge_expired(self, now: float):
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if not self._expired(oldest, now):
+                break
+            self._sessions.popitem(last=False)
+            metrics.inc("session_evictions_total", reason="ttl")
+
+    def get(self, session_id: Optional[str]) -> Optional[Session]:
+        if not session_id:
+            return None
+        now = self._clock()
+        s = self._sessions.get(session_id)
+        if s is None:
+            return None
+        if self._expired(s, now):
+            del self._sessions[session_id]
+            metrics.inc("session_evictions_total", reason="ttl")
+            return None
+        s.last_seen = now
+        self._sessions.move_to_end(session_id)
+        return s
+
+    def create(self) -> Session:
+        now = self._clock()
+        self._purge_expired(now)
+        while len(self._sessions) >= self.max_sessions:
+            self._sessions.popitem(last=False)
+            metrics.inc("session_evictions_total", reason="lru")
+        s = Session(str(uuid.uuid4()), now)
+        self._sessions[s.id] = s
+        metrics.set_gauge("sessions_active", len(self._sessions))
+        return s
+
+    def get_or_create(self, session_id: Optional[str]) -> Session:
+        return self.get(session_id) or self.create()
+
+
+session_store = SessionStore(settings.session_max, settings.session_ttl_seconds)
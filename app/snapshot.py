@@ -0,0 +1,170 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import hashlib
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from .config import settings
+from .utils_chunk import domain_content_hash
+from .vectorstore import VectorStore, vector_store
+
+# -------------------------------------------------
+# Portable index snapshots.
+# One compressed .npz with columnar arrays:
+#   ids, documents (unicode), metadatas (one JSON string per row),
+#   embeddings (float32, N x D), manifest (JSON as uint8 bytes)
+# The manifest records the embedding provider/model, the domain content
+# hash and a sha256 over the columns, checked before anything is loaded.
+# Import bulk-loads a new versioned collection and switches to it
+# (same blue/green pointer as app/reindex.py); no embedding calls.
+# -------------------------------------------------
+
+SNAPSHOT_FORMAT = 1
+LOAD_BATCH = 4096   # rows per Chroma write (Chroma caps a single upsert batch)
+COLUMNS = ("ids", "documents", "metadatas", "embeddings")
+
+
+def _checksum(columns: Dict[str, np.ndarray]) -> str:
+    h = hashlib.sha256()
+    for name in COLUMNS:
+        arr = np.ascontiguousarray(columns[name])
+        h.update(name.encode("utf-8"))
+        h.update(str(arr.dtype).encode("utf-8"))
+        h.update(str(arr.shape).encode("utf-8"))
+        h.update(arr.tobytes())
+    return h.hexdigest()
+
+
+def export_snapshot(path: str, store: VectorStore = vector_store) -> Dict[str, Any]:
+    """Write the active collection to `path`; returns the manifest."""
+    collection, provider = store.bind_collection(store.active_name)
+    rows = collection.get(include=["documents", "metadatas", "embeddings"])
+    if not rows["ids"]:
+        raise RuntimeError(f"Collection '{collection.name}' is empty; ingest before exporting a snapshot.")
+    embeddings = np.asarray(rows["embeddings"], dtype=np.float32)
+    columns = {
+        "ids": np.asarray(rows["ids"], dtype=str),
+        "documents": np.asarray(rows["documents"], dtype=str),
+        "metadatas": np.asarray([json.dumps(m or {}, sort_keys=True) for m in rows["metadatas"]], dtype=str),
+        "embeddings": embeddings.reshape(len(rows["ids"]), -1),
+    }
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "collection": collection.name,
+        "embedding_provider": provider.name,
+        "embedding_model": provider.model,
+        "dimension": int(columns["embeddings"].shape[1]),
+        "count": len(columns["ids"]),
+        "content_hash": domain_content_hash(),
+        "checksum": _checksum(columns),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.tmp.npz"
+    np.savez_compressed(
+        tmp, manifest=np.frombuffer(json.dumps(manifest).encode("utf-8"), dtype=np.uint8), **columns
+    )
+    os.replace(tmp, path)
+    print(f"[SNAPSHOT] Exported {manifest['count']} rows of '{collection.name}' to {path}")
+    return manifest
+
+
+def read_snapshot(path: str) -> Dict[str, Any]:
+    """Load and verify a snapshot: {"manifest": {...}, <column>: array}. Raises RuntimeError."""
+    with np.load(path, allow_pickle=False) as data:
+        try:
+            manifest = json.loads(data["manifest"].tobytes().decode("utf-8"))
+            columns = {name: data[name] for name in COLUMNS}
+        except KeyError as e:
+            raise RuntimeError(f"Snapshot {path} is missing {e}.")
+    if manifest.get("format") != SNAPSHOT_FORMAT:
+        raise RuntimeError(f"Snapshot {path} has format {manifest.get('format')}, expected {SNAPSHOT_FORMAT}.")
+    if _checksum(columns) != manifest.get("checksum"):
+        raise RuntimeError(f"Snapshot {path} failed its checksum; refusing to load it.")
+    return {"manifest": manifest, **columns}
+
+
+def import_snapshot(path: str, store: VectorStore = vector_store) -> Dict[str, Any]:
+    """
+    Bulk-load a snapshot into a new versioned collection and make it active.
+    The collection records the snapshot's embedding provider, so queries are
+    embedded in the same space the snapshot was built in.
+    """
+    from .reindex import activate, versioned_name
+
+    snap = read_snapshot(path)
+    manifest = snap["manifest"]
+    if manifest["content_hash"] != domain_content_hash():
+        print(f"[SNAPSHOT] {path} was built from different domain data; loading it anyway (re-ingest to refresh).")
+
+    name = versioned_name(settings.chroma_collection)
+    collection, provider = store.bind_collection(name, create=True, provider=manifest["embedding_provider"])
+    if provider.model != manifest["embedding_model"]:
+        store.client.delete_collection(name=name)
+        raise RuntimeError(
+            f"Snapshot was embedded with '{manifest['embedding_model']}', "
+            f"but the '{provider.name}' provider is configured for '{provider.model}'."
+        )
+
+    for i in range(0, manifest["count"], LOAD_BATCH):
+        collection.upsert(
+            ids=snap["ids"][i:i + LOAD_BATCH].tolist(),
+            documents=snap["documents"][i:i + LOAD_BATCH].tolist(),
+            metadatas=[json.loads(m) for m in snap["metadatas"][i:i + LOAD_BATCH]],
+            embeddings=snap["embeddings"][i:i + LOAD_BATCH],
+        )
+    activate(store, name)
+    print(f"[SNAPSHOT] Imported {manifest['count']} rows from {path} into '{name}'")
+    return {**manifest, "active": name}
+
+
+async def load_on_startup(store: VectorStore = vector_store) -> Optional[Dict[str, Any]]:
+    """Import the configured snapshot when it exists and the active collection is empty."""
+    path = settings.snapshot_path
+    if not settings.snapshot_load_on_startup or not os.path.exists(path):
+        return None
+    if await asyncio.to_thread(store.collection.count):
+        return None
+    t0 = time.perf_counter()
+    try:
+        result = await asyncio.to_thread(import_snapshot, path, store)
+    except Exception as e:
+        print(f"[SNAPSHOT] Not loaded: {e}")
+        return None
+    print(f"[SNAPSHOT] Cold start from snapshot took {time.perf_counter() - t0:.2f}s")
+    return result
+
+
+# -------------------------------------------------
+# CLI:
+#   python -m app.snapshot --export [path]
+#   python -m app.snapshot --import [path]
+#   python -m app.snapshot --info [path]
+# path defaults to SNAPSHOT_PATH
+# -------------------------------------------------
+
+def _main(argv: List[str]):
+    for flag in ("--export", "--import", "--info"):
+        if flag in argv:
+            i = argv.index(flag)
+            path = argv[i + 1] if i + 1 < len(argv) else settings.snapshot_path
+            break
+    else:
+        print("usage: python -m app.snapshot --export|--import|--info [path]")
+        return
+    if flag == "--export":
+        export_snapshot(path)
+    elif flag == "--import":
+        import_snapshot(path)
+    else:
+        print(json.dumps(read_snapshot(path)["manifest"], indent=2))
+
+
+if __name__ == "__main__":
+    _main(sys.argv[1:])
@@ -1,5 +1,51 @@
 import json
-from typing import List, Dict, Any
+import hashlib
+import uuid
+from typing import List, Dict, Any, Optional, Tuple
+
+DOMAIN_FILES = [
+    "app/domain/astrology_houses.json",
+    "app/domain/astrology_planets.json",
+    "app/domain/planets_in_house.json"
+]
+HOUSE_LORDS_FILE = "app/domain/house_lords.json"
+
+# Bump when the chunk rendering changes: chunk IDs change with it, so it is part
+# of domain_content_hash() and artifacts keyed by chunk IDs get rebuilt
+CHUNK_FORMAT_VERSION = "2"
+
+# Fixed namespace so the same chunk text always maps to the same ID across ingests
+_CHUNK_NAMESPACE = uuid.UUID("6f1c2a52-3d0e-4c8e-9a57-0f6b8e2d4c11")
+
+
+def chunk_id(text: str) -> str:
+    """
+    Deterministic chunk ID derived from the chunk text.
+    Re-ingesting unchanged content overwrites the same rows instead of duplicating them,
+    and anything keyed by chunk IDs (e.g. precomputed answers) stays valid.
+    """
+    return str(uuid.uuid5(_CHUNK_NAMESPACE, text))
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count (~4 chars per token for English with the OpenAI tokenizers).
+    Good enough for comparing prompt sizes without pulling in a tokenizer.
+    """
+    return (len(text or "") + 3) // 4
+
+
+def domain_content_hash() -> str:
+    """
+    sha256 over every domain JSON file (including house_lords.json) and the
+    chunk format version. Used to tell whether artifacts derived from the domain data are stale.
+    """
+    h = hashlib.sha256(CHUNK_FORMAT_VERSION.encode("utf-8"))
+    for fp in DOMAIN_FILES + [HOUSE_LORDS_FILE]:
+        h.update(fp.encode("utf-8"))
+        with open(fp, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
 
 
 def load_domain_jsons() -> List[Dict[str, Any]]:
@@ -7,27 +53,199 @@ def load_domain_jsons() -> List[Dict[str, Any]]:
     Loads all domain JSON files (astrology houses, planets, planets_in_house) and
     returns them as python dicts in a list. We'll use this for ingestion.
     """
-    files = [
-        "app/domain/astrology_houses.json",
-        "app/domain/astrology_planets.json",
-        "app/domain/planets_in_house.json"
-    ]
     docs = []
-    for fp in files:
+    for fp in DOMAIN_FILES:
         with open(fp, "r", encoding="utf-8") as f:
             data = json.load(f)
             docs.append({"source_file": fp, "data": data})
     return docs
 
 
-def flatten_astrology_docs(docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+# Placeholder values the domain JSON uses for "no data"; such fields are dropped
+EMPTY_VALUES = {"", "none", "n/a", "na", "null", "-"}
+
+
+def clean_value(value: Any) -> str:
+    """
+    Normalize one field value to compact text; "" when it carries no information.
+    Lists are joined with "; " (items lose their trailing period), whitespace is collapsed.
+    """
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple)):
+        items = [clean_value(v).rstrip(".") for v in value]
+        return "; ".join(i for i in items if i)
+    text = " ".join(str(value).split())
+    return "" if text.lower() in EMPTY_VALUES else text
+
+
+def render_chunk(title: str, fields: List[Tuple[str, Any]]) -> Tuple[str, str]:
+    """
+    Two views of one chunk, both without empty fields:
+    - embed text: one compact line; prose values go in without their label,
+      short values (a sign, a planet, a stone) keep it since they mean little alone
+    - context text: title plus one "Label: value" line per field, for the prompt
+    """
+    kept = [(label, v) for label, v in ((label, clean_value(v)) for label, v in fields) if v]
+    embed_text = " ".join(
+        [f"{title}."]
+        + [f"{label}: {v.rstrip('.')}." if len(v.split()) <= 3 else f"{v.rstrip('.')}." for label, v in kept]
+    )
+    context_text = "\n".join([f"{title}:"] + [f"{label}: {v}" for label, v in kept])
+    return embed_text, context_text
+
+
+def _make_chunk(
+    title: str, fields: List[Tuple[str, Any]], legacy_text: str, source: Dict[str, Any], metadata: Dict[str, Any]
+) -> Dict[str, Any]:
+    embed_text, context_text = render_chunk(title, fields)
+    return {
+        "id": chunk_id(embed_text),
+        "text": context_text,
+        "embed_text": embed_text,
+        "metadata": {
+            **metadata,
+            "level": "record",
+            # Chroma metadata values must be scalars, so the source record is stored as JSON
+            "fields": json.dumps(source, ensure_ascii=False, sort_keys=True),
+            "embed_tokens": estimate_tokens(embed_text),
+            # size of the previous verbose rendering, for the savings report
+            "legacy_tokens": estimate_tokens(legacy_text),
+        },
+    }
+
+
+# parent metadata not copied to its field sub-chunks
+_PARENT_ONLY_META = ("fields", "embed_tokens", "legacy_tokens", "related_ids", "level")
+
+
+def field_chunks(chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    One sub-chunk per field of every record chunk ("Label: value" line of its
+    context text), embedded on its own so a question about a house's gemstone
+    is not diluted by its meaning and notes. Each carries metadata level="field",
+    parent_id, field (label) and field_index, plus the parent's planet/house/type.
+    IDs derive from the parent ID and the label, so they never collide with a record.
+    """
+    subs = []
+    for ch in chunks:
+        title, *lines = ch["text"].split("\n")
+        title = title.rstrip(":")
+        base = {k: v for k, v in ch["metadata"].items() if k not in _PARENT_ONLY_META}
+        for i, line in enumerate(lines):
+            label, _, value = line.partition(": ")
+            if not value:
+                continue
+            embed_text = f"{title}. {label}: {value.rstrip('.')}."
+            subs.append({
+                "id": chunk_id(f"{ch['id']}/{label}"),
+                "text": f"{title}:\n{line}",
+                "embed_text": embed_text,
+                "metadata": {
+                    **base,
+                    "level": "field",
+                    "parent_id": ch["id"],
+                    "field": label,
+                    "field_index": i,
+                    "embed_tokens": estimate_tokens(embed_text),
+                },
+            })
+    return subs
+
+
+def index_chunks(chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Everything that goes into a collection: the record chunks and their field sub-chunks."""
+    return chunks + field_chunks(chunks)
+
+
+def dedupe_chunks(chunks: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+    """Drop chunks whose normalized content (and so their ID) was already seen; keeps the first."""
+    seen = set()
+    unique = []
+    for ch in chunks:
+        if ch["id"] in seen:
+            continue
+        seen.add(ch["id"])
+        unique.append(ch)
+    return unique, len(chunks) - len(unique)
+
+
+def token_report(chunks: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Embedding/context token totals of `chunks` against the previous verbose rendering."""
+    legacy = sum(ch["metadata"].get("legacy_tokens", 0) for ch in chunks)
+    embed = sum(estimate_tokens(ch.get("embed_text", ch["text"])) for ch in chunks)
+    context = sum(estimate_tokens(ch["text"]) for ch in chunks)
+    return {
+        "chunks": len(chunks),
+        "legacy_tokens": legacy,
+        "embed_tokens": embed,
+        "embed_tokens_saved": legacy - embed,
+        "context_tokens": context,
+        "context_tokens_saved": legacy - context,
+    }
+
+
+def planet_key(name: Any) -> str:
+    """"Ketu (South Node)" / "ketu" -> "ketu"."""
+    return str(name or "").split("(")[0].strip().lower()
+
+
+def load_house_lords(path: str = HOUSE_LORDS_FILE) -> Dict[int, List[str]]:
+    """house number -> natural lord(s); "Mars/Ketu" lists both."""
+    with open(path, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    return {
+        int(e["house_number"]): [p.strip() for p in str(e.get("natural_lord") or "").split("/") if p.strip()]
+        for e in raw["house_lords"]
+    }
+
+
+def link_related_chunks(chunks: List[Dict[str, Any]], house_lords: Dict[int, List[str]]) -> int:
+    """
+    Precomputed adjacency, stored on each chunk as metadata "related_ids"
+    (comma-separated chunk IDs, most useful first; Chroma metadata must be scalar):
+    planet-in-house -> its house, its planet, the house's natural lord(s).
+    The pipeline pulls these in by ID instead of searching deeper. Returns the number of links.
+    """
+    houses: Dict[int, str] = {}
+    planets: Dict[str, str] = {}
+    for ch in chunks:
+        meta = ch["metadata"]
+        if meta.get("type") == "house":
+            houses.setdefault(meta.get("house_number"), ch["id"])
+        elif meta.get("type") == "planet":
+            planets.setdefault(planet_key(meta.get("planet_name")), ch["id"])
+
+    links = 0
+    for ch in chunks:
+        meta = ch["metadata"]
+        if meta.get("type") != "planet_in_house":
+            continue
+        house_no = meta.get("house_number")
+        candidates = [houses.get(house_no), planets.get(planet_key(meta.get("planet_name")))]
+        candidates += [planets.get(planet_key(lord)) for lord in house_lords.get(house_no, [])]
+        related = []
+        for cid in candidates:
+            if cid and cid != ch["id"] and cid not in related:
+                related.append(cid)
+        if related:
+            meta["related_ids"] = ",".join(related)
+            links += len(related)
+    return links
+
+
+def flatten_astrology_docs(
+    docs: List[Dict[str, Any]], house_lords: Optional[Dict[int, List[str]]] = None
+) -> List[Dict[str, Any]]:
     """
     Convert the structured astrology JSON into retrievable text chunks.
 
     We’ll emit chunks shaped like:
     {
-      "text": "...",
-      "metadata": {...}
+      "id": "...",          # deterministic, see chunk_id() (of the embed text)
+      "text": "...",        # context rendering, stored as the Chroma document
+      "embed_text": "...",  # compact normalized text that gets embedded
+      "metadata": {...}     # incl. "fields": the source record as JSON
     }
 
     Strategy:
@@ -35,7 +253,10 @@ def flatten_astrology_docs(docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     - planets -> each planet becomes one chunk
     - planets_in_house -> each planet-in-house relationship becomes one chunk
 
-    You can tune chunk granularity here.
+    Empty / "None" / "N/A" fields are dropped and chunks with identical
+    content are emitted once. Planet-in-house chunks are linked to their house,
+    planet and house lord chunks (see link_related_chunks; `house_lords` defaults
+    to house_lords.json). You can tune chunk granularity here.
     """
     chunks: List[Dict[str, Any]] = []
 
@@ -46,65 +267,94 @@ def flatten_astrology_docs(docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         # 1. houses
         if "vedic_astrology" in data and "houses" in data["vedic_astrology"]:
             for h in data["vedic_astrology"]["houses"]:
-                text_block = (
+                gem = h.get("recommended_gemstone") or {}
+                legacy = (
                     f"House {h.get('house_number')} - {h.get('house_name')}:\n"
-                    f"Sign: {h.get('zodiac_sign')}\n"
-                    f"Ruling Planet(s): {h.get('ruling_planet')}\n"
-                    f"Meaning: {h.get('meaning')}\n"
-                    f"Influence: {h.get('influence')}\n"
-                    f"Gemstone: {h.get('recommended_gemstone', {}).get('name')}\n"
-                    f"Gemstone Effects: {h.get('recommended_gemstone', {}).get('effects')}\n"
+                    f"Sign: {h.get('zodiac_sign')}\nRuling Planet(s): {h.get('ruling_planet')}\n"
+                    f"Meaning: {h.get('meaning')}\nInfluence: {h.get('influence')}\n"
+                    f"Gemstone: {gem.get('name')}\nGemstone Effects: {gem.get('effects')}\n"
                     f"Notes: {h.get('note', 'N/A')}\n"
                 )
-                chunks.append({
-                    "text": text_block,
-                    "metadata": {
+                chunks.append(_make_chunk(
+                    f"House {h.get('house_number')} - {h.get('house_name')}",
+                    [
+                        ("Sign", h.get("zodiac_sign")),
+                        ("Ruling Planet(s)", h.get("ruling_planet")),
+                        ("Meaning", h.get("meaning")),
+                        ("Influence", h.get("influence")),
+                        ("Gemstone", gem.get("name")),
+                        ("Gemstone Effects", gem.get("effects")),
+                        ("Notes", h.get("note")),
+                    ],
+                    legacy,
+                    h,
+                    {
                         "type": "house",
                         "house_number": h.get("house_number"),
                         "zodiac_sign": h.get("zodiac_sign"),
                         "source_file": src
-                    }
-                })
+                    },
+                ))
 
         # 2. planets
         if "vedic_astrology" in data and "planets" in data["vedic_astrology"]:
             for p in data["vedic_astrology"]["planets"]:
-                gem = p.get("gemstone", {})
-                text_block = (
-                    f"Planet: {p.get('name')}\n"
-                    f"Sanskrit: {p.get('sanskrit_name', 'N/A')}\n"
-                    f"Description: {p.get('description')}\n"
-                    f"Influence: {p.get('influence')}\n"
+                gem = p.get("gemstone") or {}
+                legacy = (
+                    f"Planet: {p.get('name')}\nSanskrit: {p.get('sanskrit_name', 'N/A')}\n"
+                    f"Description: {p.get('description')}\nInfluence: {p.get('influence')}\n"
                     f"Gemstone: {gem.get('name')}, Color: {gem.get('color')}, Effects: {gem.get('effects')}\n"
                 )
-                chunks.append({
-                    "text": text_block,
-                    "metadata": {
+                chunks.append(_make_chunk(
+                    f"Planet {p.get('name')}",
+                    [
+                        ("Sanskrit", p.get("sanskrit_name")),
+                        ("Description", p.get("description")),
+                        ("Influence", p.get("influence")),
+                        ("Gemstone", gem.get("name")),
+                        ("Gemstone Color", gem.get("color")),
+                        ("Gemstone Effects", gem.get("effects")),
+                    ],
+                    legacy,
+                    p,
+                    {
                         "type": "planet",
                         "planet_name": p.get("name"),
                         "source_file": src
-                    }
-                })
+                    },
+                ))
 
         # 3. planets_in_house
         if "planets_in_house" in data:
             house_data = data["planets_in_house"]
             house_no = house_data.get("house_number")
             for planet_obj in house_data.get("planets", []):
-                text_block = (
+                positive = planet_obj.get("positive_manifestations", planet_obj.get("positive_traits", []))
+                negative = planet_obj.get("negative_manifestations", planet_obj.get("negative_traits", []))
+                legacy = (
                     f"Planet {planet_obj.get('planet')} in House {house_no}:\n"
                     f"Summary: {planet_obj.get('summary', '')}\n"
-                    f"Positive: {', '.join(planet_obj.get('positive_manifestations', planet_obj.get('positive_traits', [])))}\n"
-                    f"Negative: {', '.join(planet_obj.get('negative_manifestations', planet_obj.get('negative_traits', [])))}\n"
+                    f"Positive: {', '.join(positive)}\nNegative: {', '.join(negative)}\n"
                 )
-                chunks.append({
-                    "text": text_block,
-                    "metadata": {
+                chunks.append(_make_chunk(
+                    f"Planet {planet_obj.get('planet')} in House {house_no}",
+                    [
+                        ("Summary", planet_obj.get("summary")),
+                        ("Positive", positive),
+                        ("Negative", negative),
+                    ],
+                    legacy,
+                    planet_obj,
+                    {
                         "type": "planet_in_house",
                         "house_number": house_no,
                         "planet_name": planet_obj.get("planet"),
                         "source_file": src
-                    }
-                })
+                    },
+                ))
 
-    return chunks
+    unique, duplicates = dedupe_chunks(chunks)
+    if duplicates:
+        print(f"[CHUNK] Dropped {duplicates} duplicate chunk(s)")
+    link_related_chunks(unique, load_house_lords() if house_lords is None else house_lords)
+    return unique
@@ -0,0 +1,98 @@
+import re
+from typing import Dict, List, Any
+
+# -------------------------------------------------
+# Cheap, rule-based parsing of user questions.
+# No model calls here: this runs on every request.
+# -------------------------------------------------
+
+PLANET_ALIASES: Dict[str, str] = {
+    "sun": "Sun", "surya": "Sun",
+    "moon": "Moon", "chandra": "Moon",
+    "mars": "Mars", "mangal": "Mars",
+    "mercury": "Mercury", "budh": "Mercury", "budha": "Mercury",
+    "venus": "Venus", "shukra": "Venus",
+    "jupiter": "Jupiter", "guru": "Jupiter", "brihaspati": "Jupiter",
+    "saturn": "Saturn", "shani": "Saturn",
+    "rahu": "Rahu",
+    "ketu": "Ketu",
+}
+
+ORDINAL_WORDS: Dict[str, int] = {
+    "first": 1, "second": 2, "third": 3, "fourth": 4, "fifth": 5, "sixth": 6,
+    "seventh": 7, "eighth": 8, "ninth": 9, "tenth": 10, "eleventh": 11, "twelfth": 12,
+}
+
+HOUSE_ALIASES: Dict[str, int] = {
+    "lagna": 1,
+    "ascendant": 1,
+}
+
+# "1st house", "house 1", "house no. 1", "first house", "12th bhava"
+_HOUSE_NUM_RE = re.compile(
+    r"\b(?:(\d{1,2})(?:st|nd|rd|th)?\s+(?:house|bhava)"
+    r"|(?:house|bhava)\s*(?:no\.?|number|#)?\s*(\d{1,2}))\b"
+)
+_HOUSE_WORD_RE = re.compile(
+    r"\b(" + "|".join(ORDINAL_WORDS) + r")\s+(?:house|bhava)\b"
+)
+
+INTENT_KEYWORDS: Dict[str, List[str]] = {
+    "gemstone": ["gemstone", "gem", "stone", "ratna", "crystal"],
+    "lord": ["lord", "ruler", "rules", "ruling", "ruled", "governs", "owner"],
+}
+
+_PUNCT_RE = re.compile(r"[^\w\s]")
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize_query(text: str) -> str:
+    """
+    Lowercase, strip punctuation and collapse whitespace.
+    Used as an exact-match key, so it must stay stable across releases.
+    """
+    text = _PUNCT_RE.sub(" ", (text or "").lower())
+    return _WS_RE.sub(" ", text).strip()
+
+
+def extract_entities(query: str) -> Dict[str, Any]:
+    """
+    Detect planets, house numbers and coarse intents mentioned in a question.
+
+    Returns:
+    {
+      "planets": ["Sun", ...],      # canonical names, in order of first mention
+      "houses": [1, 7, ...],        # 1..12, in order of first mention
+      "intents": ["gemstone", ...]  # keys of INTENT_KEYWORDS
+    }
+    """
+    norm = normalize_query(query)
+    tokens = norm.split()
+
+    planets: List[str] = []
+    for tok in tokens:
+        name = PLANET_ALIASES.get(tok)
+        if name and name not in planets:
+            planets.append(name)
+
+    houses: List[int] = []
+    for m in _HOUSE_NUM_RE.finditer(norm):
+        n = int(m.group(1) or m.group(2))
+        if 1 <= n <= 12 and n not in houses:
+            houses.append(n)
+    for m in _HOUSE_WORD_RE.finditer(norm):
+        n = ORDINAL_WORDS[m.group(1)]
+        if n not in houses:
+            houses.append(n)
+    for tok in tokens:
+        n = HOUSE_ALIASES.get(tok)
+        if n and n not in houses:
+            houses.append(n)
+
+    intents: List[str] = []
+    token_set = set(tokens)
+    for intent, words in INTENT_KEYWORDS.items():
+        if token_set.intersection(words):
+            intents.append(intent)
+
+    return {"planets": planets, "houses": houses, "intents": intents}
@@ -0,0 +1,143 @@
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from .ephemeris import compute_charts, houses_maps
+
+# -------------------------------------------------
+# Divisional charts (vargas), vectorized over many charts.
+#
+# Varga D-N splits each sign into N parts (30/N degrees); the part a
+# longitude falls in maps to a sign by Parashara's rules, which depend
+# on the birth sign only through its parity (odd/even) or modality
+# (movable/fixed/dual). So every varga is a (12, N) lookup table, read
+# flat: floor(longitude * N / 30) is rasi * N + part, one multiply and
+# one take() per varga. The Trimsamsa (D30) has five unequal spans per
+# sign, all bounded at whole degrees, so it is a (12, 30) table of 1° parts.
+#
+# Houses are whole-sign, counted from the varga sign of the ascendant,
+# like compute_charts does for D1.
+# -------------------------------------------------
+
+VARGA_NAMES = {
+    1: "Rasi", 2: "Hora", 3: "Drekkana", 4: "Chaturthamsa", 7: "Saptamsa", 9: "Navamsa",
+    10: "Dasamsa", 12: "Dwadasamsa", 16: "Shodasamsa", 20: "Vimsamsa", 24: "Chaturvimsamsa",
+    27: "Saptavimsamsa", 30: "Trimsamsa", 40: "Khavedamsa", 45: "Akshavedamsa", 60: "Shashtiamsa",
+}
+VARGAS = tuple(VARGA_NAMES)
+
+ARIES, TAURUS, GEMINI, CANCER, LEO, VIRGO, LIBRA, SCORPIO, SAGITTARIUS, CAPRICORN, AQUARIUS, PISCES = range(12)
+
+# Trimsamsa: degrees where each span ends (the last one ends at 30) and the sign it gives
+_TRIMSAMSA_ENDS = np.array([[5, 10, 18, 25], [5, 12, 20, 25]], dtype=np.float64)   # odd, even signs
+_TRIMSAMSA_SIGNS = np.array([
+    [ARIES, AQUARIUS, SAGITTARIUS, GEMINI, LIBRA],      # Mars, Saturn, Jupiter, Mercury, Venus
+    [TAURUS, VIRGO, PISCES, CAPRICORN, SCORPIO],        # Venus, Mercury, Jupiter, Saturn, Mars
+], dtype=np.int8)
+
+
+def _first_sign(division: int, rasi: int) -> int:
+    """Sign of the first part of `rasi` in varga `division`; later parts follow in zodiac order."""
+    odd = rasi % 2 == 0             # Aries (index 0) is the first, odd sign
+    modality = rasi % 3             # 0 movable, 1 fixed, 2 dual
+    if division in (1, 3, 4, 12, 60):
+        return rasi                  # D3 / D4 then step 4 / 3 signs per part (see _table)
+    if division == 7:
+        return rasi if odd else (rasi + 6) % 12
+    if division == 9:
+        return (rasi + (0, 8, 4)[modality]) % 12
+    if division == 10:
+        return rasi if odd else (rasi + 8) % 12
+    if division in (16, 45):
+        return (ARIES, LEO, SAGITTARIUS)[modality]
+    if division == 20:
+        return (ARIES, SAGITTARIUS, LEO)[modality]
+    if division == 24:
+        return LEO if odd else CANCER
+    if division == 27:
+        return (ARIES, CANCER, LIBRA, CAPRICORN)[rasi % 4]   # fire, earth, air, water
+    if division == 40:
+        return ARIES if odd else LIBRA
+    raise ValueError(f"No first-sign rule for D{division}")
+
+
+def _table(division: int) -> np.ndarray:
+    """(12, division) varga sign of each part of each sign."""
+    if division == 30:
+        degrees = np.arange(30)
+        parts = (degrees[None, :] >= _TRIMSAMSA_ENDS[:, :, None]).sum(axis=1)   # (2, 30)
+        return np.array([_TRIMSAMSA_SIGNS[r % 2, parts[r % 2]] for r in range(12)], dtype=np.int8)
+    if division == 2:
+        # Hora: odd signs Sun (Leo) then Moon (Cancer), even signs the reverse
+        return np.array([[LEO, CANCER] if r % 2 == 0 else [CANCER, LEO] for r in range(12)], dtype=np.int8)
+    step = {3: 4, 4: 3}.get(division, 1)
+    parts = np.arange(division)
+    return np.array(
+        [(_first_sign(division, r) + step * parts) % 12 for r in range(12)], dtype=np.int8
+    )
+
+
+# division -> flat (12 * parts,) table; D30 is read in 30 parts of 1°
+_TABLES = {d: _table(d).ravel() for d in VARGAS}
+
+
+def _signs(lon: np.ndarray, division: int) -> np.ndarray:
+    """Longitudes already in [0, 360) -> varga signs."""
+    table = _TABLES.get(division)
+    if table is None:
+        raise ValueError(f"Unsupported varga D{division}; supported: {', '.join(f'D{d}' for d in VARGAS)}")
+    parts = len(table) // 12
+    idx = np.asarray(lon * (parts / 30.0)).astype(np.int32)
+    np.minimum(idx, len(table) - 1, out=idx)
+    return table.take(idx)
+
+
+def varga_signs(longitudes, division: int) -> np.ndarray:
+    """
+    Sidereal longitudes (any shape, degrees) -> sign index 0..11 (0 = Aries)
+    in varga D-`division`, same shape.
+    """
+    return _signs(np.mod(np.asarray(longitudes, dtype=np.float64), 360.0), division)
+
+
+def compute_vargas(
+    longitudes: np.ndarray, ascendant: np.ndarray, divisions: Sequence[int] = VARGAS
+) -> Dict[int, Dict[str, np.ndarray]]:
+    """
+    Varga placements for many charts at once.
+
+    longitudes: (N, 9) sidereal longitudes in ephemeris.PLANETS order;
+    ascendant: (N,) sidereal ascendant longitude.
+
+    Returns {division: {
+      "signs":     (N, 9) varga sign 0..11 of each planet
+      "ascendant": (N,)   varga sign of the ascendant
+      "houses":    (N, 9) whole-sign house 1..12 from the varga ascendant
+    }}
+    """
+    longitudes = np.mod(np.atleast_2d(np.asarray(longitudes, dtype=np.float64)), 360.0)
+    ascendant = np.mod(np.atleast_1d(np.asarray(ascendant, dtype=np.float64)), 360.0)
+    out = {}
+    for d in divisions:
+        signs = _signs(longitudes, d)
+        asc = _signs(ascendant, d)
+        houses = signs - asc[:, None]            # int8 -11..11
+        houses += 12
+        np.remainder(houses, 12, out=houses)
+        houses += 1
+        out[d] = {"signs": signs, "ascendant": asc, "houses": houses}
+    return out
+
+
+def varga_charts(when, lat, lon, divisions: Sequence[int] = VARGAS) -> Dict[int, Dict[str, np.ndarray]]:
+    """compute_charts + compute_vargas for UTC datetime64 births (N,) and their coordinates."""
+    chart = compute_charts(when, lat, lon)
+    return compute_vargas(chart["longitudes"], chart["ascendant"], divisions)
+
+
+def varga_houses_maps(vargas: Dict[int, Dict[str, np.ndarray]]) -> Dict[str, List[Dict[str, List[str]]]]:
+    """
+    compute_vargas output -> {"D9": [houses map per chart], ...}, each map in the
+    format interpret_chart accepts ({"1": ["Sun"], "7": ["Moon", "Mars"], ...}).
+    """
+    return {f"D{d}": houses_maps(v["houses"]) for d, v in vargas.items()}
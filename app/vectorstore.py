@@ -1,9 +1,40 @@
-from typing import List, Dict, Any
-import uuid
+import os
+import json
+from typing import List, Dict, Any, Optional
+import numpy as np
 import chromadb
 from chromadb.config import Settings as ChromaSettings
 from .config import settings
-from .models_openai import generate_embedding
+from .embeddings import EmbeddingProvider, get_provider
+from .utils_chunk import chunk_id
+
+# Pointer to the collection queries are served from (blue/green re-ingestion,
+# see app/reindex.py). Lives next to the Chroma files so every worker sharing
+# the persist dir follows the same switch.
+ACTIVE_POINTER_FILE = "active_collection.json"
+
+
+def pointer_path(persist_dir: str) -> str:
+    return os.path.join(persist_dir, ACTIVE_POINTER_FILE)
+
+
+def read_pointer(persist_dir: str) -> Optional[Dict[str, Any]]:
+    """{"active": name, "history": [previously active names, newest first], "switched_at": ...}"""
+    try:
+        with open(pointer_path(persist_dir), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_pointer(persist_dir: str, payload: Dict[str, Any]):
+    """Atomic write: a reader sees the old or the new pointer, never half of one."""
+    os.makedirs(persist_dir, exist_ok=True)
+    path = pointer_path(persist_dir)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(payload, f)
+    os.replace(tmp, path)
 
 
 class VectorStore:
@@ -14,27 +45,163 @@ class VectorStore:
     - Initialize (or open) a persistent collection
     - Insert (upsert) text chunks with embeddings
     - Perform similarity search
+
+    The embedding provider is chosen per collection: a new collection uses
+    settings.embedding_provider and records it (and its model) in its metadata;
+    an existing collection always keeps the provider and model it was built with,
+    so queries are embedded with the dimension of the stored vectors.
+
+    Without an explicit collection_name the store follows the active-collection
+    pointer (falling back to settings.chroma_collection). The (collection, provider)
+    pair is swapped as one reference, so a query that already started finishes on
+    the collection it started with while new queries see the new one.
     """
  
-    def __init__(self):
+    def __init__(
+        self,
+        persist_dir: Optional[str] = None,
+        collection_name: Optional[str] = None,
+        provider: Optional[str] = None,
+    ):
+        self.persist_dir = persist_dir or settings.chroma_persist_dir
         # Create / open persistent ChromaDB client
         self.client = chromadb.PersistentClient(
-            path=settings.chroma_persist_dir,
+            path=self.persist_dir,
             settings=ChromaSettings(anonymized_telemetry=False)
         )
 
-        # Create or get collection
-        self.collection = self.client.get_or_create_collection(
-            name=settings.chroma_collection,
-            metadata={"hnsw:space": "cosine"}  # cosine similarity
+        self._requested = get_provider(provider)
+        self._follow_pointer = collection_name is None
+        self._pointer_mtime: Optional[float] = None
+        if collection_name is None:
+            pointer = read_pointer(self.persist_dir)
+            collection_name = (pointer or {}).get("active") or settings.chroma_collection
+            self._pointer_mtime = self._stat_pointer()
+        self._active = self._bind(self._open_collection(collection_name, self._requested))
+        # chunks fetched by ID (graph neighbours, parents) of the active collection
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+        self._has_fields: Optional[bool] = None
+
+    def _bind(self, collection):
+        return collection, self._provider_for(collection, self._requested)
+
+    def _stat_pointer(self) -> Optional[float]:
+        try:
+            return os.path.getmtime(pointer_path(self.persist_dir))
+        except OSError:
+            return None
+
+    def _refresh(self):
+        """Follow a pointer switch made by another process (cheap stat otherwise)."""
+        if not self._follow_pointer:
+            return
+        mtime = self._stat_pointer()
+        if mtime is None or mtime == self._pointer_mtime:
+            return
+        self._pointer_mtime = mtime
+        name = (read_pointer(self.persist_dir) or {}).get("active")
+        if name and name != self._active[0].name:
+            try:
+                self.switch_to(name)
+            except ValueError:
+                print(f"[VECTORSTORE] Active collection '{name}' not found; staying on '{self._active[0].name}'.")
+
+    def bind_collection(self, name: str, create: bool = False, provider: Optional[str] = None):
+        """
+        (collection, provider) for another collection of the same client, e.g. a version
+        being built. A created collection records `provider` (default: the requested one).
+        """
+        if create:
+            return self._bind(self._open_collection(name, get_provider(provider) if provider else self._requested))
+        return self._bind(self.client.get_collection(name=name))
+
+    def switch_to(self, name: str):
+        """Serve from another existing collection from now on."""
+        self._active = self._bind(self.client.get_collection(name=name))
+        self._by_id = {}
+        self._has_fields = None
+        print(f"[VECTORSTORE] Serving from collection '{name}'.")
+
+    @property
+    def collection(self):
+        self._refresh()
+        return self._active[0]
+
+    @property
+    def provider(self) -> EmbeddingProvider:
+        self._refresh()
+        return self._active[1]
+
+    @property
+    def active_name(self) -> str:
+        return self.collection.name
+
+    def _open_collection(self, name: str, provider: EmbeddingProvider):
+        """
+        Get the collection, or create it recording the embedding provider.
+        (get_or_create_collection would overwrite the recorded metadata of an
+        existing collection, so it is only the fallback for a creation race.)
+        """
+        metadata = {
+            "hnsw:space": "cosine",  # cosine similarity
+            "embedding_provider": provider.name,
+            "embedding_model": provider.model,
+        }
+        try:
+            return self.client.get_collection(name=name)
+        except ValueError:
+            pass
+        try:
+            return self.client.create_collection(name=name, metadata=metadata)
+        except Exception:
+            return self.client.get_collection(name=name)
+
+    @staticmethod
+    def _provider_for(collection, requested: EmbeddingProvider) -> EmbeddingProvider:
+        meta = collection.metadata or {}
+        # Collections created before providers existed were embedded with OpenAI
+        recorded = meta.get("embedding_provider", "openai")
+        # ...and with the configured model when none was recorded
+        model = meta.get("embedding_model") or None
+        if recorded == requested.name and model in (None, requested.model):
+            return requested
+        print(
+            f"[VECTORSTORE] Collection '{collection.name}' was built with the '{recorded}' "
+            f"embedding provider ({model or 'default model'}); using it instead of "
+            f"'{requested.name}' ({requested.model})."
         )
+        return get_provider(recorded, model)
+
+    async def embed_query(self, text: str) -> np.ndarray:
+        """Embed text into this collection's embedding space (float32, shape (D,))."""
+        return await self.provider.embed(text)
+
+    async def embed_many(self, texts: List[str]) -> np.ndarray:
+        """Embed several texts in one provider call (one network round trip for OpenAI); (N, D) float32."""
+        return await self.provider.embed_many(texts)
+
+    @staticmethod
+    def _prepare(chunks: List[Dict[str, Any]]):
+        """ids, stored documents, texts to embed (embed_text, else the document), metadatas."""
+        ids: List[str] = []
+        documents: List[str] = []
+        embed_texts: List[str] = []
+        metadatas: List[Dict[str, Any]] = []
+        for ch in chunks:
+            ids.append(ch.get("id") or chunk_id(ch["text"]))
+            documents.append(ch["text"])
+            embed_texts.append(ch.get("embed_text") or ch["text"])
+            metadatas.append(ch["metadata"])
+        return ids, documents, embed_texts, metadatas
 
     async def upsert_chunks(self, chunks: List[Dict[str, Any]]):
         """
         Insert a batch of chunks.
         Each chunk:
         {
-          "text": str,
+          "id": str,          # optional, derived from the text if missing
+          "text": str,        # stored document, what the prompt context shows
+          "embed_text": str,  # optional, what gets embedded (defaults to text)
           "metadata": {...}
         }
 
@@ -44,58 +211,98 @@ class VectorStore:
         - metadatas[]
         - embeddings[]
 
-        We generate embeddings here using OpenAI.
+        We generate embeddings here using the collection's embedding provider
+        and pass the (N, D) float32 array to Chroma as is.
         """
-        ids: List[str] = []
-        documents: List[str] = []
-        metadatas: List[Dict[str, Any]] = []
-        embeddings: List[List[float]] = []
+        ids, documents, embed_texts, metadatas = self._prepare(chunks)
+        collection, provider = self._active
 
-        for ch in chunks:
-            doc_id = str(uuid.uuid4())
-            ids.append(doc_id)
-            documents.append(ch["text"])
-            metadatas.append(ch["metadata"])
+        embeddings = await provider.embed_many(embed_texts)
 
-            emb = await generate_embedding(ch["text"])
-            embeddings.append(emb)
-
-        self.collection.upsert(
+        collection.upsert(
             ids=ids,
             documents=documents,
             metadatas=metadatas,
             embeddings=embeddings
         )
+        self._by_id = {}
+        self._has_fields = None
+
+    def has_field_chunks(self) -> bool:
+        """Whether the active collection holds field sub-chunks (see utils_chunk.field_chunks); checked once."""
+        self._refresh()
+        if self._has_fields is None:
+            collection, _ = self._active
+            self._has_fields = bool(collection.get(where={"level": "field"}, limit=1, include=[])["ids"])
+        return self._has_fields
+
+    def _where(self, level: str) -> Optional[Dict[str, Any]]:
+        # Collections ingested before sub-chunks existed hold records only (and no "level" key)
+        return {"level": level} if self.has_field_chunks() else None
 
     async def similarity_search(
-        self, query: str, top_k: int
+        self, query: str, top_k: int, query_embedding: Optional[np.ndarray] = None, level: str = "record"
     ) -> List[Dict[str, Any]]:
         """
-        - embed query
-        - run similarity search in Chroma
+        - embed query (unless the caller already has the embedding)
+        - run similarity search in Chroma over records, or over field sub-chunks (level="field")
         - return list of normalized result dicts
         """
-        query_emb = await generate_embedding(query)
+        self._refresh()
+        collection, provider = self._active
+        query_emb = query_embedding if query_embedding is not None else await provider.embed(query)
 
-        results = self.collection.query(
-            query_embeddings=[query_emb],
-            n_results=top_k
+        results = collection.query(
+            # Chroma takes a 2-D array (a list of 1-D arrays is rejected); no copy for float32 input
+            query_embeddings=np.asarray(query_emb, dtype=np.float32).reshape(1, -1),
+            n_results=top_k,
+            where=self._where(level),
         )
 
-        # Chroma returns lists for each field, shape [ [item1,item2,...] ]
-        ids = results.get("ids", [[]])[0]
-        docs = results.get("documents", [[]])[0]
-        metas = results.get("metadatas", [[]])[0]
-        dists = results.get("distances", [[]])[0]
+        return self._normalize(results, 0)
+
+    async def similarity_search_many(
+        self, query_embeddings: np.ndarray, top_k: int, level: str = "record"
+    ) -> List[List[Dict[str, Any]]]:
+        """One batched Chroma query for an (N, D) array of query embeddings; one result list per embedding."""
+        self._refresh()
+        collection, _ = self._active
+        query_embeddings = np.asarray(query_embeddings, dtype=np.float32)
+        results = collection.query(query_embeddings=query_embeddings, n_results=top_k, where=self._where(level))
+        return [self._normalize(results, i) for i in range(len(query_embeddings))]
+
+    async def get_by_ids(self, ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Chunks by ID in the order given (unknown IDs are skipped): no embedding,
+        no vector search. Cached per active collection, so repeat lookups are dict hits.
+        """
+        self._refresh()
+        cache = self._by_id
+        missing = [i for i in ids if i not in cache]
+        if missing:
+            collection, _ = self._active
+            res = collection.get(ids=missing, include=["documents", "metadatas"])
+            for i, doc, meta in zip(res["ids"], res["documents"], res["metadatas"]):
+                cache[i] = {"id": i, "score": 0.0, "text": doc, "meta": meta}
+        return [dict(cache[i]) for i in ids if i in cache]
+
+    @staticmethod
+    def _normalize(results: Dict[str, Any], i: int) -> List[Dict[str, Any]]:
+        # Chroma returns lists for each field, shape [ [item1,item2,...] ] per query
+        ids = (results.get("ids") or [[]])[i]
+        docs = (results.get("documents") or [[]])[i]
+        metas = (results.get("metadatas") or [[]])[i]
+        dists = results.get("distances")
+        dists = dists[i] if dists is not None else None
 
         out = []
-        for i in range(len(ids)):
+        for j in range(len(ids)):
             out.append(
                 {
-                    "id": ids[i],
-                    "score": float(dists[i]) if dists is not None else 0.0,
-                    "text": docs[i],
-                    "meta": metas[i],
+                    "id": ids[j],
+                    "score": float(dists[j]) if dists is not None else 0.0,
+                    "text": docs[j],
+                    "meta": metas[j],
                 }
             )
         return out
@@ -0,0 +1,45 @@
+import os
+import json
+from typing import List, Dict, Any
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+
+QUERIES_PATH = os.path.join(os.path.dirname(__file__), "queries.json")
+
+
+def load_queries(path: str = QUERIES_PATH) -> List[Dict[str, Any]]:
+    """Saved query set: [{"query": "...", "relevant": [{<metadata matcher>}, ...]}]"""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def matches(meta: Dict[str, Any], matcher: Dict[str, Any]) -> bool:
+    meta = meta or {}
+    return all(meta.get(k) == v for k, v in matcher.items())
+
+
+def recall(results: List[Dict[str, Any]], relevant: List[Dict[str, Any]]) -> float:
+    """Share of the relevant matchers satisfied by at least one result."""
+    if not relevant:
+        return 1.0
+    hit = sum(1 for m in relevant if any(matches(r.get("meta"), m) for r in results))
+    return hit / len(relevant)
+
+
+def arg(argv: List[str], name: str, default):
+    if name in argv:
+        return type(default)(argv[argv.index(name) + 1])
+    return default
+
+
+async def build_temp_store(provider: str, chunks=None):
+    """Throwaway collection of the domain chunks (records + field sub-chunks) embedded with `provider`."""
+    import tempfile
+    from app.utils_chunk import load_domain_jsons, flatten_astrology_docs, index_chunks
+    from app.vectorstore import VectorStore
+
+    store = VectorStore(persist_dir=tempfile.mkdtemp(), collection_name=f"bench_{provider}", provider=provider)
+    await store.upsert_chunks(
+        chunks if chunks is not None else index_chunks(flatten_astrology_docs(load_domain_jsons()))
+    )
+    return store
@@ -0,0 +1,115 @@
+"""
+Synthetic data for the microbenchmark suite (benchmarks/test_hot_paths.py).
+
+The real domain data repeated at several scales, every copy made distinct so
+de-duplication and lookups behave as on a larger corpus. Embeddings come from
+FakeEmbeddingProvider: nothing touches the network.
+"""
+import os
+import copy
+import random
+import zlib
+from typing import Dict, Any, List
+
+import numpy as np
+
+from benchmarks import _common  # noqa: F401  (sets a dummy OPENAI_API_KEY)
+
+from app import embeddings  # noqa: E402
+from app.utils_chunk import load_domain_jsons  # noqa: E402
+
+# 1x, 100x and 10,000x the current domain data; BENCH_SCALES="1,100" for a quick run
+SCALES = [int(s) for s in os.getenv("BENCH_SCALES", "1,100,10000").split(",") if s.strip()]
+
+
+class FakeEmbeddingProvider(embeddings.EmbeddingProvider):
+    """Deterministic random unit vectors keyed by crc32 of the text; no model, no network."""
+
+    name = "fake"
+    model = "fake-64"
+    dim = 64
+
+    def _vector(self, text: str) -> np.ndarray:
+        v = np.random.default_rng(zlib.crc32(text.encode("utf-8"))).standard_normal(self.dim)
+        return (v / np.linalg.norm(v)).astype(np.float32)
+
+    async def embed(self, text: str) -> np.ndarray:
+        return self._vector(text)
+
+    async def embed_many(self, texts: List[str]) -> np.ndarray:
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        for i, t in enumerate(texts):
+            out[i] = self._vector(t)
+        return out
+
+
+embeddings.PROVIDERS.setdefault(FakeEmbeddingProvider.name, FakeEmbeddingProvider)
+
+
+def _mark(value: Any, k: int) -> Any:
+    return f"{value} (variant {k})" if isinstance(value, str) and value else value
+
+
+def synthetic_docs(scale: int) -> List[Dict[str, Any]]:
+    """Domain docs repeated `scale` times; each copy's prose fields carry a variant tag."""
+    base = load_domain_jsons()
+    out = []
+    for k in range(scale):
+        for d in base:
+            data = copy.deepcopy(d["data"])
+            for h in data.get("vedic_astrology", {}).get("houses", []):
+                h["meaning"] = _mark(h.get("meaning"), k)
+            for p in data.get("vedic_astrology", {}).get("planets", []):
+                p["description"] = _mark(p.get("description"), k)
+            for p in data.get("planets_in_house", {}).get("planets", []):
+                p["summary"] = _mark(p.get("summary") or p.get("planet"), k)
+            out.append({"source_file": d["source_file"], "data": data})
+    return out
+
+
+def synthetic_results(n: int, seed: int = 7) -> List[Dict[str, Any]]:
+    """n retrieval results shaped like VectorStore output, built from the domain chunks."""
+    from app.utils_chunk import flatten_astrology_docs
+
+    chunks = flatten_astrology_docs(load_domain_jsons())
+    rng = random.Random(seed)
+    return [
+        {
+            "id": f"{chunks[i % len(chunks)]['id']}-{i}",
+            "score": rng.random(),
+            "text": chunks[i % len(chunks)]["text"],
+            "meta": chunks[i % len(chunks)]["metadata"],
+        }
+        for i in range(n)
+    ]
+
+
+def chroma_response(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """The raw Chroma query() dict the results would have come from (one query)."""
+    return {
+        "ids": [[r["id"] for r in results]],
+        "documents": [[r["text"] for r in results]],
+        "metadatas": [[r["meta"] for r in results]],
+        "distances": [[r["score"] for r in results]],
+    }
+
+
+def synthetic_charts(n: int, seed: int = 11) -> List[Dict[str, Any]]:
+    """n chart payloads with every planet in a random house."""
+    from app.ephemeris import PLANETS
+
+    rng = random.Random(seed)
+    charts = []
+    for i in range(n):
+        houses: Dict[str, List[str]] = {}
+        for planet in PLANETS:
+            houses.setdefault(str(rng.randint(1, 12)), []).append(planet)
+        charts.append({"name": f"user{i}", "houses": houses})
+    return charts
+
+
+def run(benchmark, scale: int, fn, *args):
+    """Few rounds at the largest scales so the suite stays in minutes."""
+    if scale >= 1000:
+        return benchmark.pedantic(fn, args=args, rounds=3, iterations=1, warmup_rounds=0)
+    return benchmark(fn, *args)
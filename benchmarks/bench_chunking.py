@@ -0,0 +1,48 @@
+"""
+Tokens saved by the compact chunk views, per ingest and per query.
+
+    python -m benchmarks.bench_chunking [--top-k 5] [--provider local]
+
+Ingest: embedding/context tokens of all domain chunks against the previous
+verbose rendering (metadata "legacy_tokens"). Query: prompt-context tokens of
+the chunks that reach the prompt for each saved query, same comparison.
+"""
+import sys
+import asyncio
+
+import numpy as np
+
+from benchmarks._common import load_queries, recall, arg, build_temp_store
+
+from app.rag_pipeline import build_context  # noqa: E402
+from app.utils_chunk import estimate_tokens, flatten_astrology_docs, load_domain_jsons, token_report  # noqa: E402
+from app.vectorstore import vector_store  # noqa: E402
+
+
+async def main(argv):
+    top_k = arg(argv, "--top-k", 5)
+    queries = load_queries()
+    store = await build_temp_store(argv[argv.index("--provider") + 1]) if "--provider" in argv else vector_store
+
+    r = token_report(flatten_astrology_docs(load_domain_jsons()))
+    print(f"[BENCH] ingest: {r['chunks']} chunks, verbose {r['legacy_tokens']} tokens")
+    print(f"  embedding tokens {r['embed_tokens']:>6}  saved {r['embed_tokens_saved']:>5} "
+          f"({100 * r['embed_tokens_saved'] / max(r['legacy_tokens'], 1):.1f}%)")
+    print(f"  context tokens   {r['context_tokens']:>6}  saved {r['context_tokens_saved']:>5} "
+          f"({100 * r['context_tokens_saved'] / max(r['legacy_tokens'], 1):.1f}%)")
+
+    rows = []
+    for item in queries:
+        results = await store.similarity_search(query=item["query"], top_k=top_k)
+        _, used = build_context(results)
+        tokens = sum(estimate_tokens(u["text"]) for u in used)
+        legacy = sum(u["meta"].get("legacy_tokens", 0) for u in used)
+        rows.append((tokens, legacy - tokens, recall(used, item["relevant"])))
+
+    tokens, saved, rec = (np.array(col, dtype=np.float64) for col in zip(*rows))
+    print(f"[BENCH] per query ({len(queries)} queries, top_k={top_k}):")
+    print(f"  context tokens {tokens.mean():.1f}  saved {saved.mean():.1f}  recall {rec.mean():.3f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1:]))
@@ -0,0 +1,76 @@
+"""
+Compatibility scoring throughput: one chart vs N stored profiles.
+
+    python -m benchmarks.bench_compatibility [--profiles 500000] [--top 10] [--naive 2000]
+
+"naive" is the per-pair dict comparison (a sample of --naive profiles, extrapolated);
+"vectorized" is compatibility.score_many + top_n over the full array.
+"""
+import os
+import sys
+import json
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+
+import numpy as np  # noqa: E402
+
+from app.compatibility import CompatibilityWeights, encode_chart, score_many, top_n  # noqa: E402
+from app.ephemeris import houses_maps  # noqa: E402
+from benchmarks._common import arg  # noqa: E402
+
+
+def _naive(user_map, maps, weights):
+    from app.compatibility import _PLANET_INDEX
+
+    user = [(int(h), _PLANET_INDEX[p]) for h, occ in user_map.items() for p in occ]
+    scores = []
+    for m in maps:
+        total = 0.0
+        for h, occ in m.items():
+            h = int(h)
+            for planet in occ:
+                q = _PLANET_INDEX[planet]
+                for uh, p in user:
+                    if uh == h:
+                        total += weights.conjunction_weight * weights.rel[p, q]
+                        total += weights.lord_weight * (weights.lord[h, p] + weights.lord[h, q])
+        scores.append(total)
+    return scores
+
+
+def main(argv):
+    n = arg(argv, "--profiles", 500000)
+    n_top = arg(argv, "--top", 10)
+    n_naive = arg(argv, "--naive", 2000)
+
+    rng = np.random.default_rng(0)
+    profiles = rng.integers(1, 13, size=(n, 9)).astype(np.int8)
+    user_map = houses_maps(rng.integers(1, 13, size=(1, 9)))[0]
+    user = encode_chart(user_map)
+    weights = CompatibilityWeights()
+
+    naive_maps = houses_maps(profiles[:n_naive])
+    t0 = time.perf_counter()
+    _naive(user_map, naive_maps, weights)
+    naive_rate = n_naive / (time.perf_counter() - t0)
+
+    score_many(user, profiles[:1000], weights)  # warm up
+    t0 = time.perf_counter()
+    scores = score_many(user, profiles, weights)
+    best = top_n(scores, n_top)
+    vec_s = time.perf_counter() - t0
+    vec_rate = n / vec_s
+
+    print(f"[BENCH] {n} profiles ({profiles.nbytes / 1e6:.1f} MB as int8), top {n_top}")
+    print(f"{'method':<12}{'charts/s':>14}{'full scan s':>13}")
+    print(f"{'naive':<12}{naive_rate:>14,.0f}{n / naive_rate:>13.2f}")
+    print(f"{'vectorized':<12}{vec_rate:>14,.0f}{vec_s:>13.3f}")
+    print(f"speedup x{vec_rate / naive_rate:.0f}; best score {float(scores[best[0]]):.2f}")
+
+    if "--json" in argv:
+        print(json.dumps({"profiles": n, "naive_charts_per_s": naive_rate, "vectorized_charts_per_s": vec_rate}))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,85 @@
+"""
+Active Vimshottari period for a whole user table at one date.
+
+    python -m benchmarks.bench_dasha [--births 1000000] [--naive 20000] [--ephemeris]
+
+"naive" walks the dasha sequence per person in Python (a sample of --naive
+births, extrapolated); "vectorized" is dasha.active_periods over all births.
+--ephemeris also times computing every Moon longitude from the birth time.
+"""
+import os
+import sys
+import json
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+
+import numpy as np  # noqa: E402
+
+from app.dasha import (  # noqa: E402
+    CYCLE_YEARS, DASHA_YEARS, YEAR_SECONDS, active_periods, birth_balance, moon_from_birth,
+)
+from benchmarks._common import arg  # noqa: E402
+
+
+def _naive(moon, birth, at):
+    at_s = at.astype(np.int64)
+    out = []
+    for m, b in zip(moon.tolist(), birth.astype(np.int64).tolist()):
+        bal = birth_balance([m])
+        lord, elapsed = int(bal["lord"][0]), float(bal["elapsed"][0])
+        t = ((at_s - b) / YEAR_SECONDS + elapsed) % CYCLE_YEARS
+        start = 0.0
+        k = lord
+        while start + DASHA_YEARS[k] <= t:
+            start += DASHA_YEARS[k]
+            k = (k + 1) % 9
+        sub_t = t - start
+        j = k
+        sub_start = 0.0
+        while sub_start + DASHA_YEARS[k] * DASHA_YEARS[j] / CYCLE_YEARS <= sub_t:
+            sub_start += DASHA_YEARS[k] * DASHA_YEARS[j] / CYCLE_YEARS
+            j = (j + 1) % 9
+        out.append((k, j))
+    return out
+
+
+def main(argv):
+    n = arg(argv, "--births", 1000000)
+    n_naive = arg(argv, "--naive", 20000)
+
+    rng = np.random.default_rng(0)
+    birth = np.datetime64("1940-01-01T00:00:00") + rng.integers(0, 80 * 365 * 86400, n).astype("timedelta64[s]")
+    moon = rng.uniform(0, 360, n)
+    at = np.datetime64("2026-01-01T00:00:00")
+
+    t0 = time.perf_counter()
+    naive = _naive(moon[:n_naive], birth[:n_naive], at)
+    naive_rate = n_naive / (time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    res = active_periods(moon, birth, at)
+    vec_s = time.perf_counter() - t0
+    agree = np.mean([
+        (int(res["maha"][i]), int(res["antar"][i])) == naive[i] for i in range(n_naive)
+    ])
+
+    print(f"[BENCH] {n} births, active period at {at}")
+    print(f"{'method':<12}{'births/s':>14}{'full table s':>14}")
+    print(f"{'naive':<12}{naive_rate:>14,.0f}{n / naive_rate:>14.2f}")
+    print(f"{'vectorized':<12}{n / vec_s:>14,.0f}{vec_s:>14.3f}")
+    print(f"agreement on the naive sample: {agree:.4f}")
+
+    report = {"births": n, "naive_births_per_s": naive_rate, "vectorized_s": vec_s}
+    if "--ephemeris" in argv:
+        t0 = time.perf_counter()
+        moon_from_birth(birth)
+        report["moon_ephemeris_s"] = time.perf_counter() - t0
+        print(f"Moon longitudes from birth time: {report['moon_ephemeris_s']:.3f} s")
+
+    if "--json" in argv:
+        print(json.dumps(report))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,71 @@
+"""
+Parse time and peak memory of /embeddings responses: JSON float lists (the
+previous transport) vs encoding_format=base64 decoded into float32 arrays.
+
+    python -m benchmarks.bench_embedding_transport [--dim 3072] [--batch 256] [--repeat 5]
+
+Synthetic responses shaped like OpenAI's; two cases: one ingest batch
+(--batch inputs, the OpenAI provider's batch size) and one query embedding.
+Measured from the response body bytes to the vectors the store receives.
+"""
+import sys
+import json
+import time
+import base64
+import tracemalloc
+
+import numpy as np
+
+from benchmarks._common import arg
+
+from app.models_openai import decode_embeddings  # noqa: E402
+
+
+def payloads(n: int, dim: int):
+    rows = np.random.default_rng(0).standard_normal((n, dim)).astype(np.float32) * 0.02
+    as_floats = {"data": [{"index": i, "embedding": [round(float(x), 9) for x in r]} for i, r in enumerate(rows)]}
+    as_b64 = {
+        "data": [{"index": i, "embedding": base64.b64encode(r.tobytes()).decode("ascii")} for i, r in enumerate(rows)]
+    }
+    return json.dumps(as_floats).encode("utf-8"), json.dumps(as_b64).encode("utf-8")
+
+
+def parse_floats(body: bytes):
+    data = sorted(json.loads(body)["data"], key=lambda d: d["index"])
+    return [d["embedding"] for d in data]
+
+
+def parse_base64(body: bytes):
+    return decode_embeddings(json.loads(body)["data"])
+
+
+def measure(fn, body: bytes, repeat: int):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(body)
+        times.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    out = fn(body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del out
+    return float(np.median(times)), peak
+
+
+def main(argv):
+    dim = arg(argv, "--dim", 3072)
+    batch = arg(argv, "--batch", 256)
+    repeat = arg(argv, "--repeat", 5)
+
+    print(f"[BENCH] dim={dim}, median of {repeat} runs, peak = traced Python allocations during one parse")
+    print(f"{'case':<14}{'transport':<10}{'body MB':>9}{'parse ms':>10}{'peak MB':>9}")
+    for case, n in (("ingest batch", batch), ("query", 1)):
+        floats_body, b64_body = payloads(n, dim)
+        for name, fn, body in (("json", parse_floats, floats_body), ("base64", parse_base64, b64_body)):
+            seconds, peak = measure(fn, body, repeat)
+            print(f"{case:<14}{name:<10}{len(body) / 1e6:>9.2f}{seconds * 1000:>10.2f}{peak / 1e6:>9.2f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
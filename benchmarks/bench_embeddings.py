@@ -0,0 +1,57 @@
+"""
+Query-embedding latency and retrieval recall per embedding provider.
+
+    python -m benchmarks.bench_embeddings [--top-k 5] [--remote]
+
+Each provider gets its own throwaway collection built from the domain data.
+The remote (OpenAI) provider is only measured with --remote, since it needs a
+real OPENAI_API_KEY and costs API calls.
+"""
+import sys
+import time
+import asyncio
+
+import numpy as np
+
+from benchmarks._common import load_queries, recall, arg, build_temp_store
+
+from app.utils_chunk import load_domain_jsons, flatten_astrology_docs  # noqa: E402
+
+
+async def run_provider(name: str, chunks, queries, top_k: int):
+    t0 = time.perf_counter()
+    store = await build_temp_store(name, chunks)
+    index_s = time.perf_counter() - t0
+
+    latencies, recalls = [], []
+    for item in queries:
+        t0 = time.perf_counter()
+        emb = await store.embed_query(item["query"])
+        latencies.append(time.perf_counter() - t0)
+        results = await store.similarity_search(item["query"], top_k=top_k, query_embedding=emb)
+        recalls.append(recall(results, item["relevant"]))
+
+    lat = np.array(latencies) * 1000
+    return {
+        "index_s": index_s,
+        "embed_ms_mean": float(lat.mean()),
+        "embed_ms_p95": float(np.percentile(lat, 95)),
+        "recall": float(np.mean(recalls)),
+    }
+
+
+async def main(argv):
+    top_k = arg(argv, "--top-k", 5)
+    providers = ["local"] + (["openai"] if "--remote" in argv else [])
+    chunks = flatten_astrology_docs(load_domain_jsons())
+    queries = load_queries()
+
+    print(f"[BENCH] {len(chunks)} chunks, {len(queries)} queries, recall@{top_k}")
+    print(f"{'provider':<10}{'index s':>9}{'embed ms':>10}{'p95 ms':>9}{'recall':>8}")
+    for name in providers:
+        r = await run_provider(name, chunks, queries, top_k)
+        print(f"{name:<10}{r['index_s']:>9.2f}{r['embed_ms_mean']:>10.3f}{r['embed_ms_p95']:>9.3f}{r['recall']:>8.3f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1:]))
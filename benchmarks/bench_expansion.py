@@ -0,0 +1,63 @@
+"""
+Recall and added latency of query expansion, per number of extra variants.
+
+    python -m benchmarks.bench_expansion [--max 3] [--provider local] [--repeat 3]
+
+For each expansion count the retrieval path of rag_pipeline.retrieve_candidates
+is timed end to end: one batched embedding call for all variants, one batched
+Chroma query, rank fusion, rerank. Runs against the configured collection
+(remote embeddings: real network cost) or a throwaway index with --provider.
+"""
+import sys
+import time
+import asyncio
+
+import numpy as np
+
+from benchmarks._common import load_queries, recall, arg, build_temp_store
+
+from app.config import settings  # noqa: E402
+from app.query_expansion import expand_query  # noqa: E402
+from app.rag_pipeline import build_context  # noqa: E402
+from app.retrieval import fuse_ranked, rerank  # noqa: E402
+from app.vectorstore import vector_store  # noqa: E402
+
+
+async def _retrieve(store, q: str, expansions: int, n: int):
+    variants = expand_query(q, expansions)
+    embeddings = await store.embed_many(variants)
+    lists = await store.similarity_search_many(embeddings, top_k=n)
+    candidates = lists[0] if len(lists) == 1 else fuse_ranked(lists, limit=n)
+    return rerank(q, candidates, keep=settings.rerank_keep), len(variants) - 1
+
+
+async def main(argv):
+    max_exp = arg(argv, "--max", 3)
+    repeat = arg(argv, "--repeat", 3)
+    queries = load_queries()
+    store = await build_temp_store(argv[argv.index("--provider") + 1]) if "--provider" in argv else vector_store
+    n = settings.top_k * settings.rerank_overfetch
+
+    print(f"[BENCH] {len(queries)} queries, n={n}, keep={settings.rerank_keep}, repeat={repeat}")
+    print(f"{'expansions':<12}{'recall':>8}{'avg variants':>14}{'mean ms':>9}{'p95 ms':>8}{'extra ms':>10}")
+    base_ms = None
+    for m in range(max_exp + 1):
+        recalls, lat, used_variants = [], [], []
+        for item in queries:
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                results, extra = await _retrieve(store, item["query"], m, n)
+                lat.append((time.perf_counter() - t0) * 1000)
+            _, used = build_context(results)
+            recalls.append(recall(used, item["relevant"]))
+            used_variants.append(extra)
+        mean_ms = float(np.mean(lat))
+        base_ms = mean_ms if base_ms is None else base_ms
+        print(
+            f"{m:<12}{np.mean(recalls):>8.3f}{np.mean(used_variants):>14.2f}"
+            f"{mean_ms:>9.2f}{np.percentile(lat, 95):>8.2f}{mean_ms - base_ms:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1:]))
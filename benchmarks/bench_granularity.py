@@ -0,0 +1,59 @@
+"""
+Recall@k and prompt tokens when searching whole records vs field sub-chunks
+(RETRIEVAL_GRANULARITY): record, parent (sub-chunk hits -> whole records),
+fields (sub-chunk hits -> only the matched fields of each record).
+
+    python -m benchmarks.bench_granularity [--provider local] [--ks 1,3,5] [--overfetch 4] [--rerank]
+
+Runs against a throwaway index of the domain data (records + field sub-chunks)
+embedded with --provider (default local). Without --rerank the k results are
+taken in vector order, so only the embedding granularity differs; recall is
+measured on the chunks that reach the prompt (after max_context_chars).
+"""
+import sys
+import asyncio
+
+from benchmarks._common import load_queries, recall, arg, build_temp_store
+
+from app.rag_pipeline import FIELD_HITS_PER_RECORD, build_context, to_parents  # noqa: E402
+from app.retrieval import rerank  # noqa: E402
+from app.utils_chunk import estimate_tokens  # noqa: E402
+
+MODES = ("record", "parent", "fields")
+
+
+async def candidates(store, query: str, mode: str, n: int):
+    if mode == "record":
+        return await store.similarity_search(query=query, top_k=n)
+    hits = await store.similarity_search(query=query, top_k=n * FIELD_HITS_PER_RECORD, level="field")
+    return await to_parents(hits, fields_only=mode == "fields", limit=n, store=store)
+
+
+async def main(argv):
+    provider = arg(argv, "--provider", "local")
+    ks = [int(k) for k in arg(argv, "--ks", "1,3,5").split(",")]
+    overfetch = arg(argv, "--overfetch", 4)
+    use_rerank = "--rerank" in argv
+    queries = load_queries()
+    store = await build_temp_store(provider)
+
+    print(
+        f"[BENCH] {len(queries)} queries, provider={provider}, overfetch={overfetch}, "
+        f"{'reranked' if use_rerank else 'vector order'}"
+    )
+    print(f"{'k':>3}  {'mode':<8}{'recall':>8}{'ctx tokens':>12}")
+    for k in ks:
+        for mode in MODES:
+            rows = []
+            for item in queries:
+                q = item["query"]
+                found = await candidates(store, q, mode, k * overfetch if use_rerank else k)
+                results = rerank(q, found, keep=k) if use_rerank else found[:k]
+                context_str, used = build_context(results)
+                rows.append((recall(used, item["relevant"]), estimate_tokens(context_str)))
+            n = len(rows) or 1
+            print(f"{k:>3}  {mode:<8}{sum(r[0] for r in rows) / n:>8.3f}{sum(r[1] for r in rows) / n:>12.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1:]))
@@ -0,0 +1,67 @@
+"""
+Per-request overhead of the profiling middleware.
+
+    python -m benchmarks.bench_profiling [--requests 3000]
+
+Same trivial endpoint served without the middleware, with it installed but
+off, installed and on but the request not selected, and with the request
+profiled (X-Profile). The first three should be indistinguishable.
+"""
+import sys
+import time
+import asyncio
+import tempfile
+
+import httpx
+import numpy as np
+from fastapi import FastAPI
+
+from benchmarks._common import arg
+
+from app.config import settings  # noqa: E402
+from app.profiling import ProfilingMiddleware  # noqa: E402
+
+
+def _app(with_middleware: bool) -> FastAPI:
+    app = FastAPI()
+    if with_middleware:
+        app.add_middleware(ProfilingMiddleware)
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    return app
+
+
+async def _run(app: FastAPI, n: int, headers=None) -> np.ndarray:
+    lat = []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for _ in range(n):
+            t0 = time.perf_counter()
+            await client.get("/ping", headers=headers)
+            lat.append((time.perf_counter() - t0) * 1e6)
+    return np.array(lat[n // 10:])   # drop warm-up
+
+
+async def main(argv):
+    n = arg(argv, "--requests", 3000)
+    settings.admin_token = settings.admin_token or "bench"
+    settings.profile_dir = tempfile.mkdtemp()
+
+    rows = []
+    settings.profiling_enabled = False
+    rows.append(("no middleware", await _run(_app(False), n)))
+    rows.append(("installed, off", await _run(_app(True), n)))
+    settings.profiling_enabled = True
+    rows.append(("on, not selected", await _run(_app(True), n)))
+    rows.append(("profiled", await _run(_app(True), max(n // 20, 20), {"X-Profile": settings.admin_token})))
+
+    print(f"[BENCH] {n} requests per mode")
+    print(f"{'mode':<18}{'mean us':>10}{'p50 us':>10}{'p95 us':>10}")
+    for name, lat in rows:
+        print(f"{name:<18}{lat.mean():>10.1f}{np.percentile(lat, 50):>10.1f}{np.percentile(lat, 95):>10.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1:]))
@@ -0,0 +1,132 @@
+"""
+How much of each chat prompt a provider-side prompt cache can reuse: the
+previous layout (instruction preamble repeated in the user message, chunks in
+rank order) vs the current one (all instructions in a static system prompt,
+chunks in relevance tiers ordered by ID; rag_pipeline.build_context).
+
+    python -m benchmarks.bench_prompt_cache [--provider local] [--capture captures/]
+
+Offline part: the saved queries (all different questions) are retrieved
+against a throwaway index and sent one after the other; for every prompt, the
+longest prefix shared with any earlier prompt is what a prefix cache could
+serve. Prompts are compared as the serialized messages.
+Note OpenAI only caches prompts of 1024+ tokens, in 128-token steps; the
+column "cacheable" applies that rule.
+
+With --capture, the token usage recorded in captured traffic (CAPTURE_ENABLED)
+is summarized too: cached share of prompt tokens, and request latency of calls
+with and without a cache hit.
+"""
+import sys
+import asyncio
+
+import numpy as np
+
+from benchmarks._common import load_queries, arg, build_temp_store
+
+from app.config import settings  # noqa: E402
+from app.models_openai import build_messages  # noqa: E402
+from app.rag_pipeline import SYSTEM_PROMPT, build_context  # noqa: E402
+from app.retrieval import rerank  # noqa: E402
+from app.utils_chunk import estimate_tokens  # noqa: E402
+
+PREVIOUS_SYSTEM_PROMPT = (
+    "You are a Retrieval-Augmented Vedic Astrology Knowledge Assistant.\n"
+    "- You answer based ONLY on provided context.\n"
+    "- You avoid medical/political/legal predictions.\n"
+    "- If context is missing, say so honestly.\n"
+    "- Be clear and human, not robotic."
+)
+
+
+def previous_messages(question: str, context: str):
+    return [
+        {"role": "system", "content": PREVIOUS_SYSTEM_PROMPT},
+        {
+            "role": "user",
+            "content": (
+                "You are an expert Vedic Astrology assistant.\n"
+                "Answer ONLY using the CONTEXT below. If context is insufficient, say so.\n\n"
+                f"CONTEXT:\n{context}\n\n"
+                f"USER QUESTION:\n{question}"
+            ),
+        },
+    ]
+
+
+def serialize(messages) -> str:
+    return "".join(f"<|{m['role']}|>{m['content']}<|end|>" for m in messages)
+
+
+def shared_prefix(a: str, b: str) -> int:
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
+def cacheable(tokens: int) -> int:
+    return 0 if tokens < 1024 else tokens - tokens % 128
+
+
+def measure(prompts):
+    seen, rows = [], []
+    for p in prompts:
+        prefix = p[:max((shared_prefix(p, q) for q in seen), default=0)]
+        tokens = estimate_tokens(prefix)
+        rows.append((tokens, estimate_tokens(p), cacheable(tokens)))
+        seen.append(p)
+    return np.array(rows, dtype=float)
+
+
+def summarize_capture(path: str):
+    from app.capture import read_capture
+
+    records = [r for r in read_capture(path) if (r.get("usage") or {}).get("prompt_tokens")]
+    if not records:
+        print(f"[BENCH] no captured records with token usage under {path}")
+        return
+    prompt = sum(r["usage"]["prompt_tokens"] for r in records)
+    cached = sum(r["usage"]["cached_tokens"] for r in records)
+    print(f"[BENCH] capture: {len(records)} requests, {cached / prompt:.1%} of prompt tokens served from cache")
+    for name, rows in (("cache hit", [r for r in records if r["usage"]["cached_tokens"]]),
+                       ("no hit", [r for r in records if not r["usage"]["cached_tokens"]])):
+        gen = [r["stages_s"].get("generation", r["latency_s"]) for r in rows]
+        if gen:
+            print(f"  {name:<10}{len(gen):>6} req   generation p50 {np.percentile(gen, 50) * 1000:.0f} ms   "
+                  f"p95 {np.percentile(gen, 95) * 1000:.0f} ms")
+
+
+async def main(argv):
+    provider = arg(argv, "--provider", "local")
+    capture = arg(argv, "--capture", "")
+    queries = load_queries()
+    store = await build_temp_store(provider)
+
+    retrieved = []
+    for item in queries:
+        q = item["query"]
+        cands = await store.similarity_search(query=q, top_k=settings.rerank_keep * settings.rerank_overfetch)
+        retrieved.append((q, rerank(q, cands, keep=settings.rerank_keep)))
+
+    width = settings.context_tier_width
+    layouts = {}
+    settings.context_tier_width = 0
+    layouts["previous"] = [serialize(previous_messages(q, build_context(r)[0])) for q, r in retrieved]
+    settings.context_tier_width = width
+    layouts["current"] = [serialize(build_messages(SYSTEM_PROMPT, q, build_context(r)[0])) for q, r in retrieved]
+
+    print(f"[BENCH] {len(queries)} queries, provider={provider}, tokens estimated")
+    print(f"{'layout':<10}{'prompt':>8}{'shared prefix':>15}{'share':>8}{'cacheable':>11}")
+    for name, prompts in layouts.items():
+        rows = measure(prompts)
+        print(f"{name:<10}{rows[:, 1].mean():>8.1f}{rows[:, 0].mean():>15.1f}"
+              f"{rows[:, 0].sum() / rows[:, 1].sum():>8.1%}{rows[:, 2].mean():>11.1f}")
+
+    if capture:
+        summarize_capture(capture)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1:]))
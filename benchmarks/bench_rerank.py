@@ -0,0 +1,80 @@
+"""
+Recall and prompt size with and without the over-fetch + rerank stage, with
+the adaptive depth (ADAPTIVE_* settings) instead of a fixed keep, and with the
+ingest-time neighbours of the adaptive selection added by ID (GRAPH_EXPANSION_MAX).
+
+    python -m benchmarks.bench_rerank [--top-k 5] [--overfetch 4] [--keep 3] [--provider local]
+        [--max-distance 0.9] [--jump 2.0] [--graph-max 3]
+
+Runs against the configured collection (ingest first), or against a throwaway
+index of the domain data when --provider is given. Recall is measured on
+the chunks that actually reach the prompt (after max_context_chars).
+"""
+import sys
+import time
+import asyncio
+
+from benchmarks._common import load_queries, recall, arg, build_temp_store
+
+from app.rag_pipeline import build_context  # noqa: E402
+from app.config import settings  # noqa: E402
+from app.retrieval import adaptive_k, neighbour_ids, rerank  # noqa: E402
+from app.utils_chunk import estimate_tokens  # noqa: E402
+from app.vectorstore import vector_store  # noqa: E402
+
+
+async def main(argv):
+    top_k = arg(argv, "--top-k", 5)
+    overfetch = arg(argv, "--overfetch", 4)
+    keep = arg(argv, "--keep", 3)
+    queries = load_queries()
+    store = await build_temp_store(argv[argv.index("--provider") + 1]) if "--provider" in argv else vector_store
+
+    max_distance = arg(argv, "--max-distance", settings.adaptive_max_distance)
+    jump = arg(argv, "--jump", settings.adaptive_jump)
+    graph_max = arg(argv, "--graph-max", settings.graph_expansion_max)
+
+    rows = {"baseline": [], "rerank": [], "adaptive": [], "graph": []}
+    search_s, lookup_s = [], []
+    for item in queries:
+        q = item["query"]
+        t0 = time.perf_counter()
+        candidates = await store.similarity_search(query=q, top_k=top_k * overfetch)
+        search_s.append(time.perf_counter() - t0)
+        k = adaptive_k(candidates, settings.adaptive_min_k, settings.adaptive_max_k, max_distance, jump)
+        adaptive = rerank(q, candidates, keep=k)
+
+        t0 = time.perf_counter()
+        neighbours = await store.get_by_ids([i for i, _ in neighbour_ids(adaptive, graph_max)])
+        lookup_s.append(time.perf_counter() - t0)
+
+        for name, results in (
+            ("baseline", candidates[:top_k]),
+            ("rerank", rerank(q, candidates, keep=keep)),
+            ("adaptive", adaptive),
+            ("graph", adaptive + neighbours),
+        ):
+            context_str, used = build_context(results)
+            rows[name].append((recall(used, item["relevant"]), estimate_tokens(context_str), len(used)))
+
+    print(
+        f"[BENCH] {len(queries)} queries, top_k={top_k}, overfetch={overfetch}, keep={keep}, "
+        f"adaptive k in [{settings.adaptive_min_k}, {settings.adaptive_max_k}] "
+        f"max_distance={max_distance} jump={jump} graph_max={graph_max}"
+    )
+    print(f"{'mode':<10}{'recall':>8}{'ctx tokens':>12}{'chunks':>8}")
+    for name, vals in rows.items():
+        n = len(vals) or 1
+        print(
+            f"{name:<10}{sum(v[0] for v in vals) / n:>8.3f}"
+            f"{sum(v[1] for v in vals) / n:>12.1f}{sum(v[2] for v in vals) / n:>8.2f}"
+        )
+    n = len(queries) or 1
+    print(
+        f"vector search {sum(search_s) / n * 1000:.2f} ms/query (incl. embedding), "
+        f"neighbour lookup {sum(lookup_s) / n * 1000:.3f} ms/query"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1:]))
@@ -0,0 +1,77 @@
+"""
+Serialization overhead per /chat/rag response, per wire format.
+
+    python -m benchmarks.bench_serialization [--chunks 5] [--iterations 20000]
+
+"legacy" reproduces the old path: build RetrievedChunk models, wrap them in
+ChatResponse, run FastAPI's jsonable_encoder and the stdlib JSON encoder.
+"""
+import os
+import sys
+import time
+import json
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse, ORJSONResponse  # noqa: E402
+
+from app.schemas import ChatResponse, RetrievedChunk  # noqa: E402
+from app.serialization import MsgPackResponse, chat_payload  # noqa: E402
+
+
+def _sample_results(n: int):
+    return [
+        {
+            "id": f"5b7e4c1a-0000-4000-8000-{i:012d}",
+            "score": 0.1 + i / 100,
+            "text": ("Planet Sun in House 1:\nSummary: Strong personality and leadership presence. " * 6)[:250],
+            "meta": {"type": "planet_in_house", "house_number": 1, "planet_name": "Sun",
+                     "source_file": "app/domain/planets_in_house.json"},
+        }
+        for i in range(n)
+    ]
+
+
+def _bench(fn, iterations: int):
+    fn()  # warm up
+    t0 = time.perf_counter()
+    for _ in range(iterations):
+        body = fn()
+    return (time.perf_counter() - t0) / iterations * 1e6, len(body)
+
+
+def main(argv):
+    n_chunks = int(argv[argv.index("--chunks") + 1]) if "--chunks" in argv else 5
+    iterations = int(argv[argv.index("--iterations") + 1]) if "--iterations" in argv else 20000
+    answer = "Sun in the 1st house emphasizes visibility, vitality, and leadership. " * 8
+    results = _sample_results(n_chunks)
+    chunks = [RetrievedChunk.model_construct(**r) for r in results]
+
+    def legacy():
+        previews = [RetrievedChunk(**r) for r in results]
+        resp = ChatResponse(answer=answer, retrieved_context_preview=previews)
+        return JSONResponse(jsonable_encoder(resp)).body
+
+    cases = {
+        "legacy json": legacy,
+        "orjson": lambda: ORJSONResponse(chat_payload(answer, chunks, len(chunks))).body,
+        "orjson compact": lambda: ORJSONResponse(chat_payload(answer, chunks, len(chunks), compact=True)).body,
+        "msgpack": lambda: MsgPackResponse(chat_payload(answer, chunks, len(chunks))).body,
+        "msgpack compact": lambda: MsgPackResponse(chat_payload(answer, chunks, len(chunks), compact=True)).body,
+    }
+
+    print(f"[BENCH] {n_chunks} chunks/response, {iterations} iterations")
+    print(f"{'format':<18}{'us/resp':>10}{'bytes':>8}")
+    report = {}
+    for name, fn in cases.items():
+        us, size = _bench(fn, iterations)
+        report[name] = {"us_per_response": us, "bytes": size}
+        print(f"{name:<18}{us:>10.1f}{size:>8}")
+
+    if "--json" in argv:
+        print(json.dumps(report))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
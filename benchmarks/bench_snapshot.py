@@ -0,0 +1,59 @@
+"""
+Cold-start time: ingest (embed every chunk) vs importing an index snapshot.
+
+    python -m benchmarks.bench_snapshot [--copies 50] [--provider local|openai]
+
+Both paths start from an empty Chroma directory and end when the first query
+is answered. The domain chunks are repeated --copies times (distinct IDs) to
+approximate a larger corpus. With --provider openai the ingest path pays real
+embedding calls; the snapshot path never embeds a document.
+"""
+import os
+import sys
+import time
+import asyncio
+import tempfile
+
+from benchmarks._common import arg
+
+from app.snapshot import export_snapshot, import_snapshot  # noqa: E402
+from app.utils_chunk import flatten_astrology_docs, load_domain_jsons  # noqa: E402
+from app.vectorstore import VectorStore  # noqa: E402
+
+
+def _corpus(copies: int):
+    base = flatten_astrology_docs(load_domain_jsons())
+    return [{**ch, "id": f"{ch['id']}-{c}"} for c in range(copies) for ch in base]
+
+
+async def main(argv):
+    copies = arg(argv, "--copies", 50)
+    provider = argv[argv.index("--provider") + 1] if "--provider" in argv else "local"
+    chunks = _corpus(copies)
+    query = "What does Saturn in the 10th house mean?"
+
+    t0 = time.perf_counter()
+    store = VectorStore(persist_dir=tempfile.mkdtemp(), provider=provider)
+    for i in range(0, len(chunks), 256):
+        await store.upsert_chunks(chunks[i:i + 256])
+    await store.similarity_search(query, top_k=5)
+    ingest_s = time.perf_counter() - t0
+
+    path = os.path.join(tempfile.mkdtemp(), "index.npz")
+    export_snapshot(path, store)
+    size_mb = os.path.getsize(path) / 1e6
+
+    t0 = time.perf_counter()
+    fresh = VectorStore(persist_dir=tempfile.mkdtemp(), provider=provider)
+    import_snapshot(path, fresh)
+    await fresh.similarity_search(query, top_k=5)
+    snapshot_s = time.perf_counter() - t0
+
+    print(f"[BENCH] {len(chunks)} chunks, provider={provider}, snapshot {size_mb:.2f} MB")
+    print(f"{'path':<10}{'cold start s':>14}")
+    print(f"{'ingest':<10}{ingest_s:>14.2f}")
+    print(f"{'snapshot':<10}{snapshot_s:>14.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1:]))
@@ -0,0 +1,109 @@
+"""
+All 16 Parashari vargas (D1-D60) for a whole user table.
+
+    python -m benchmarks.bench_varga [--charts 1000000] [--naive 5000] [--maps 20000] [--ephemeris]
+
+"naive" applies the varga rules per chart and planet in Python (a sample of
+--naive charts, extrapolated); "vectorized" is varga.compute_vargas over all
+charts. "maps" times turning the D9 houses into interpret_chart maps for
+--maps charts. --ephemeris also times computing the longitudes from birth data.
+"""
+import os
+import sys
+import json
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+
+import numpy as np  # noqa: E402
+
+from app.ephemeris import compute_charts  # noqa: E402
+from app.varga import VARGAS, compute_vargas, varga_houses_maps  # noqa: E402
+from benchmarks._common import arg  # noqa: E402
+
+
+def _naive_sign(lon: float, d: int) -> int:
+    rasi = int(lon // 30) % 12
+    deg = lon - 30 * rasi
+    odd = rasi % 2 == 0
+    mod = rasi % 3
+    if d == 30:
+        ends, signs = ([5, 10, 18, 25], [0, 10, 8, 2, 6]) if odd else ([5, 12, 20, 25], [1, 5, 11, 9, 7])
+        return signs[sum(1 for e in ends if deg >= e)]
+    part = min(int(deg * d / 30), d - 1)
+    if d == 2:
+        return (4, 3)[part] if odd else (3, 4)[part]
+    if d == 3:
+        return (rasi + 4 * part) % 12
+    if d == 4:
+        return (rasi + 3 * part) % 12
+    start = {
+        1: rasi, 12: rasi, 60: rasi,
+        7: rasi if odd else rasi + 6,
+        9: rasi + (0, 8, 4)[mod],
+        10: rasi if odd else rasi + 8,
+        16: (0, 4, 8)[mod], 45: (0, 4, 8)[mod],
+        20: (0, 8, 4)[mod],
+        24: 4 if odd else 3,
+        27: (0, 3, 6, 9)[rasi % 4],
+        40: 0 if odd else 6,
+    }[d]
+    return (start + part) % 12
+
+
+def _naive(longitudes, ascendant):
+    out = []
+    for row, asc in zip(longitudes.tolist(), ascendant.tolist()):
+        chart = {}
+        for d in VARGAS:
+            a = _naive_sign(asc, d)
+            chart[d] = [(_naive_sign(lon, d) - a) % 12 + 1 for lon in row]
+        out.append(chart)
+    return out
+
+
+def main(argv):
+    n = arg(argv, "--charts", 1000000)
+    n_naive = arg(argv, "--naive", 5000)
+    n_maps = arg(argv, "--maps", 20000)
+
+    rng = np.random.default_rng(0)
+    longitudes = rng.uniform(0, 360, (n, 9))
+    ascendant = rng.uniform(0, 360, n)
+
+    t0 = time.perf_counter()
+    naive = _naive(longitudes[:n_naive], ascendant[:n_naive])
+    naive_rate = n_naive / (time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    vargas = compute_vargas(longitudes, ascendant)
+    vec_s = time.perf_counter() - t0
+    agree = np.mean([
+        all(vargas[d]["houses"][i].tolist() == naive[i][d] for d in VARGAS) for i in range(n_naive)
+    ])
+
+    t0 = time.perf_counter()
+    varga_houses_maps({9: {"houses": vargas[9]["houses"][:n_maps]}})
+    maps_rate = n_maps / (time.perf_counter() - t0)
+
+    print(f"[BENCH] {n} charts x {len(VARGAS)} vargas (signs + houses of 9 planets and the ascendant)")
+    print(f"{'method':<12}{'charts/s':>14}{'full table s':>14}")
+    print(f"{'naive':<12}{naive_rate:>14,.0f}{n / naive_rate:>14.2f}")
+    print(f"{'vectorized':<12}{n / vec_s:>14,.0f}{vec_s:>14.3f}")
+    print(f"{'D9 maps':<12}{maps_rate:>14,.0f}{n / maps_rate:>14.2f}")
+    print(f"agreement on the naive sample: {agree:.4f}")
+
+    report = {"charts": n, "naive_charts_per_s": naive_rate, "vectorized_s": vec_s, "d9_maps_per_s": maps_rate}
+    if "--ephemeris" in argv:
+        when = np.datetime64("1940-01-01T00:00:00") + rng.integers(0, 80 * 365 * 86400, n).astype("timedelta64[s]")
+        t0 = time.perf_counter()
+        compute_charts(when, rng.uniform(-60, 60, n), rng.uniform(-180, 180, n))
+        report["ephemeris_s"] = time.perf_counter() - t0
+        print(f"Longitudes and ascendants from birth data: {report['ephemeris_s']:.3f} s")
+
+    if "--json" in argv:
+        print(json.dumps(report))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
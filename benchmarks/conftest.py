@@ -0,0 +1,17 @@
+"""Microbenchmark suite setup: offline settings and the fake embedding provider."""
+import os
+import tempfile
+
+# before app.config is imported: keep the suite away from the real Chroma directory
+os.environ.setdefault("CHROMA_PERSIST_DIR", tempfile.mkdtemp(prefix="bench_chroma_"))
+
+import pytest  # noqa: E402
+
+from benchmarks import _synthetic  # noqa: E402,F401  (registers the "fake" provider)
+
+
+@pytest.fixture(scope="session")
+def house_lords_map():
+    from app.logic_interpret import load_house_lords_map
+
+    return load_house_lords_map("app/domain/house_lords.json")
@@ -0,0 +1,58 @@
+"""
+Save / compare the microbenchmark baseline (benchmarks/test_hot_paths.py).
+
+    python -m benchmarks.perf save [--scales 1,100,10000]
+    python -m benchmarks.perf compare [--threshold 25] [--scales 1,100,10000]
+
+`save` records a run as the baseline under benchmarks/.perf/; `compare` runs the
+suite again and exits non-zero when any path's median got slower than the
+baseline by more than --threshold percent (integer). Offline: embeddings are faked.
+Baselines are per machine (pytest-benchmark keys them by platform/Python),
+so save one on the machine that runs the comparison.
+"""
+import os
+import sys
+import glob
+
+import pytest
+
+from benchmarks._common import arg
+
+STORAGE_DIR = os.path.join(os.path.dirname(__file__), ".perf")
+BASELINE = "baseline"
+
+
+def _args(argv):
+    scales = arg(argv, "--scales", "")
+    if scales:
+        os.environ["BENCH_SCALES"] = scales
+    return [
+        os.path.join(os.path.dirname(__file__), "test_hot_paths.py"),
+        "-q",
+        "-p", "no:cacheprovider",
+        "--benchmark-only",
+        f"--benchmark-storage=file://{STORAGE_DIR}",
+        "--benchmark-columns=median,iqr,rounds",
+        "--benchmark-sort=name",
+    ]
+
+
+def main(argv) -> int:
+    if not argv or argv[0] not in ("save", "compare"):
+        print(__doc__)
+        return 2
+    args = _args(argv[1:])
+    if argv[0] == "save":
+        # exactly one baseline per machine, so compare never picks an older one
+        for old in glob.glob(os.path.join(STORAGE_DIR, "*", f"*_{BASELINE}.json")):
+            os.remove(old)
+        return pytest.main(args + [f"--benchmark-save={BASELINE}"])
+    threshold = arg(argv[1:], "--threshold", 25)
+    return pytest.main(args + [
+        f"--benchmark-compare=*_{BASELINE}",
+        f"--benchmark-compare-fail=median:{threshold}%",
+    ])
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,77 @@
+"""
+Microbenchmarks of the CPU-bound hot paths, at 1x / 100x / 10,000x the domain data.
+
+    python -m benchmarks.perf save       # record the baseline
+    python -m benchmarks.perf compare    # fail when a path got slower than the threshold
+
+See benchmarks/perf.py; plain `pytest` only runs tests/ (pytest.ini).
+"""
+import asyncio
+
+import pytest
+
+from benchmarks._synthetic import (
+    SCALES,
+    chroma_response,
+    run,
+    synthetic_charts,
+    synthetic_docs,
+    synthetic_results,
+)
+
+from app.logic_interpret import interpret_chart
+from app.rag_pipeline import build_context, select_chunks
+from app.utils_chunk import flatten_astrology_docs
+from app.vectorstore import VectorStore
+
+QUERY = "What does Saturn in the 10th house mean for career?"
+CANDIDATES = 20   # top_k * rerank_overfetch with the default settings
+
+
+@pytest.mark.parametrize("scale", SCALES)
+def test_flatten_astrology_docs(benchmark, scale):
+    docs = synthetic_docs(scale)
+    chunks = run(benchmark, scale, flatten_astrology_docs, docs)
+    assert len(chunks) == 30 * scale
+
+
+@pytest.mark.parametrize("scale", SCALES)
+def test_context_assembly(benchmark, scale):
+    """rerank + build_context as in run_rag, over CANDIDATES * scale candidates."""
+    candidates = synthetic_results(CANDIDATES * scale)
+
+    def assemble():
+        return build_context(select_chunks(QUERY, candidates))
+
+    context, used = run(benchmark, scale, assemble)
+    assert used
+
+
+@pytest.mark.parametrize("scale", SCALES)
+def test_result_normalization(benchmark, scale):
+    """VectorStore._normalize on a raw Chroma response of CANDIDATES * scale rows."""
+    raw = chroma_response(synthetic_results(CANDIDATES * scale))
+    out = run(benchmark, scale, VectorStore._normalize, raw, 0)
+    assert len(out) == CANDIDATES * scale
+
+
+@pytest.mark.parametrize("scale", [s for s in SCALES if s <= 100])
+def test_similarity_search(benchmark, scale, tmp_path):
+    """Query embedding (fake provider) + Chroma search + normalization over a 30 * scale index."""
+    store = VectorStore(persist_dir=str(tmp_path), collection_name="bench", provider="fake")
+    asyncio.run(store.upsert_chunks(flatten_astrology_docs(synthetic_docs(scale))))
+
+    def search():
+        return asyncio.run(store.similarity_search(QUERY, top_k=CANDIDATES))
+
+    assert len(run(benchmark, scale, search)) == CANDIDATES
+
+
+@pytest.mark.parametrize("scale", SCALES)
+def test_interpret_chart(benchmark, scale, house_lords_map):
+    charts = synthetic_charts(scale)
+
+    def interpret_all():
+        return [interpret_chart(c, house_lords_map) for c in charts]
+
+    assert len(run(benchmark, scale, interpret_all)) == scale
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_queue_orders_by_priority_and_hands_over_slots():
+    from app.admission import AdmissionController
+
+    ac = AdmissionController(max_inflight=1, max_queue=4, max_queue_seconds=5)
+    await ac.acquire("normal")
+    order = []
+
+    async def wait(prio):
+        await ac.acquire(prio)
+        order.append(prio)
+
+    tasks = [asyncio.create_task(wait(p)) for p in ("low", "normal", "high")]
+    await asyncio.sleep(0)
+    assert ac.queue_length == 3 and ac.inflight == 1
+
+    for _ in range(3):
+        ac.release()
+        await asyncio.sleep(0)
+    await asyncio.gather(*tasks)
+    assert order == ["high", "normal", "low"]
+    ac.release()
+    assert ac.inflight == 0 and ac.queue_length == 0
+
+
+@pytest.mark.asyncio
+async def test_full_queue_sheds_fast_and_evicts_lower_priority():
+    from app.admission import AdmissionController, AdmissionRejected
+    from app.metrics import metrics
+
+    metrics.reset()
+    ac = AdmissionController(max_inflight=1, max_queue=1, max_queue_seconds=5)
+    await ac.acquire()
+    queued_low = asyncio.create_task(ac.acquire("low"))
+    await asyncio.sleep(0)
+
+    with pytest.raises(AdmissionRejected) as exc:
+        await ac.acquire("low")
+    assert exc.value.reason == "queue_full" and exc.value.retry_after >= 1
+
+    queued_high = asyncio.create_task(ac.acquire("high"))
+    await asyncio.sleep(0)
+    with pytest.raises(AdmissionRejected):
+        await queued_low
+    assert metrics.get_counter("admission_shed_total", priority="low", reason="evicted") == 1
+
+    ac.release()
+    await queued_high
+    assert ac.inflight == 1 and ac.queue_length == 0
+
+
+@pytest.mark.asyncio
+async def test_queue_timeout_sheds():
+    from app.admission import AdmissionController, AdmissionRejected
+
+    ac = AdmissionController(max_inflight=1, max_queue=2, max_queue_seconds=0.01)
+    await ac.acquire()
+    with pytest.raises(AdmissionRejected) as exc:
+        await ac.acquire()
+    assert exc.value.reason == "timeout"
+    assert ac.queue_length == 0
+    ac.release()
+    assert ac.inflight == 0
+
+
+def test_priority_from_api_key(monkeypatch):
+    import app.admission as admission
+
+    monkeypatch.setattr(admission.settings, "admission_api_keys", "vip:high, batch:low")
+    assert admission.priority_for("vip", None) == "high"
+    assert admission.priority_for(None, None) == "normal"
+    # a header can only lower the priority
+    assert admission.priority_for(None, "high") == "normal"
+    assert admission.priority_for("vip", "low") == "low"
+
+
+def test_endpoint_returns_503_with_retry_after(monkeypatch):
+    from fastapi.testclient import TestClient
+    import app.router_chat as router_chat
+    from app.admission import AdmissionController
+    from app.main import app
+
+    full = AdmissionController(max_inflight=0, max_queue=0, max_queue_seconds=1)
+    monkeypatch.setattr(router_chat, "admission", full)
+
+    client = TestClient(app)
+    res = client.post("/chat/rag", json={"query": "Sun in 1st house?"})
+    assert res.status_code == 503
+    assert int(res.headers["Retry-After"]) >= 1
@@ -0,0 +1,145 @@
+import pytest
+
+
+def _payload(entries, phrasings):
+    from app.answer_store import STORE_FORMAT
+    from app.routing import route_models
+    from app.vectorstore import vector_store
+    from app.utils_chunk import domain_content_hash
+
+    return {
+        "format": STORE_FORMAT,
+        "version": domain_content_hash(),
+        "chat_models": route_models(),
+        "embedding_model": vector_store.provider.model,
+        "built_at": "2024-01-01T00:00:00+00:00",
+        "entries": entries,
+        "phrasings": phrasings,
+    }
+
+
+def _entry(key, planets, houses, answer):
+    return {
+        "question": key,
+        "answer": answer,
+        "chunk_ids": ["c1"],
+        "preview": [{"id": "c1", "score": 0.1, "text": "Planet Sun in House 1", "meta": {"type": "planet_in_house"}}],
+        "entities": {"planets": planets, "houses": houses, "intents": []},
+        "entry_version": "v1",
+    }
+
+
+def test_catalogue_covers_canonical_question_space():
+    from app.answer_store import build_catalogue
+
+    keys = [item["key"] for item in build_catalogue()]
+    assert len(keys) == len(set(keys))
+    assert sum(k.startswith("planet_in_house:") for k in keys) == 108
+    assert sum(k.startswith("house:") for k in keys) == 12
+    assert sum(k.startswith("planet:") for k in keys) == 9
+    assert "house_lord:7" in keys and "planet_gemstone:Saturn" in keys
+
+
+def test_extract_entities_from_phrasings():
+    from app.utils_query import extract_entities
+
+    ents = extract_entities("What happens if Shani is in the seventh house?")
+    assert ents["planets"] == ["Saturn"] and ents["houses"] == [7]
+    assert extract_entities("Which gemstone for house 12?")["intents"] == ["gemstone"]
+
+
+def test_store_key_and_embedding_lookup(tmp_path):
+    from app.answer_store import AnswerStore, encode_vector
+
+    store = AnswerStore(str(tmp_path / "answers.json"))
+    store.save(_payload(
+        {
+            "planet_in_house:1:Sun": _entry("planet_in_house:1:Sun", ["Sun"], [1], "sun-1"),
+            "planet_in_house:2:Sun": _entry("planet_in_house:2:Sun", ["Sun"], [2], "sun-2"),
+        },
+        [
+            {"text": "What does Sun in the 1st house mean?", "key": "planet_in_house:1:Sun",
+             "embedding": encode_vector([1.0, 0.0])},
+            {"text": "What does Sun in the 2nd house mean?", "key": "planet_in_house:2:Sun",
+             "embedding": encode_vector([0.0, 1.0])},
+        ],
+    ))
+
+    assert store.match_key("what does sun in the 1st house mean")["answer"] == "sun-1"
+    assert store.match_embedding("Sun placed in the first house?", [0.99, 0.01])["answer"] == "sun-1"
+    # Close vector but different house in the question -> rejected
+    assert store.match_embedding("Sun placed in the third house?", [0.99, 0.01]) is None
+
+
+def test_stale_store_is_ignored(tmp_path):
+    from app.answer_store import AnswerStore
+
+    store = AnswerStore(str(tmp_path / "answers.json"))
+    payload = _payload({"house:1": _entry("house:1", [], [1], "a")},
+                       [{"text": "Explain house 1.", "key": "house:1"}])
+    payload["version"] = "old-content-hash"
+    store.save(payload)
+
+    assert len(store) == 0
+    assert store.match_key("Explain house 1.") is None
+
+
+@pytest.mark.asyncio
+async def test_run_rag_serves_precomputed_answer(monkeypatch, tmp_path):
+    import app.rag_pipeline as rp
+    from app.answer_store import AnswerStore
+
+    store = AnswerStore(str(tmp_path / "answers.json"))
+    store.save(_payload({"house:1": {**_entry("house:1", [], [1], "precomputed"), "route": "lookup"}},
+                        [{"text": "Explain house 1.", "key": "house:1"}]))
+    monkeypatch.setattr(rp, "answer_store", store)
+
+    async def fail(*args, **kwargs):
+        raise AssertionError("live pipeline should not run")
+
+    monkeypatch.setattr(rp.vector_store, "similarity_search", fail)
+    monkeypatch.setattr(rp, "generate_answer", fail)
+
+    before = rp.metrics.get_counter("rag_route_total", route="lookup")
+    answer, preview, _ = await rp.run_rag("Explain house 1")
+    assert answer == "precomputed"
+    assert preview[0].id == "c1"
+    assert rp.metrics.get_counter("rag_route_total", route="lookup") == before + 1
+
+
+@pytest.mark.asyncio
+async def test_precomputed_answers_use_the_routed_model(monkeypatch):
+    import asyncio
+    import numpy as np
+    import app.precompute as precompute
+    from app.routing import choose_route
+
+    chunk = {"id": "c1", "score": 0.1, "text": "Planet Sun in House 1",
+             "meta": {"type": "planet_in_house", "planet_name": "Sun", "house_number": 1}}
+    seen = {}
+
+    class _Provider:
+        async def embed_many(self, texts):
+            return np.zeros((len(texts), 4), dtype=np.float32)
+
+    class _Store:
+        provider = _Provider()
+
+    async def fake_retrieve_selected(query, query_embedding=None):
+        return [chunk], 1
+
+    async def fake_generate_answer(system_prompt, user_question, context, model=None, max_tokens=600):
+        seen.update(model=model, max_tokens=max_tokens)
+        return "answer"
+
+    monkeypatch.setattr(precompute, "vector_store", _Store())
+    monkeypatch.setattr(precompute, "retrieve_selected", fake_retrieve_selected)
+    monkeypatch.setattr(precompute, "generate_answer", fake_generate_answer)
+
+    question = "What does Sun in the 1st house mean?"
+    item = {"key": "planet_in_house:1:Sun", "questions": [question], "entities": {}}
+    entry = (await precompute._answer_item(item, asyncio.Semaphore(1)))["entry"]
+
+    route = choose_route(question, [chunk])
+    assert seen == {"model": route.model, "max_tokens": route.max_tokens}
+    assert entry["route"] == route.name and entry["model"] == route.model
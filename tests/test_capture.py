@@ -0,0 +1,127 @@
+import asyncio
+import os
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+
+def _patch_run_rag(monkeypatch):
+    from app.deadline import Deadline
+    from app.schemas import RetrievedChunk
+
+    async def fake_run_rag(query: str, deadline=None, top_k=None, max_distance=None):
+        await (deadline or Deadline(5)).run(asyncio.sleep(0.01), "search")
+        return "answer", [RetrievedChunk(id=f"id-{query}", score=0.1, text="Planet Sun ...", meta={})], 1
+
+    import app.router_chat as router_chat
+
+    monkeypatch.setattr(router_chat, "run_rag", fake_run_rag)
+
+
+@pytest.fixture
+def capture_on(tmp_path, monkeypatch):
+    import app.capture as capture
+
+    writer = capture.CaptureWriter(str(tmp_path), max_bytes=10**6, max_files=3, queue_size=100, flush_seconds=0.05)
+    monkeypatch.setattr(capture, "capture_writer", writer)
+    monkeypatch.setattr(capture.settings, "capture_enabled", True)
+    yield writer
+    writer.close()
+
+
+def test_chat_rag_traffic_is_captured_with_ids_and_stages(capture_on, monkeypatch):
+    from app.capture import read_capture
+
+    _patch_run_rag(monkeypatch)
+    from app.main import app
+
+    client = TestClient(app)
+    assert client.post("/chat/rag", json={"query": "sun", "top_k": 2}).status_code == 200
+    assert client.post("/chat/rag", json={"query": "sun", "top_k": 0}).status_code == 422   # rejected before the endpoint
+    capture_on.close()
+
+    records = list(read_capture(capture_on.directory))
+    assert len(records) == 1
+    rec = records[0]
+    assert rec["endpoint"] == "/chat/rag" and rec["status"] == 200
+    assert rec["request"] == {"query": "sun", "top_k": 2, "preview": "full"}
+    assert rec["ids"] == ["id-sun"] and rec["k"] == 1
+    assert rec["stages_s"]["search"] >= 0.01 and rec["latency_s"] >= rec["stages_s"]["search"]
+
+
+def test_capture_is_off_by_default(tmp_path, monkeypatch):
+    import app.capture as capture
+
+    _patch_run_rag(monkeypatch)
+    writer = capture.CaptureWriter(str(tmp_path), 10**6, 3, 100, 0.05)
+    monkeypatch.setattr(capture, "capture_writer", writer)
+    from app.main import app
+
+    assert TestClient(app).post("/chat/rag", json={"query": "sun"}).status_code == 200
+    writer.close()
+    assert os.listdir(tmp_path) == []
+
+
+def test_writer_rotates_and_keeps_newest_files(tmp_path):
+    from app.capture import CaptureWriter, capture_files, read_capture
+
+    writer = CaptureWriter(str(tmp_path), max_bytes=1, max_files=2, queue_size=100, flush_seconds=0.01)
+    for i in range(4):
+        writer.submit({"ts": i, "request": {"query": f"q{i}"}})
+        writer.close()   # one batch per file: every write finds the file over max_bytes
+    files = capture_files(str(tmp_path))
+    assert len(files) == 2
+    assert [r["ts"] for r in read_capture(str(tmp_path))] == [2, 3]
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    from app.capture import CaptureWriter
+
+    writer = CaptureWriter(str(tmp_path), 10**6, 3, queue_size=1, flush_seconds=0.05)
+    writer._thread = object()   # pretend started, so nothing drains the queue
+    assert writer.submit({"ts": 0}) is True
+    assert writer.submit({"ts": 1}) is False
+
+
+def test_replay_keeps_order_and_compares_runs(monkeypatch):
+    from app.replay import compare, format_report, replay, schedule
+
+    _patch_run_rag(monkeypatch)
+    from app.main import app
+
+    records = [
+        {"ts": 100.0, "endpoint": "/chat/rag", "request": {"query": "a"}, "ids": ["id-a"]},
+        {"ts": 100.2, "endpoint": "/chat/rag", "request": {"query": "b"}, "ids": ["old"]},
+    ]
+    assert schedule(records, 1.0) == pytest.approx([0.0, 0.2])
+    assert schedule(records, 2.0) == pytest.approx([0.0, 0.1])
+    assert schedule(records, 0) == [0.0, 0.0]
+
+    transport = httpx.ASGITransport(app=app)
+    run_a = asyncio.run(replay(records, "http://test", speed=0, transport=transport))
+    run_b = asyncio.run(replay(records, "http://test", speed=4.0, transport=transport))
+
+    assert [r["ids"] for r in run_a["results"]] == [["id-a"], ["id-b"]]
+    assert run_a["summary"]["ok"] == 2 and run_a["summary"]["ids_match_capture"] == 0.5
+    assert run_b["results"][1]["sent_s"] >= 0.05   # waited for its (scaled) offset
+
+    rows = {r["metric"]: r for r in compare(run_a, run_b)}
+    assert rows["ids_match_between_runs"]["a"] == 1.0
+    assert rows["requests"]["change"] == 0.0
+    assert "latency_p95_s" in format_report(list(rows.values()))
+
+
+@pytest.mark.asyncio
+async def test_stub_upstream_answers_without_network(monkeypatch):
+    import app.models_openai as models_openai
+
+    monkeypatch.setattr(models_openai.settings, "upstream_stub", True)
+    monkeypatch.setattr(models_openai.settings, "upstream_stub_latency", 0.0)
+
+    async def no_network(*a, **kw):
+        raise AssertionError("network call with the stub upstream on")
+
+    monkeypatch.setattr(models_openai.httpx.AsyncClient, "post", no_network)
+    answer = await models_openai.generate_answer("sys", "Sun in 1st?", "[source]\nPlanet Sun in House 1\n")
+    assert answer.startswith("[stub] Sun in 1st?") and "Planet Sun in House 1" in answer
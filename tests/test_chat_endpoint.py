@@ -1,10 +1,11 @@
 from fastapi.testclient import TestClient
 import asyncio
+import pytest
 
 
 def test_chat_rag_endpoint_happy_path(monkeypatch):
     # Patch the run_rag function used inside the router to avoid external calls
-    async def fake_run_rag(query: str):
+    async def fake_run_rag(query: str, deadline=None, top_k=None, max_distance=None):
         return (
             "Astrology answer based on retrieved context.",
             [
@@ -13,8 +14,15 @@ def test_chat_rag_endpoint_happy_path(monkeypatch):
                     "score": 0.1,
                     "text": "Planet Sun in House 1 ...",
                     "meta": {"type": "planet_in_house", "house_number": 1, "planet_name": "Sun"},
-                }
+                },
+                {
+                    "id": "def",
+                    "score": 0.4,
+                    "text": "House 1 ...",
+                    "meta": {"type": "house", "house_number": 1},
+                },
             ],
+            1,   # the second chunk is a linked neighbour, not one of the k selected
         )
 
     import app.router_chat as router_chat
@@ -31,4 +39,70 @@ def test_chat_rag_endpoint_happy_path(monkeypatch):
     assert "retrieved_context_preview" in data and isinstance(
         data["retrieved_context_preview"], list
     )
+    assert len(data["retrieved_context_preview"]) == 2
+    assert data["k"] == 1
+
+
+def test_chat_rag_passes_depth_overrides(monkeypatch):
+    seen = {}
+
+    async def fake_run_rag(query: str, deadline=None, top_k=None, max_distance=None):
+        seen.update(top_k=top_k, max_distance=max_distance)
+        return "answer", [], 0
+
+    import app.router_chat as router_chat
+
+    monkeypatch.setattr(router_chat, "run_rag", fake_run_rag)
+
+    from app.main import app
+
+    client = TestClient(app)
+    res = client.post("/chat/rag", json={"query": "Sun in 1st?", "top_k": 2, "max_distance": 0.5})
+    assert res.status_code == 200
+    assert seen == {"top_k": 2, "max_distance": 0.5}
+    assert client.post("/chat/rag", json={"query": "Sun in 1st?", "top_k": 0}).status_code == 422
+
+
+
+def _patch_run_rag(monkeypatch):
+    from app.schemas import RetrievedChunk
+
+    async def fake_run_rag(query: str, deadline=None, top_k=None, max_distance=None):
+        return (
+            "answer",
+            [RetrievedChunk(id="abc", score=0.1, text="Planet Sun in House 1 ...", meta={"house_number": 1})],
+            1,
+        )
+
+    import app.router_chat as router_chat
+
+    monkeypatch.setattr(router_chat, "run_rag", fake_run_rag)
+
+
+def test_chat_rag_msgpack_negotiation(monkeypatch):
+    msgpack = pytest.importorskip("msgpack")
+
+    _patch_run_rag(monkeypatch)
+    from app.main import app
+
+    client = TestClient(app)
+    res = client.post(
+        "/chat/rag",
+        json={"query": "Sun in 1st?"},
+        headers={"Accept": "application/msgpack"},
+    )
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("application/msgpack")
+    data = msgpack.unpackb(res.content, raw=False)
+    assert data["answer"] == "answer"
+    assert data["retrieved_context_preview"][0]["text"].startswith("Planet Sun")
+
 
+def test_chat_rag_compact_preview(monkeypatch):
+    _patch_run_rag(monkeypatch)
+    from app.main import app
+
+    client = TestClient(app)
+    res = client.post("/chat/rag", json={"query": "Sun in 1st?", "preview": "compact"})
+    assert res.status_code == 200
+    assert res.json()["retrieved_context_preview"] == [{"id": "abc", "score": 0.1}]
@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+
+
+def _naive_score(a_map, b_map, weights):
+    """Per-pair dict comparison: the slow reference the vectorized path must match."""
+    from app.compatibility import _PLANET_INDEX
+
+    def placements(m):
+        for h, occ in m.items():
+            for p in ([occ] if isinstance(occ, str) else occ):
+                yield int(h), _PLANET_INDEX[p]
+
+    total = 0.0
+    for ha, p in placements(a_map):
+        for hb, q in placements(b_map):
+            if ha == hb:
+                total += weights.conjunction_weight * weights.rel[p, q]
+                total += weights.lord_weight * (weights.lord[ha, p] + weights.lord[ha, q])
+    return total
+
+
+def test_encode_chart_and_occupancy():
+    from app.compatibility import encode_chart, occupancy, PLANETS
+
+    enc = encode_chart({"1": ["Sun", "Mercury"], "7": "Venus"})
+    assert enc.dtype == np.int8 and enc.shape == (len(PLANETS),)
+    assert enc[PLANETS.index("Sun")] == 1 and enc[PLANETS.index("Venus")] == 7
+    assert enc[PLANETS.index("Moon")] == 0
+
+    occ = occupancy(enc)
+    assert occ.shape == (1, 12, 9)
+    assert occ[0, 0, PLANETS.index("Mercury")] and occ.sum() == 3
+
+    for bad in ("13", "0", "-1", "x"):
+        with pytest.raises(ValueError):
+            encode_chart({bad: "Sun"})
+
+    # planets are matched by key, as in interpret_chart and rerank
+    loose = encode_chart({"1": ["ketu", "Rahu (North Node)"], "7": " Venus "})
+    assert (loose == encode_chart({"1": ["Ketu", "Rahu"], "7": "Venus"})).all()
+    with pytest.raises(ValueError):
+        encode_chart({"1": "Pluto"})
+
+
+def test_vectorized_scores_match_pairwise_reference():
+    from app.compatibility import CompatibilityWeights, encode_chart, encode_charts, score_many
+    from app.ephemeris import houses_maps
+
+    rng = np.random.default_rng(7)
+    maps = houses_maps(rng.integers(1, 13, size=(50, 9)))
+    weights = CompatibilityWeights()
+
+    scores = score_many(encode_chart(maps[0]), encode_charts(maps), weights)
+    expected = [_naive_score(maps[0], m, weights) for m in maps]
+    assert np.allclose(scores, expected, atol=1e-4)
+
+    # symmetric: a vs b == b vs a
+    back = score_many(encode_chart(maps[3]), encode_charts(maps[:1]), weights)
+    assert back[0] == pytest.approx(scores[3], abs=1e-4)
+
+
+def test_profile_index_ranks_top_n(tmp_path):
+    from app.compatibility import CompatibilityWeights, ProfileIndex, encode_chart, profiles_from_records
+
+    records = [
+        {"id": "same", "houses": {"1": "Sun", "7": "Venus"}},
+        {"id": "enemy", "houses": {"1": "Saturn", "7": "Sun"}},
+        {"id": "born", "dob": "1990-05-14T06:30:00+05:30", "lat": 28.61, "long": 77.21},
+    ]
+    ids, houses = profiles_from_records(records)
+    assert houses.shape == (3, 9) and (houses[2] > 0).all()
+
+    index = ProfileIndex(str(tmp_path / "profiles.npz"))
+    index.save(ids, houses)
+    ranked = index.rank(encode_chart({"1": "Sun", "7": "Venus"}), 2, CompatibilityWeights())
+    assert len(index) == 3
+    assert [pid for pid, _ in ranked][0] == "same"
+    assert len(ranked) == 2 and ranked[0][1] >= ranked[1][1]
+
+
+def test_compatibility_endpoint(monkeypatch, tmp_path):
+    from fastapi.testclient import TestClient
+    import app.router_chart as router_chart
+    from app.compatibility import ProfileIndex, encode_charts
+    from app.main import app
+
+    index = ProfileIndex(str(tmp_path / "profiles.npz"))
+    monkeypatch.setattr(router_chart, "profile_index", index)
+    client = TestClient(app)
+
+    body = {"houses": {"1": "Sun", "7": ["Venus", "Moon"]}, "top_n": 1}
+    assert client.post("/chart/compatibility", json=body).status_code == 503
+
+    index.save(["a", "b"], encode_charts([{"1": "Sun"}, {"5": "Saturn"}]))
+    res = client.post("/chart/compatibility", json=body)
+    assert res.status_code == 200
+    data = res.json()
+    assert data["profiles_scored"] == 2
+    assert [m["profile_id"] for m in data["matches"]] == ["a"]
+
+    for houses in ({"13": "Sun"}, {"x": "Sun"}):
+        res = client.post("/chart/compatibility", json={"houses": houses, "top_n": 1})
+        assert res.status_code == 422 and "1..12" in res.json()["detail"]
+    res = client.post("/chart/compatibility", json={"houses": {"1": "Pluto"}, "top_n": 1})
+    assert res.status_code == 422 and "Pluto" in res.json()["detail"]
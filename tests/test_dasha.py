@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+
+def test_birth_balance_from_moon_longitude():
+    from app.dasha import DASHA_SEQUENCE, birth_balance, NAKSHATRA_SPAN
+
+    # Moon halfway through Rohini (4th nakshatra, ruled by Moon: 10 years)
+    bal = birth_balance([3.5 * NAKSHATRA_SPAN])
+    assert bal["nakshatra"][0] == 3
+    assert DASHA_SEQUENCE[bal["lord"][0]] == "Moon"
+    assert bal["elapsed"][0] == pytest.approx(5.0)
+
+
+def test_active_periods_agree_with_timeline():
+    from app.dasha import active_periods, dasha_timeline
+
+    rng = np.random.default_rng(3)
+    n = 300
+    moon = rng.uniform(0, 360, n)
+    birth = np.datetime64("1950-01-01T00:00:00") + rng.integers(0, 70 * 365, n).astype("timedelta64[D]")
+    at = birth + rng.integers(0, 100 * 365, n).astype("timedelta64[D]")
+
+    ap = active_periods(moon, birth, at)
+    tl = dasha_timeline(moon, birth)
+    for i in range(n):
+        k = np.searchsorted(tl["maha_starts"][i], at[i], side="right") - 1
+        j = np.searchsorted(tl["antar_starts"][i, k], at[i], side="right") - 1
+        assert ap["maha"][i] == tl["maha"][i, k]
+        assert ap["antar"][i] == tl["antar"][i, k, j]
+        assert ap["maha_start"][i] <= at[i] < ap["maha_end"][i]
+        assert ap["antar_start"][i] <= at[i] < ap["antar_end"][i]
+
+
+def test_timeline_spans_one_cycle_and_antardashas_fill_each_mahadasha():
+    from app.dasha import dasha_timeline
+
+    tl = dasha_timeline([100.0], np.array(["2000-01-01T00:00:00"], dtype="datetime64[s]"))
+    span_days = (tl["maha_starts"][0, -1] - tl["maha_starts"][0, 0]).astype(np.int64) / 86400
+    assert span_days == pytest.approx(120 * 365.25, abs=1)
+    # each mahadasha starts with its own antardasha and ends where the next begins
+    assert (tl["antar"][0, :, 0] == tl["maha"][0]).all()
+    assert (tl["antar_starts"][0, :, -1] == tl["maha_starts"][0, 1:]).all()
+
+
+def test_nakshatra_inputs():
+    from app.dasha import nakshatra_index
+
+    assert nakshatra_index("Rohini") == 3
+    assert nakshatra_index(1) == 0
+    with pytest.raises(ValueError):
+        nakshatra_index(28)
+
+
+def test_dasha_batch_endpoint():
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    client = TestClient(app)
+    res = client.post("/chart/dasha", json={
+        "at": "2026-01-01",
+        "people": [
+            {"id": "u1", "dob": "1990-05-14T06:30:00+05:30"},
+            {"id": "u2", "dob": "1985-02-02", "nakshatra": "Rohini"},
+        ],
+    })
+    assert res.status_code == 200
+    data = res.json()["results"]
+    assert [r["id"] for r in data] == ["u1", "u2"]
+    assert data[1]["nakshatra"] == "Rohini"
+    assert data[0]["mahadasha"]["keywords"]
+    assert data[0]["mahadasha"]["start"] <= "2026-01-01" < data[0]["mahadasha"]["end"]
+
+    bad = client.post("/chart/dasha", json={"people": [{"id": "x", "dob": "1990-01-01", "nakshatra": 30}]})
+    assert bad.status_code == 422
+
+    early = client.post("/chart/dasha", json={
+        "at": "1980-01-01",
+        "people": [{"id": "u1", "dob": "1990-05-14"}, {"id": "u2", "dob": "1970-02-02", "nakshatra": 4}],
+    })
+    assert early.status_code == 422 and "u1" in early.json()["detail"] and "u2" not in early.json()["detail"]
+
+
+def test_active_periods_reject_dates_before_birth():
+    from app.dasha import active_periods
+
+    birth = np.array(["1990-01-01T00:00:00", "2000-01-01T00:00:00"], dtype="datetime64[s]")
+    with pytest.raises(ValueError):
+        active_periods([10.0, 20.0], birth, np.datetime64("1995-01-01T00:00:00"))
@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+SUN_1 = {
+    "id": "1",
+    "score": 0.1,
+    "text": (
+        "Planet Sun in House 1:\nSummary: \n"
+        "Positive: Strong personality and leadership presence., High self-esteem and confidence.\n"
+        "Negative: Ego and arrogance if afflicted.\n"
+    ),
+    "meta": {"type": "planet_in_house", "house_number": 1, "planet_name": "Sun"},
+}
+
+
+def _patch_search(monkeypatch, rp, delay=0.0):
+    async def fake_similarity_search(query, top_k, query_embedding=None):
+        await asyncio.sleep(delay)
+        return [SUN_1]
+
+    monkeypatch.setattr(rp.vector_store, "similarity_search", fake_similarity_search)
+
+
+def test_deadline_from_header_is_clamped(monkeypatch):
+    from app.deadline import Deadline
+    import app.deadline as deadline_mod
+
+    monkeypatch.setattr(deadline_mod.settings, "request_deadline_seconds", 20.0)
+    monkeypatch.setattr(deadline_mod.settings, "request_deadline_max_seconds", 60.0)
+    assert Deadline.from_header(None).budget == 20.0
+    assert Deadline.from_header("2500").budget == 2.5
+    assert Deadline.from_header("999999").budget == 60.0
+    assert Deadline.from_header("soon").budget == 20.0
+    for bad in ("nan", "inf", "-inf", "0", "-5"):
+        assert Deadline.from_header(bad).budget == 20.0
+
+
+@pytest.mark.asyncio
+async def test_slow_generation_falls_back_to_extractive_answer(monkeypatch):
+    import app.rag_pipeline as rp
+    from app.deadline import Deadline
+    from app.metrics import metrics
+
+    metrics.reset()
+    _patch_search(monkeypatch, rp)
+    monkeypatch.setattr(rp.settings, "deadline_min_generation_seconds", 0.0)
+    timeouts = []
+
+    async def slow_generate_answer(system_prompt, user_question, context, model=None, max_tokens=600, timeout=None):
+        timeouts.append(timeout)
+        await asyncio.sleep(5)
+        return "too late"
+
+    monkeypatch.setattr(rp, "generate_answer", slow_generate_answer)
+
+    deadline = Deadline(0.2)
+    answer, preview, _ = await rp.run_rag("What does Sun in the 1st house mean for confidence?", deadline=deadline)
+
+    assert deadline.degraded and deadline.degraded_stage == "generation"
+    assert "Planet Sun in House 1" in answer and "confidence" in answer
+    assert len(preview) == 1
+    # generation only got what was left of the budget
+    assert 0 < timeouts[0] <= 0.2
+    assert metrics.get_counter("rag_degraded_total", stage="generation") == 1
+
+
+@pytest.mark.asyncio
+async def test_generation_is_skipped_when_budget_is_too_small(monkeypatch):
+    import app.rag_pipeline as rp
+    from app.deadline import Deadline
+
+    _patch_search(monkeypatch, rp)
+    monkeypatch.setattr(rp.settings, "deadline_min_generation_seconds", 5.0)
+
+    async def never_called(*args, **kwargs):
+        raise AssertionError("generation should not start")
+
+    monkeypatch.setattr(rp, "generate_answer", never_called)
+
+    deadline = Deadline(1.0)
+    answer, _, _ = await rp.run_rag("Sun in 1st house?", deadline=deadline)
+    assert deadline.degraded_stage == "budget" and answer
+
+
+def test_endpoint_marks_degraded_and_times_out_slow_search(monkeypatch):
+    from fastapi.testclient import TestClient
+    import app.rag_pipeline as rp
+    from app.main import app
+
+    monkeypatch.setattr(rp.settings, "deadline_min_generation_seconds", 0.0)
+
+    async def slow_generate_answer(*args, **kwargs):
+        await asyncio.sleep(5)
+
+    monkeypatch.setattr(rp, "generate_answer", slow_generate_answer)
+    client = TestClient(app)
+
+    _patch_search(monkeypatch, rp)
+    res = client.post("/chat/rag", json={"query": "Sun in 1st house?"}, headers={"X-Request-Timeout-Ms": "200"})
+    assert res.status_code == 200
+    assert res.json()["degraded"] is True
+
+    _patch_search(monkeypatch, rp, delay=5)
+    res = client.post("/chat/rag", json={"query": "Sun in 1st house?"}, headers={"X-Request-Timeout-Ms": "100"})
+    assert res.status_code == 504
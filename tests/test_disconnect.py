@@ -0,0 +1,114 @@
+import asyncio
+import json
+
+import pytest
+
+
+def _receive_disconnect_after(seconds: float, body: bytes = b""):
+    """ASGI receive: the request body, then a disconnect after `seconds`."""
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await asyncio.sleep(seconds)
+        return {"type": "http.disconnect"}
+
+    return receive
+
+
+@pytest.mark.asyncio
+async def test_disconnect_cancels_work_and_counts_it():
+    from app.disconnect import ClientDisconnected, cancel_on_disconnect
+    from app.metrics import metrics
+
+    metrics.reset()
+    state = {}
+
+    async def work():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            state["cancelled"] = True
+            raise
+
+    receive = _receive_disconnect_after(0.02)
+    await receive()   # body already consumed by the framework
+    with pytest.raises(ClientDisconnected):
+        await asyncio.wait_for(cancel_on_disconnect(receive, work(), "/chat/rag"), timeout=1)
+    assert state == {"cancelled": True}
+    assert metrics.get_counter("rag_cancelled_total", endpoint="/chat/rag") == 1
+
+
+@pytest.mark.asyncio
+async def test_finished_work_wins_over_connected_client():
+    from app.disconnect import cancel_on_disconnect
+    from app.metrics import metrics
+
+    metrics.reset()
+
+    async def work():
+        return "answer"
+
+    receive = _receive_disconnect_after(10)
+    await receive()
+    assert await cancel_on_disconnect(receive, work(), "/chat/rag") == "answer"
+    assert metrics.get_counter("rag_cancelled_total", endpoint="/chat/rag") == 0
+
+
+@pytest.mark.asyncio
+async def test_shielded_shared_work_keeps_running_for_other_waiters():
+    from app.disconnect import ClientDisconnected, cancel_on_disconnect
+
+    shared = asyncio.ensure_future(asyncio.sleep(0.05, result="shared result"))
+
+    receive = _receive_disconnect_after(0.01)
+    await receive()
+    with pytest.raises(ClientDisconnected):
+        await cancel_on_disconnect(receive, asyncio.shield(shared), "/chat/rag")
+    assert await shared == "shared result"
+
+
+@pytest.mark.asyncio
+async def test_chat_rag_abandoned_request_frees_its_slot(monkeypatch):
+    import app.router_chat as router_chat
+    from app.admission import admission
+
+    state = {}
+
+    async def slow_run_rag(query: str, deadline=None, top_k=None, max_distance=None):
+        try:
+            await asyncio.sleep(10)   # waiting on the model
+        except asyncio.CancelledError:
+            state["cancelled"] = True
+            raise
+        return "answer", [], 0
+
+    monkeypatch.setattr(router_chat, "run_rag", slow_run_rag)
+    from app.main import app
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/chat/rag",
+        "raw_path": b"/chat/rag",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"content-type", b"application/json"), (b"host", b"test")],
+        "client": ("127.0.0.1", 1234),
+        "server": ("test", 80),
+    }
+    body = json.dumps({"query": "Sun in 1st?"}).encode()
+    await asyncio.wait_for(app(scope, _receive_disconnect_after(0.02, body), send), timeout=2)
+
+    assert state == {"cancelled": True}
+    assert sent[0]["status"] == 499
+    assert admission.inflight == 0
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_local_provider_is_deterministic_and_normalized():
+    from app.embeddings import LocalHashEmbeddingProvider
+
+    p = LocalHashEmbeddingProvider(dim=256)
+    a = await p.embed("Sun in the 1st house")
+    b = await p.embed("Sun in the 1st house")
+    assert a.dtype == np.float32 and a.shape == (256,) and np.array_equal(a, b)
+    assert abs(float(np.linalg.norm(a)) - 1.0) < 1e-5
+
+
+@pytest.mark.asyncio
+async def test_local_provider_embed_many_returns_one_float32_matrix():
+    from app.embeddings import LocalHashEmbeddingProvider
+
+    p = LocalHashEmbeddingProvider(dim=64)
+    out = await p.embed_many(["Sun", "Moon"])
+    assert out.dtype == np.float32 and out.shape == (2, 64)
+    assert np.array_equal(out[1], p.embed_sync("Moon"))
+
+
+def test_local_provider_ranks_related_text_higher():
+    from app.embeddings import LocalHashEmbeddingProvider
+
+    p = LocalHashEmbeddingProvider(dim=512)
+    q = p.embed_sync("career and reputation")
+    near = p.embed_sync("Tenth house: career, reputation, public status")
+    far = p.embed_sync("Fourth house: mother, home, emotional roots")
+    assert float(q @ near) > float(q @ far)
+
+
+def test_unknown_provider_is_rejected():
+    from app.embeddings import get_provider
+
+    with pytest.raises(RuntimeError):
+        get_provider("nope")
+
+
+@pytest.mark.asyncio
+async def test_vectorstore_offline_index_records_provider(tmp_path):
+    from app.vectorstore import VectorStore
+
+    store = VectorStore(persist_dir=str(tmp_path), collection_name="offline_test", provider="local")
+    assert store.collection.metadata["embedding_provider"] == "local"
+
+    await store.upsert_chunks([
+        {"text": "House 10 - career, reputation, status", "metadata": {"type": "house", "house_number": 10}},
+        {"text": "House 4 - home, mother, property", "metadata": {"type": "house", "house_number": 4}},
+    ])
+    results = await store.similarity_search("career and reputation", top_k=1)
+    assert results[0]["meta"]["house_number"] == 10
+
+    # Re-opening with another requested provider keeps the recorded one
+    reopened = VectorStore(persist_dir=str(tmp_path), collection_name="offline_test", provider="openai")
+    assert reopened.provider.name == "local"
+
+
+@pytest.mark.asyncio
+async def test_vectorstore_keeps_the_recorded_embedding_model(tmp_path, monkeypatch):
+    from app.embeddings import get_provider
+    from app.vectorstore import VectorStore
+    import app.embeddings as embeddings
+
+    monkeypatch.setattr(embeddings.settings, "local_embedding_dim", 128)
+    store = VectorStore(persist_dir=str(tmp_path), collection_name="dim_test", provider="local")
+    await store.upsert_chunks([{"text": "House 10 - career", "metadata": {"type": "house", "house_number": 10}}])
+
+    # LOCAL_EMBEDDING_DIM changed after the build: queries still embed into 128 dims
+    monkeypatch.setattr(embeddings.settings, "local_embedding_dim", 256)
+    reopened = VectorStore(persist_dir=str(tmp_path), collection_name="dim_test", provider="local")
+    assert reopened.provider.model == "hash-ngram-128"
+    assert (await reopened.similarity_search("career", top_k=1))[0]["meta"]["house_number"] == 10
+
+    assert get_provider("openai", "text-embedding-3-small").model == "text-embedding-3-small"
+    with pytest.raises(RuntimeError):
+        get_provider("local", "hash-ngram-x")
@@ -0,0 +1,76 @@
+import json
+import os
+
+import numpy as np
+
+REFERENCE = os.path.join(os.path.dirname(__file__), "data", "ephemeris_reference.json")
+
+
+def _angle_diff(a, b):
+    return np.abs((np.asarray(a) - np.asarray(b) + 180.0) % 360.0 - 180.0)
+
+
+def _load_reference():
+    with open(REFERENCE, "r", encoding="utf-8") as f:
+        return json.load(f)["records"]
+
+
+def test_positions_match_reference_ephemeris():
+    from app.ephemeris import PLANETS, compute_charts
+
+    records = _load_reference()
+    when = np.array([np.datetime64(r["utc"].rstrip("Z"), "s") for r in records])
+    lat = np.array([r["lat"] for r in records])
+    lon = np.array([r["long"] for r in records])
+
+    chart = compute_charts(when, lat, lon)
+    expected = np.array([[r["longitudes"][p] for p in PLANETS] for r in records])
+    err = _angle_diff(chart["longitudes"], expected)
+
+    # low-precision series: well under the half-degree that could flip a sign cusp in practice
+    assert err[:, :7].max() < 0.15
+    assert err[:, 7:].max() < 0.05          # mean nodes are nearly exact
+    assert _angle_diff(chart["ascendant"], [r["ascendant"] for r in records]).max() < 0.1
+
+
+def test_whole_sign_houses_follow_ascendant_sign():
+    from app.ephemeris import compute_charts
+
+    when = np.array(["1990-05-14T01:00:00", "2001-01-01T12:00:00"], dtype="datetime64[s]")
+    chart = compute_charts(when, [28.61, -33.87], [77.21, 151.21])
+
+    asc_sign = (chart["ascendant"] // 30).astype(int)
+    expected = (chart["signs"] - asc_sign[:, None]) % 12 + 1
+    assert chart["houses"].shape == (2, 9)
+    assert (chart["houses"] == expected).all()
+    # Rahu and Ketu always sit in opposite houses
+    assert ((chart["houses"][:, 7] - chart["houses"][:, 8]) % 12 == 6).all()
+
+
+def test_parse_birth_time_converts_to_utc():
+    from app.ephemeris import parse_birth_time
+
+    assert parse_birth_time("1990-05-14T06:30:00+05:30") == np.datetime64("1990-05-14T01:00:00")
+    assert parse_birth_time("1990-05-14") == np.datetime64("1990-05-14T12:00:00")
+
+
+def test_interpret_chart_computes_houses_from_birth_data():
+    from app.logic_interpret import interpret_chart, load_house_lords_map
+
+    lords = load_house_lords_map("app/domain/house_lords.json")
+    out = interpret_chart({"name": "A", "dob": "1990-05-14T06:30:00+05:30", "lat": 28.61, "long": 77.21}, lords)
+
+    planets = [i["occupying_planet"] for i in out["interpretations"]]
+    assert sorted(planets) == sorted(["Sun", "Moon", "Mars", "Mercury", "Venus", "Jupiter", "Saturn", "Rahu", "Ketu"])
+
+
+def test_chart_endpoint_accepts_birth_data():
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    client = TestClient(app)
+    res = client.post("/chart/interpret", json={"dob": "1990-05-14T06:30:00+05:30", "lat": 28.61, "long": 77.21})
+    assert res.status_code == 200
+    assert len(res.json()["interpretations"]) == 9
+
+    assert client.post("/chart/interpret", json={"dob": "1990-05-14"}).status_code == 422
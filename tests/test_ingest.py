@@ -18,17 +18,165 @@ async def test_ingest_calls_vectorstore(monkeypatch):
     def fake_flatten_astrology_docs(docs):
         return sample_chunks
 
-    calls = {"upsert": 0}
+    calls = {"reindex": 0}
 
-    class _FakeVS:
-        async def upsert_chunks(self, chunks):
-            calls["upsert"] += 1
-            assert chunks == sample_chunks
+    async def fake_reindex(store, chunks=None):
+        calls["reindex"] += 1
+        assert chunks == sample_chunks
+        return {"active": "v1"}
 
     monkeypatch.setattr(ingest, "load_domain_jsons", fake_load_domain_jsons)
     monkeypatch.setattr(ingest, "flatten_astrology_docs", fake_flatten_astrology_docs)
-    monkeypatch.setattr(ingest, "vector_store", _FakeVS())
+    monkeypatch.setattr(ingest, "index_chunks", lambda chunks: chunks)
+    monkeypatch.setattr(ingest, "reindex", fake_reindex)
 
-    await ingest.ingest_domain_knowledge()
-    assert calls["upsert"] == 1
+    assert (await ingest.ingest_domain_knowledge())["active"] == "v1"
+    assert calls["reindex"] == 1
 
+
+@pytest.mark.asyncio
+async def test_ingest_never_writes_into_the_serving_collection(tmp_path, monkeypatch):
+    import app.ingest as ingest
+    from app.reindex import list_versions
+    from app.vectorstore import VectorStore
+
+    chunks = [
+        {"text": "House 10 - career", "metadata": {"type": "house", "house_number": 10}},
+        {"text": "Planet Saturn - discipline", "metadata": {"type": "planet", "planet_name": "Saturn"}},
+    ]
+    store = VectorStore(persist_dir=str(tmp_path), provider="local")
+    serving = store.collection
+    monkeypatch.setattr("app.reindex.settings.answer_store_enabled", False)
+    monkeypatch.setattr(ingest, "load_domain_jsons", lambda: [])
+    monkeypatch.setattr(ingest, "flatten_astrology_docs", lambda docs: list(chunks))
+    monkeypatch.setattr(ingest, "vector_store", store)
+
+    first = (await ingest.ingest_domain_knowledge())["active"]   # first build: creates and activates v1
+    second = (await ingest.ingest_domain_knowledge())["active"]
+
+    assert serving.count() == 0
+    assert list_versions(store) == [first, second] and store.active_name == second
+    assert store.client.get_collection(first).count() == store.collection.count() > 0
+
+
+
+def test_chunks_drop_empty_fields_and_keep_source_record():
+    import json
+    from app.utils_chunk import flatten_astrology_docs
+
+    planet = {"planet": "Sun", "summary": "", "positive_traits": ["Leader."], "negative_traits": []}
+    docs = [{
+        "source_file": "app/domain/planets_in_house.json",
+        "data": {"planets_in_house": {"house_number": 1, "planets": [planet, dict(planet)]}},
+    }]
+    chunks = flatten_astrology_docs(docs)
+
+    assert len(chunks) == 1   # identical content is emitted once
+    ch = chunks[0]
+    assert ch["text"] == "Planet Sun in House 1:\nPositive: Leader"
+    assert "Summary" not in ch["embed_text"] and "Negative" not in ch["embed_text"]
+    assert json.loads(ch["metadata"]["fields"]) == planet
+    assert ch["metadata"]["legacy_tokens"] > ch["metadata"]["embed_tokens"]
+
+
+def test_domain_chunks_have_no_placeholder_values():
+    from app.utils_chunk import flatten_astrology_docs, load_domain_jsons
+
+    chunks = flatten_astrology_docs(load_domain_jsons())
+    for ch in chunks:
+        for line in ch["text"].splitlines()[1:]:
+            assert line.split(": ", 1)[1].strip().lower() not in ("", "none", "n/a")
+
+
+@pytest.mark.asyncio
+async def test_upsert_embeds_embed_text_and_stores_context_text(tmp_path):
+    from app.vectorstore import VectorStore
+
+    store = VectorStore(persist_dir=str(tmp_path), provider="local")
+    embedded = []
+    provider = store.provider
+    original = provider.embed_many
+
+    async def spy(texts):
+        embedded.extend(texts)
+        return await original(texts)
+
+    provider.embed_many = spy
+    await store.upsert_chunks([{
+        "id": "c1", "text": "Planet Sun:\nDescription: Vitality", "embed_text": "Planet Sun. Vitality.",
+        "metadata": {"type": "planet", "planet_name": "Sun"},
+    }])
+
+    assert embedded == ["Planet Sun. Vitality."]
+    hits = await store.similarity_search("Sun", top_k=1)
+    assert hits[0]["text"] == "Planet Sun:\nDescription: Vitality"
+
+
+def test_planet_in_house_chunks_link_house_planet_and_lord():
+    from app.utils_chunk import flatten_astrology_docs, load_domain_jsons
+
+    chunks = flatten_astrology_docs(load_domain_jsons())
+    by_title = {ch["text"].split(":\n", 1)[0]: ch for ch in chunks}
+    ids = lambda *titles: ",".join(by_title[t]["id"] for t in titles)
+
+    house_1 = next(t for t in by_title if t.startswith("House 1 -"))
+    assert by_title["Planet Sun in House 1"]["metadata"]["related_ids"] == ids(house_1, "Planet Sun", "Planet Mars")
+    # Mars is the natural lord of house 1: linked once
+    assert by_title["Planet Mars in House 1"]["metadata"]["related_ids"] == ids(house_1, "Planet Mars")
+    assert by_title["Planet Ketu (South Node) in House 1"]["metadata"]["related_ids"].split(",")[1] == (
+        by_title["Planet Ketu"]["id"]
+    )
+    assert "related_ids" not in by_title["Planet Sun"]["metadata"]
+
+
+@pytest.mark.asyncio
+async def test_get_by_ids_returns_chunks_in_order_without_search(tmp_path):
+    from app.vectorstore import VectorStore
+
+    store = VectorStore(persist_dir=str(tmp_path), provider="local")
+    await store.upsert_chunks([
+        {"id": "a", "text": "Planet Sun", "metadata": {"type": "planet"}},
+        {"id": "b", "text": "House 1", "metadata": {"type": "house"}},
+    ])
+
+    out = await store.get_by_ids(["b", "missing", "a"])
+    assert [(c["id"], c["text"]) for c in out] == [("b", "House 1"), ("a", "Planet Sun")]
+    out[0]["score"] = 0.5
+    assert (await store.get_by_ids(["b"]))[0]["score"] == 0.0   # callers get copies of the cached chunk
+
+
+def test_field_sub_chunks_point_at_their_record():
+    from app.utils_chunk import field_chunks, flatten_astrology_docs, index_chunks, load_domain_jsons
+
+    chunks = flatten_astrology_docs(load_domain_jsons())
+    subs = field_chunks(chunks)
+    record_ids = {ch["id"] for ch in chunks}
+
+    assert all(ch["metadata"]["level"] == "record" for ch in chunks)
+    assert {s["metadata"]["parent_id"] for s in subs} == record_ids
+    assert not record_ids & {s["id"] for s in subs}
+    assert len(index_chunks(chunks)) == len(chunks) + len(subs)
+
+    sun = next(ch for ch in chunks if ch["text"].startswith("Planet Sun in House 1:"))
+    sun_subs = [s for s in subs if s["metadata"]["parent_id"] == sun["id"]]
+    assert [s["text"].split("\n", 1)[1] for s in sun_subs] == sun["text"].split("\n")[1:]
+    assert sun_subs[0]["metadata"]["planet_name"] == "Sun" and "fields" not in sun_subs[0]["metadata"]
+
+
+@pytest.mark.asyncio
+async def test_search_levels_keep_records_and_sub_chunks_apart(tmp_path):
+    from app.utils_chunk import index_chunks
+    from app.vectorstore import VectorStore
+
+    record = {"id": "sun", "text": "Planet Sun:\nDescription: Vitality\nGemstone: Ruby",
+              "metadata": {"type": "planet", "level": "record"}}
+    store = VectorStore(persist_dir=str(tmp_path), provider="local")
+    await store.upsert_chunks([record])
+    assert not store.has_field_chunks()
+    assert [r["id"] for r in await store.similarity_search("ruby", top_k=5)] == ["sun"]
+
+    await store.upsert_chunks(index_chunks([record]))
+    assert store.has_field_chunks()
+    assert [r["id"] for r in await store.similarity_search("ruby", top_k=5)] == ["sun"]
+    fields = await store.similarity_search("ruby", top_k=5, level="field")
+    assert {r["meta"]["field"] for r in fields} == {"Description", "Gemstone"}
@@ -1,5 +1,7 @@
 import os
 import importlib
+
+import numpy as np
 import pytest
 
 
@@ -78,7 +80,62 @@ async def test_generate_embedding_success(monkeypatch):
     monkeypatch.setattr(mo.httpx, "AsyncClient", _FakeAsyncClientEmbeddingOK)
 
     vec = await mo.generate_embedding("hello world")
-    assert isinstance(vec, list) and vec == [0.1, 0.2]
+    # a float list (proxy ignoring encoding_format) still decodes
+    assert vec.dtype == np.float32 and vec.tolist() == pytest.approx([0.1, 0.2])
+
+
+@pytest.mark.asyncio
+async def test_generate_embeddings_requests_and_decodes_base64(monkeypatch):
+    import base64
+    import app.models_openai as mo
+
+    rows = np.arange(6, dtype=np.float32).reshape(2, 3)
+    sent = {}
+
+    class _FakeAsyncClientBase64(_FakeAsyncClientEmbeddingOK):
+        async def post(self, url, headers=None, json=None):
+            sent.update(json)
+            data = [
+                {"index": i, "embedding": base64.b64encode(rows[i].tobytes()).decode("ascii")}
+                for i in (1, 0)   # out of order on purpose
+            ]
+            return _FakeResp(status_code=200, json_data={"data": data})
+
+    monkeypatch.setattr(mo.httpx, "AsyncClient", _FakeAsyncClientBase64)
+
+    out = await mo.generate_embeddings(["a", "b"])
+    assert sent["encoding_format"] == "base64"
+    assert out.dtype == np.float32 and np.array_equal(out, rows)
+
+    single = await mo.generate_embedding("a")
+    assert single.base is not None   # a view over the decoded bytes, not a copy
+
+
+@pytest.mark.asyncio
+async def test_generate_answer_keeps_static_prefix_and_records_cached_tokens(monkeypatch):
+    import app.models_openai as mo
+    from app.metrics import metrics
+
+    metrics.reset()
+    sent = []
+
+    class _FakeAsyncClientChatOK(_FakeAsyncClientEmbeddingOK):
+        async def post(self, url, headers=None, json=None):
+            sent.append(json["messages"])
+            usage = {"prompt_tokens": 1300, "completion_tokens": 40, "prompt_tokens_details": {"cached_tokens": 1152}}
+            return _FakeResp(status_code=200, json_data={"choices": [{"message": {"content": " ok "}}], "usage": usage})
+
+    monkeypatch.setattr(mo.httpx, "AsyncClient", _FakeAsyncClientChatOK)
+
+    with mo.collect_usage() as usage:
+        assert await mo.generate_answer("sys", "q1", "ctx1", model="m") == "ok"
+        await mo.generate_answer("sys", "q2", "ctx2", model="m")
+
+    assert sent[0][0] == sent[1][0] == {"role": "system", "content": "sys"}
+    assert sent[0][1]["content"] == "CONTEXT:\nctx1\n\nUSER QUESTION:\nq1"
+    assert usage == {"prompt_tokens": 2600, "cached_tokens": 2304, "completion_tokens": 80}
+    assert metrics.get_counter("rag_prompt_cached_tokens_total", model="m") == 2304
+    assert metrics.get_counter("rag_prompt_tokens_total", model="m") == 2600
 
 
 def test_base_url_guard_appends_v1(monkeypatch):
@@ -0,0 +1,76 @@
+import asyncio
+import json
+import os
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+pytest.importorskip("pyinstrument")   # optional dependency; profiling is off without it
+
+
+def _app():
+    from app.deadline import Deadline
+    from app.profiling import ProfilingMiddleware
+
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware)
+
+    @app.get("/work")
+    async def work():
+        deadline = Deadline(5)
+        await deadline.run(asyncio.sleep(0.02), "search")
+        return {"ok": True}
+
+    return app
+
+
+@pytest.fixture
+def profiling_on(tmp_path, monkeypatch):
+    import app.profiling as profiling
+
+    monkeypatch.setattr(profiling.settings, "profiling_enabled", True)
+    monkeypatch.setattr(profiling.settings, "profile_sample_rate", 0.0)
+    monkeypatch.setattr(profiling.settings, "admin_token", "secret")
+    monkeypatch.setattr(profiling.settings, "profile_dir", str(tmp_path))
+    monkeypatch.setattr(profiling.settings, "profile_max_files", 2)
+    return tmp_path
+
+
+def test_admin_header_profiles_request_with_stage_timings(profiling_on):
+    client = TestClient(_app())
+    res = client.get("/work", headers={"X-Profile": "secret", "X-Request-Id": "req-1"})
+
+    assert res.status_code == 200 and res.headers["x-profile-id"] == "req-1"
+    files = sorted(os.listdir(profiling_on))
+    assert [f.rsplit(".", 1)[1] for f in files] == ["html", "json"]
+    meta = json.loads((profiling_on / files[1]).read_text())
+    assert meta["request_id"] == "req-1" and meta["status"] == 200
+    assert meta["stages_s"]["search"] >= 0.02
+
+
+def test_unprofiled_requests_write_nothing(profiling_on):
+    client = TestClient(_app())
+    assert "x-profile-id" not in client.get("/work").headers
+    assert "x-profile-id" not in client.get("/work", headers={"X-Profile": "wrong"}).headers
+    assert os.listdir(profiling_on) == []
+
+
+def test_retention_keeps_newest_profiles(profiling_on):
+    client = TestClient(_app())
+    for i in range(4):
+        client.get("/work", headers={"X-Profile": "secret", "X-Request-Id": f"req-{i}"})
+    stems = sorted({f.rsplit(".", 1)[0] for f in os.listdir(profiling_on)})
+    assert [s.rsplit("_", 1)[1] for s in stems] == ["req-2", "req-3"]
+
+
+@pytest.mark.parametrize("raw_id", ["a/b", "../x", "x" * 65])
+def test_unsafe_request_id_is_replaced(profiling_on, raw_id):
+    client = TestClient(_app())
+    res = client.get("/work", headers={"X-Profile": "secret", "X-Request-Id": raw_id})
+
+    profile_id = res.headers["x-profile-id"]
+    assert profile_id != raw_id and len(profile_id) == 32
+    files = sorted(os.listdir(profiling_on))
+    assert [f.rsplit(".", 1)[0].rsplit("_", 1)[1] for f in files] == [profile_id, profile_id]
+    assert not os.path.exists(profiling_on.parent / "x.html")
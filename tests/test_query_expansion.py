@@ -0,0 +1,64 @@
+import pytest
+
+from app.query_expansion import expand_query
+from app.retrieval import fuse_ranked
+
+
+def test_vague_question_gets_house_and_synonym_rewrites():
+    variants = expand_query("career problems in my chart", 3)
+    assert variants[0] == "career problems in my chart"
+    assert len(variants) == 4
+    assert any(v.startswith("House 10 -") for v in variants)
+    assert any(v.startswith("House 6 -") for v in variants)
+    assert any("profession" in v for v in variants)
+
+
+def test_specific_question_is_not_expanded():
+    assert expand_query("Sun in 1st house", 3) == ["Sun in 1st house"]
+    assert expand_query("career problems", 0) == ["career problems"]
+
+
+def test_named_house_gets_no_house_rewrites():
+    variants = expand_query("money matters of the 2nd house", 3)
+    assert len(variants) > 1
+    assert not any(v.startswith("House ") for v in variants[1:])
+
+
+def test_fuse_ranked_prefers_chunks_found_by_several_variants():
+    a = [{"id": "x", "score": 0.3}, {"id": "y", "score": 0.2}]
+    b = [{"id": "y", "score": 0.1}, {"id": "z", "score": 0.4}]
+    fused = fuse_ranked([a, b], limit=2)
+    assert [r["id"] for r in fused] == ["y", "x"]
+    assert fused[0]["score"] == 0.1   # best distance across variants
+    assert fused[0]["rrf_score"] > fused[1]["rrf_score"]
+
+
+@pytest.mark.asyncio
+async def test_retrieve_candidates_embeds_and_searches_once(monkeypatch):
+    import app.rag_pipeline as rp
+
+    monkeypatch.setattr(rp.settings, "query_expansion_enabled", True)
+    monkeypatch.setattr(rp.settings, "query_expansion_max", 2)
+    calls = {"embed": [], "search": []}
+
+    async def fake_embed_many(texts):
+        calls["embed"].append(list(texts))
+        return [[float(i)] for i in range(len(texts))]
+
+    async def fake_search_many(query_embeddings, top_k):
+        calls["search"].append(len(query_embeddings))
+        return [[{"id": f"c{i}", "score": 0.1 * i, "text": "", "meta": {}}] for i in range(len(query_embeddings))]
+
+    async def no_single_search(*args, **kwargs):
+        raise AssertionError("single-query search used with expansion on")
+
+    monkeypatch.setattr(rp.vector_store, "embed_many", fake_embed_many)
+    monkeypatch.setattr(rp.vector_store, "similarity_search_many", fake_search_many)
+    monkeypatch.setattr(rp.vector_store, "similarity_search", no_single_search)
+
+    results = await rp.retrieve_candidates("career problems", query_embedding=[9.0])
+
+    # the original question's embedding is reused; only the rewrites are embedded
+    assert len(calls["embed"]) == 1 and len(calls["embed"][0]) == 2
+    assert calls["search"] == [3]
+    assert [r["id"] for r in results] == ["c0", "c1", "c2"]
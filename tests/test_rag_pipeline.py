@@ -22,7 +22,7 @@ async def test_run_rag_builds_context_and_returns_preview(monkeypatch):
     import app.rag_pipeline as rp
 
     # Patch vector_store.similarity_search
-    async def fake_similarity_search(query: str, top_k: int):
+    async def fake_similarity_search(query: str, top_k: int, query_embedding=None):
         return fake_results
 
     monkeypatch.setattr(rp.vector_store, "similarity_search", fake_similarity_search)
@@ -30,7 +30,7 @@ async def test_run_rag_builds_context_and_returns_preview(monkeypatch):
     # Capture context passed to OpenAI
     captured = {}
 
-    async def fake_generate_answer(system_prompt: str, user_question: str, context: str) -> str:
+    async def fake_generate_answer(system_prompt: str, user_question: str, context: str, model=None, max_tokens=600, timeout=None) -> str:
         captured["system_prompt"] = system_prompt
         captured["user_question"] = user_question
         captured["context"] = context
@@ -39,12 +39,58 @@ async def test_run_rag_builds_context_and_returns_preview(monkeypatch):
     monkeypatch.setattr(rp, "generate_answer", fake_generate_answer)
 
     # Act
-    answer, preview = await rp.run_rag("Explain Sun in 1st house")
+    answer, preview, k = await rp.run_rag("Explain Sun in 1st house")
 
     # Assert
     assert answer == "final-answer"
     assert isinstance(preview, list) and len(preview) == len(fake_results)
+    assert k == len(fake_results)
     # Ensure both chunks made it into the assembled context
     assert "Planet Sun in the 1st House" in captured.get("context", "")
     assert "House 1 relates to identity" in captured.get("context", "")
 
+
+
+@pytest.mark.asyncio
+async def test_run_rag_k_counts_selected_chunks_not_neighbours(monkeypatch):
+    import app.rag_pipeline as rp
+
+    selected = [{"id": "1", "score": 0.1, "text": "Planet Sun in House 1", "meta": {"type": "planet_in_house"}}]
+    neighbour = {"id": "h1", "score": 0.5, "text": "House 1", "meta": {"type": "house"}}
+
+    async def fake_similarity_search(query: str, top_k: int, query_embedding=None):
+        return selected
+
+    async def fake_add_neighbours(results):
+        return results + [neighbour]
+
+    async def fake_generate_answer(system_prompt, user_question, context, model=None, max_tokens=600, timeout=None):
+        return "final-answer"
+
+    monkeypatch.setattr(rp.vector_store, "similarity_search", fake_similarity_search)
+    monkeypatch.setattr(rp, "add_neighbours", fake_add_neighbours)
+    monkeypatch.setattr(rp, "generate_answer", fake_generate_answer)
+
+    _, preview, k = await rp.run_rag("Explain Sun in 1st house")
+    assert [p.id for p in preview] == ["1", "h1"]
+    assert k == 1
+
+
+def test_context_is_filled_by_relevance_and_rendered_by_tier_then_id(monkeypatch):
+    import app.rag_pipeline as rp
+
+    def chunk(cid, score):
+        return {"id": cid, "score": score, "text": f"chunk {cid}", "meta": {}}
+
+    monkeypatch.setattr(rp.settings, "context_tier_width", 0.1)
+    results = [chunk("b", 0.11), chunk("a", 0.14), chunk("c", 0.05), chunk("d", 0.35)]
+    context, used = rp.build_context(results)
+    assert [r["id"] for r in used] == ["b", "a", "c", "d"]
+    assert [line for line in context.splitlines() if line.startswith("chunk")] == [
+        "chunk c", "chunk a", "chunk b", "chunk d"
+    ]
+    # the same chunks in another rank order render the same bytes
+    assert rp.build_context([results[1], results[0], results[3], results[2]])[0] == context
+
+    monkeypatch.setattr(rp.settings, "max_context_chars", 2 * len("[source]\nchunk b\n"))
+    assert [r["id"] for r in rp.build_context(results)[1]] == ["b", "a"]   # budget still goes to the best first
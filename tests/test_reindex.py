@@ -0,0 +1,152 @@
+import asyncio
+
+import pytest
+
+
+CHUNKS = [
+    {"text": "House 10 - career, reputation, status", "metadata": {"type": "house", "house_number": 10}},
+    {"text": "House 4 - home, mother, property", "metadata": {"type": "house", "house_number": 4}},
+    {"text": "Planet Saturn - discipline, duty, time", "metadata": {"type": "planet", "planet_name": "Saturn"}},
+]
+
+
+@pytest.fixture
+def live_store(tmp_path, monkeypatch):
+    import app.reindex as reindex
+    from app.vectorstore import VectorStore
+
+    monkeypatch.setattr(reindex.settings, "answer_store_enabled", False)
+    monkeypatch.setattr(reindex, "load_domain_jsons", lambda: [])
+    monkeypatch.setattr(reindex, "flatten_astrology_docs", lambda docs: list(CHUNKS))
+    store = VectorStore(persist_dir=str(tmp_path), provider="local")
+    return store
+
+
+@pytest.mark.asyncio
+async def test_reindex_builds_validates_and_switches(live_store, tmp_path):
+    from app.reindex import list_versions, reindex
+    from app.vectorstore import VectorStore
+
+    base = live_store.active_name
+    # queries keep running against the live collection while the new one is built
+    task = asyncio.create_task(reindex(live_store))
+    while not task.done():
+        await live_store.similarity_search("career", top_k=1)
+        await asyncio.sleep(0)
+    result = await task
+
+    assert result["previous"] == base and result["active"] in list_versions(live_store)
+    assert live_store.active_name == result["active"]
+    hits = await live_store.similarity_search("career and reputation", top_k=1)
+    assert hits[0]["meta"]["house_number"] == 10
+
+    # another worker on the same persist dir follows the pointer
+    other = VectorStore(persist_dir=str(tmp_path), provider="local")
+    assert other.active_name == result["active"]
+
+
+@pytest.mark.asyncio
+async def test_failed_validation_keeps_serving_old_collection(live_store, monkeypatch):
+    import app.reindex as reindex
+
+    base = live_store.active_name
+
+    async def bad_validate(store, name, chunks=None):
+        raise RuntimeError("smoke failed")
+
+    monkeypatch.setattr(reindex, "validate_version", bad_validate)
+    with pytest.raises(RuntimeError):
+        await reindex.reindex(live_store)
+    assert live_store.active_name == base
+    assert reindex.list_versions(live_store) == []
+
+
+@pytest.mark.asyncio
+async def test_rollback_and_garbage_collection(live_store):
+    from app.reindex import garbage_collect, list_versions, reindex, rollback
+
+    base = live_store.active_name
+    first = (await reindex(live_store))["active"]
+    second = (await reindex(live_store))["active"]
+    third = (await reindex(live_store))["active"]
+
+    assert await rollback(live_store) == second
+    assert live_store.active_name == second
+
+    # active = second; history = [third, first, base]; keep 1 -> third survives, first goes
+    deleted = await garbage_collect(live_store, keep=1)
+    assert deleted == [first]
+    assert set(list_versions(live_store)) == {second, third}
+    # the unversioned base collection is never deleted
+    assert base in {c.name for c in live_store.client.list_collections()}
+
+
+def test_admin_routes_require_token(monkeypatch):
+    from fastapi.testclient import TestClient
+    import app.router_admin as router_admin
+    from app.main import app
+
+    client = TestClient(app)
+    monkeypatch.setattr(router_admin.settings, "admin_token", "")
+    assert client.get("/admin/reindex").status_code == 403
+
+    monkeypatch.setattr(router_admin.settings, "admin_token", "secret")
+    assert client.get("/admin/reindex", headers={"X-Admin-Token": "wrong"}).status_code == 401
+    assert client.get("/admin/reindex").status_code == 401
+    res = client.get("/admin/reindex", headers={"X-Admin-Token": "secret"})
+    assert res.status_code == 200 and res.json()["state"] == "idle"
+
+
+@pytest.mark.asyncio
+async def test_build_embeds_local_batches_off_the_event_loop(live_store, monkeypatch):
+    import threading
+    from app.embeddings import LocalHashEmbeddingProvider
+    from app.reindex import build_version
+
+    threads = set()
+    embed_many_sync = LocalHashEmbeddingProvider.embed_many_sync
+
+    def tracking(self, texts):
+        threads.add(threading.current_thread())
+        return embed_many_sync(self, texts)
+
+    monkeypatch.setattr(LocalHashEmbeddingProvider, "embed_many_sync", tracking)
+    await build_version(live_store, CHUNKS)
+    assert threads and threading.main_thread() not in threads
+
+
+@pytest.mark.asyncio
+async def test_failed_build_drops_the_half_filled_version(live_store, monkeypatch):
+    import app.reindex as reindex
+
+    calls = {"n": 0}
+    embed_batch = reindex.embed_batch
+
+    async def flaky(provider, texts):
+        calls["n"] += 1
+        if calls["n"] == 2:
+            raise RuntimeError("embedding API down")
+        return await embed_batch(provider, texts)
+
+    monkeypatch.setattr(reindex.settings, "reindex_batch_size", 1)
+    monkeypatch.setattr(reindex, "embed_batch", flaky)
+    with pytest.raises(RuntimeError):
+        await reindex.build_version(live_store, CHUNKS)
+    assert reindex.list_versions(live_store) == []
+
+
+@pytest.mark.asyncio
+async def test_negative_keep_is_rejected(live_store, monkeypatch):
+    from fastapi.testclient import TestClient
+    import app.router_admin as router_admin
+    from app.main import app
+    from app.reindex import _main, garbage_collect
+
+    with pytest.raises(ValueError):
+        await garbage_collect(live_store, keep=-1)
+    with pytest.raises(SystemExit):
+        await _main(["--gc", "--keep", "-1"])
+
+    monkeypatch.setattr(router_admin.settings, "admin_token", "secret")
+    res = TestClient(app).post("/admin/reindex/gc?keep=-1", headers={"X-Admin-Token": "secret"})
+    assert res.status_code == 422
@@ -0,0 +1,175 @@
+import pytest
+
+
+def _r(id_, score, meta, text=""):
+    return {"id": id_, "score": score, "text": text, "meta": meta}
+
+
+def test_rerank_prefers_metadata_agreement():
+    from app.retrieval import rerank
+
+    candidates = [
+        _r("moon-1", 0.20, {"type": "planet_in_house", "house_number": 1, "planet_name": "Moon"}),
+        _r("house-1", 0.22, {"type": "house", "house_number": 1}),
+        _r("sun", 0.25, {"type": "planet", "planet_name": "Sun"}),
+        _r("sun-1", 0.30, {"type": "planet_in_house", "house_number": 1, "planet_name": "Sun"}),
+    ]
+    out = rerank("What does Sun in the 1st house mean?", candidates, keep=3)
+
+    assert [r["id"] for r in out][0] == "sun-1"
+    assert "moon-1" not in [r["id"] for r in out]
+    assert all("rerank_score" in r for r in out)
+
+
+def test_rerank_matches_nodes_by_short_name():
+    from app.retrieval import rerank
+
+    candidates = [
+        _r("ketu", 0.20, {"type": "planet", "planet_name": "Ketu"}),
+        _r("ketu-1", 0.30, {"type": "planet_in_house", "house_number": 1, "planet_name": "Ketu (South Node)"}),
+        _r("rahu-1", 0.25, {"type": "planet_in_house", "house_number": 1, "planet_name": "Rahu (North Node)"}),
+    ]
+    assert rerank("What does Ketu in the 1st house mean?", candidates, keep=1)[0]["id"] == "ketu-1"
+    assert rerank("What does Rahu in the 1st house mean?", candidates, keep=1)[0]["id"] == "rahu-1"
+
+
+def test_rerank_uses_lexical_overlap_without_entities():
+    from app.retrieval import rerank
+
+    candidates = [
+        _r("a", 0.30, {"type": "house", "house_number": 4}, "Home, mother and property."),
+        _r("b", 0.31, {"type": "house", "house_number": 10}, "Career, reputation and public status."),
+    ]
+    out = rerank("career and reputation", candidates, keep=1)
+    assert out[0]["id"] == "b"
+
+
+@pytest.mark.asyncio
+async def test_retrieve_overfetches_and_keeps_best(monkeypatch):
+    import app.rag_pipeline as rp
+
+    seen = {}
+
+    async def fake_similarity_search(query, top_k, query_embedding=None):
+        seen["top_k"] = top_k
+        return [_r(str(i), 0.1 + i / 100, {"type": "house", "house_number": i + 1}) for i in range(top_k)]
+
+    monkeypatch.setattr(rp.vector_store, "similarity_search", fake_similarity_search)
+    monkeypatch.setattr(rp.settings, "adaptive_k_enabled", False)
+    out = await rp.retrieve("What does the 7th house represent?")
+
+    assert seen["top_k"] == rp.settings.top_k * rp.settings.rerank_overfetch
+    assert len(out) == rp.settings.rerank_keep
+    assert out[0]["meta"]["house_number"] == 7
+
+
+def test_adaptive_k_cuts_at_distance_jump_and_threshold():
+    from app.retrieval import adaptive_k
+
+    standout = [_r(str(i), d, {}) for i, d in enumerate([0.20, 0.45, 0.46, 0.47, 0.48, 0.49])]
+    flat = [_r(str(i), 0.30 + i / 100, {}) for i in range(20)]
+    far = [_r(str(i), d, {}) for i, d in enumerate([0.50, 0.51, 0.95, 0.96])]
+
+    assert adaptive_k(standout, min_k=1, max_k=5, max_distance=0.9, jump=2.0) == 1
+    assert adaptive_k(flat, min_k=1, max_k=5, max_distance=0.9, jump=2.0) == 5
+    assert adaptive_k(far, min_k=1, max_k=5, max_distance=0.9, jump=10.0) == 2
+    assert adaptive_k(far, min_k=3, max_k=5, max_distance=0.1, jump=2.0) == 3
+    assert adaptive_k([], min_k=1, max_k=5, max_distance=0.9, jump=2.0) == 0
+
+
+def test_select_chunks_depth_overrides(monkeypatch):
+    import app.rag_pipeline as rp
+
+    candidates = [_r(str(i), 0.30 + i / 100, {"type": "house", "house_number": i + 1}) for i in range(20)]
+    monkeypatch.setattr(rp.settings, "adaptive_k_enabled", True)
+
+    assert len(rp.select_chunks("houses", candidates)) == rp.settings.adaptive_max_k
+    assert len(rp.select_chunks("houses", candidates, top_k=2)) == 2
+    # a tight threshold cuts everything but the min_k best
+    assert len(rp.select_chunks("houses", candidates, max_distance=0.305)) == rp.settings.adaptive_min_k
+
+
+@pytest.mark.asyncio
+async def test_retrieve_adds_linked_chunks_by_id(monkeypatch):
+    import app.rag_pipeline as rp
+
+    candidates = [
+        _r("sun-1", 0.10, {"type": "planet_in_house", "house_number": 1, "planet_name": "Sun",
+                           "related_ids": "house-1,sun,mars"}),
+        _r("house-1", 0.40, {"type": "house", "house_number": 1}),
+    ]
+    looked_up = []
+
+    async def fake_similarity_search(query, top_k, query_embedding=None):
+        return candidates
+
+    async def fake_get_by_ids(ids):
+        looked_up.extend(ids)
+        return [_r(i, 0.0, {"type": "planet"}) for i in ids]
+
+    monkeypatch.setattr(rp.vector_store, "similarity_search", fake_similarity_search)
+    monkeypatch.setattr(rp.vector_store, "get_by_ids", fake_get_by_ids)
+    monkeypatch.setattr(rp.settings, "graph_expansion_max", 3)
+
+    out = await rp.retrieve("What does Sun in the 1st house mean?", top_k=2)
+    assert [r["id"] for r in out] == ["sun-1", "house-1", "sun", "mars"]
+    assert looked_up == ["sun", "mars"]   # house-1 was already selected
+    assert out[-1]["score"] == 0.10       # scored like the chunk that links it
+
+    monkeypatch.setattr(rp.settings, "graph_expansion_enabled", False)
+    assert [r["id"] for r in await rp.retrieve("Sun in the 1st house", top_k=2)] == ["sun-1", "house-1"]
+
+
+def _field(parent_id: str, label: str, index: int, score: float):
+    meta = {"level": "field", "parent_id": parent_id, "field": label, "field_index": index}
+    return {"id": f"{parent_id}/{label}", "score": score, "text": f"{parent_id}:\n{label}: x", "meta": meta}
+
+
+def test_group_by_parent_returns_records_or_matched_fields():
+    from app.retrieval import group_by_parent
+
+    parents = {
+        "sun": {"id": "sun", "score": 0.0, "text": "Planet Sun:\nDescription: d\nGemstone: Ruby\nNotes: n",
+                "meta": {"type": "planet"}},
+        "moon": {"id": "moon", "score": 0.0, "text": "Planet Moon:\nGemstone: Pearl", "meta": {"type": "planet"}},
+    }
+    subs = [_field("sun", "Notes", 2, 0.2), _field("moon", "Gemstone", 0, 0.3),
+            _field("sun", "Gemstone", 1, 0.4), _field("gone", "Notes", 0, 0.1)]
+
+    whole = group_by_parent(subs, parents, fields_only=False)
+    assert [(r["id"], r["score"]) for r in whole] == [("sun", 0.2), ("moon", 0.3)]
+    assert whole[0]["text"] == parents["sun"]["text"]
+    assert whole[0]["meta"]["matched_fields"] == "Gemstone,Notes"
+
+    fields = group_by_parent(subs, parents, fields_only=True)
+    assert fields[0]["text"] == "Planet Sun:\nGemstone: x\nNotes: x"   # title + matched fields, record order
+    assert parents["sun"]["meta"] == {"type": "planet"}                # parents are not modified
+
+
+@pytest.mark.asyncio
+async def test_parent_granularity_searches_sub_chunks_and_returns_records(monkeypatch):
+    import app.rag_pipeline as rp
+
+    searched = {}
+
+    async def fake_similarity_search(query, top_k, query_embedding=None, level="record"):
+        searched.update(top_k=top_k, level=level)
+        return [_field("sun", "Gemstone", 1, 0.1), _field("sun", "Notes", 2, 0.2), _field("moon", "Notes", 0, 0.3)]
+
+    async def fake_get_by_ids(ids):
+        return [{"id": i, "score": 0.0, "text": f"Planet {i}:\nGemstone: g\nNotes: n", "meta": {}} for i in ids]
+
+    monkeypatch.setattr(rp.vector_store, "similarity_search", fake_similarity_search)
+    monkeypatch.setattr(rp.vector_store, "get_by_ids", fake_get_by_ids)
+    monkeypatch.setattr(rp.vector_store, "has_field_chunks", lambda: True)
+    monkeypatch.setattr(rp.settings, "rerank_enabled", False)
+    monkeypatch.setattr(rp.settings, "retrieval_granularity", "parent")
+
+    out = await rp.retrieve_candidates("Which gemstone for the Sun?")
+    assert searched == {"top_k": rp.FIELD_HITS_PER_RECORD * max(rp.settings.top_k, rp.settings.adaptive_max_k),
+                        "level": "field"}
+    assert [(r["id"], r["score"]) for r in out] == [("sun", 0.1), ("moon", 0.3)]
+
+    monkeypatch.setattr(rp.settings, "retrieval_granularity", "record")
+    await rp.retrieve_candidates("Which gemstone for the Sun?")
+    assert searched["level"] == "record"
@@ -0,0 +1,60 @@
+import pytest
+
+
+def _r(meta, score=0.2):
+    return {"id": "x", "score": score, "text": "...", "meta": meta}
+
+
+def test_classify_lookup_standard_complex():
+    from app.routing import classify_query, ROUTE_LOOKUP, ROUTE_STANDARD, ROUTE_COMPLEX
+
+    sun_1 = [_r({"type": "planet_in_house", "house_number": 1, "planet_name": "Sun"})]
+    assert classify_query("Sun in 1st house?", sun_1) == ROUTE_LOOKUP
+    # Same question but the top chunk is about something else -> not a direct lookup
+    assert classify_query("Sun in 1st house?", [_r({"type": "house", "house_number": 4})]) == ROUTE_STANDARD
+    assert classify_query("How do I read my chart?", sun_1) == ROUTE_STANDARD
+    assert classify_query("Compare the 6th and 8th houses", sun_1) == ROUTE_COMPLEX
+    assert classify_query("Mars and Venus together in my chart", sun_1) == ROUTE_COMPLEX
+
+
+def test_node_placement_counts_as_lookup():
+    from app.routing import classify_query, ROUTE_LOOKUP
+
+    ketu_1 = [_r({"type": "planet_in_house", "house_number": 1, "planet_name": "Ketu (South Node)"})]
+    assert classify_query("Ketu in 1st house?", ketu_1) == ROUTE_LOOKUP
+
+
+def test_routing_disabled_uses_standard_tier(monkeypatch):
+    import app.routing as routing
+
+    monkeypatch.setattr(routing.settings, "routing_enabled", False)
+    route = routing.choose_route("Compare the 6th and 8th houses", [])
+    assert route.name == routing.ROUTE_STANDARD
+    assert route.max_tokens == routing.settings.route_standard_max_tokens
+
+
+@pytest.mark.asyncio
+async def test_run_rag_uses_route_and_records_metric(monkeypatch):
+    import app.rag_pipeline as rp
+    from app.metrics import metrics
+
+    async def fake_similarity_search(query, top_k, query_embedding=None):
+        return [_r({"type": "planet_in_house", "house_number": 1, "planet_name": "Sun"})]
+
+    captured = {}
+
+    async def fake_generate_answer(system_prompt, user_question, context, model=None, max_tokens=600, timeout=None):
+        captured["model"] = model
+        captured["max_tokens"] = max_tokens
+        return "ok"
+
+    monkeypatch.setattr(rp.vector_store, "similarity_search", fake_similarity_search)
+    monkeypatch.setattr(rp, "generate_answer", fake_generate_answer)
+    before = metrics.get_counter("rag_route_total", route="lookup")
+
+    await rp.run_rag("Sun in 1st house?")
+
+    assert captured["model"] == rp.settings.route_lookup_model
+    assert captured["max_tokens"] == rp.settings.route_lookup_max_tokens
+    assert metrics.get_counter("rag_route_total", route="lookup") == before + 1
+    assert "rag_route_total" in metrics.render_prometheus()
@@ -0,0 +1,100 @@
+import pytest
+from fastapi.testclient import TestClient
+
+
+def _r(id_, meta, score=0.2, text="..."):
+    return {"id": id_, "score": score, "text": text, "meta": meta}
+
+
+def test_session_store_ttl_and_lru():
+    from app.sessions import SessionStore
+
+    now = [0.0]
+    store = SessionStore(max_sessions=2, ttl_seconds=10, clock=lambda: now[0])
+    a = store.create()
+    b = store.create()
+    assert store.get(a.id) is a          # a becomes most recently used
+    c = store.create()                   # evicts b (LRU)
+    assert store.get(b.id) is None and len(store) == 2
+
+    now[0] = 11.0
+    assert store.get(c.id) is None       # idle past TTL
+    assert store.get_or_create(a.id).id != a.id
+
+
+def test_resolve_followup_carries_previous_house():
+    from app.sessions import resolve_followup
+
+    prev = {"planets": ["Sun"], "houses": [1], "intents": []}
+    q, ents, carried = resolve_followup("and what about Saturn there?", prev)
+    assert carried and ents["planets"] == ["Saturn"] and ents["houses"] == [1]
+    assert "house 1" in q
+
+    # A fresh, fully specified question is left alone
+    _, ents, carried = resolve_followup("What does the 7th house represent?", prev)
+    assert not carried and ents["houses"] == [7]
+
+
+def test_covering_chunks_match_nodes_by_short_name():
+    from app.sessions import SessionStore
+
+    session = SessionStore(10, 60).create()
+    ketu_1 = _r("ketu-1", {"type": "planet_in_house", "house_number": 1, "planet_name": "Ketu (South Node)"})
+    rahu = _r("rahu", {"type": "planet", "planet_name": "Rahu (North Node)"})
+    session.remember_chunks([ketu_1, rahu])
+
+    assert [r["id"] for r in session.covering_chunks({"planets": ["Ketu"], "houses": [1]})] == ["ketu-1"]
+    assert [r["id"] for r in session.covering_chunks({"planets": ["Rahu"], "houses": []})] == ["rahu"]
+
+
+@pytest.mark.asyncio
+async def test_followup_reuses_session_chunks_and_bounds_prompt(monkeypatch):
+    import app.rag_pipeline as rp
+    from app.sessions import SessionStore
+
+    monkeypatch.setattr(rp.settings, "answer_store_enabled", False)
+    calls = {"search": 0}
+    contexts = []
+
+    async def fake_similarity_search(query, top_k, query_embedding=None):
+        calls["search"] += 1
+        return [
+            _r("sun-1", {"type": "planet_in_house", "house_number": 1, "planet_name": "Sun"}),
+            _r("sat-1", {"type": "planet_in_house", "house_number": 1, "planet_name": "Saturn"}),
+            _r("h-1", {"type": "house", "house_number": 1}),
+        ]
+
+    async def fake_generate_answer(system_prompt, user_question, context, model=None, max_tokens=600, timeout=None):
+        contexts.append(context)
+        return "An answer sentence. " + "More detail. " * 50
+
+    monkeypatch.setattr(rp.vector_store, "similarity_search", fake_similarity_search)
+    monkeypatch.setattr(rp, "generate_answer", fake_generate_answer)
+
+    session = SessionStore(10, 60).create()
+    await rp.run_rag_session(session, "What does Sun in the 1st house mean?")
+    _, preview, _ = await rp.run_rag_session(session, "and what about Saturn there?")
+
+    assert calls["search"] == 1
+    assert preview[0].id == "sat-1"
+    assert "[conversation so far]" in contexts[1]
+
+    for _ in range(20):
+        await rp.run_rag_session(session, "and the Sun there?")
+    limit = rp.settings.max_context_chars + rp.settings.session_summary_chars + 64
+    assert len(contexts[-1]) <= limit
+
+
+def test_session_endpoint_returns_session_id(monkeypatch):
+    import app.router_chat as router_chat
+
+    async def fake_run_rag_session(session, query, deadline=None, top_k=None, max_distance=None):
+        return "answer", [], 0
+
+    monkeypatch.setattr(router_chat, "run_rag_session", fake_run_rag_session)
+    from app.main import app
+
+    client = TestClient(app)
+    first = client.post("/chat/session", json={"query": "Sun in 1st?"}).json()
+    second = client.post("/chat/session", json={"query": "and Saturn?", "session_id": first["session_id"]}).json()
+    assert first["session_id"] == second["session_id"]
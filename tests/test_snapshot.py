@@ -0,0 +1,77 @@
+import json
+
+import numpy as np
+import pytest
+import pytest_asyncio
+
+
+CHUNKS = [
+    {"text": "House 10 - career, reputation, status", "metadata": {"type": "house", "house_number": 10}},
+    {"text": "House 4 - home, mother, property", "metadata": {"type": "house", "house_number": 4}},
+    {"text": "Planet Saturn - discipline, duty, time", "metadata": {"type": "planet", "planet_name": "Saturn"}},
+]
+
+
+@pytest_asyncio.fixture
+async def snapshot_file(tmp_path):
+    from app.snapshot import export_snapshot
+    from app.vectorstore import VectorStore
+
+    source = VectorStore(persist_dir=str(tmp_path / "source"), provider="local")
+    await source.upsert_chunks(CHUNKS)
+    path = str(tmp_path / "index.npz")
+    export_snapshot(path, source)
+    return path
+
+
+@pytest.mark.asyncio
+async def test_import_restores_collection_without_embedding_documents(snapshot_file, tmp_path, monkeypatch):
+    from app.snapshot import import_snapshot, read_snapshot
+    from app.vectorstore import VectorStore
+
+    manifest = read_snapshot(snapshot_file)["manifest"]
+    assert manifest["count"] == 3 and manifest["embedding_provider"] == "local"
+
+    target = VectorStore(persist_dir=str(tmp_path / "target"), provider="openai")
+
+    async def no_embedding(texts):
+        raise AssertionError("import must not embed")
+
+    monkeypatch.setattr(target.provider, "embed_many", no_embedding)
+    result = import_snapshot(snapshot_file, target)
+
+    # the imported collection keeps the snapshot's embedding space
+    assert target.active_name == result["active"]
+    assert target.provider.name == "local"
+    hits = await target.similarity_search("career and reputation", top_k=1)
+    assert hits[0]["meta"]["house_number"] == 10
+
+
+@pytest.mark.asyncio
+async def test_corrupted_snapshot_is_refused(snapshot_file):
+    from app.snapshot import read_snapshot
+
+    with np.load(snapshot_file, allow_pickle=False) as data:
+        arrays = {k: data[k] for k in data.files}
+    arrays["embeddings"] = arrays["embeddings"] + 1.0
+    np.savez_compressed(snapshot_file, **arrays)
+
+    with pytest.raises(RuntimeError, match="checksum"):
+        read_snapshot(snapshot_file)
+
+
+@pytest.mark.asyncio
+async def test_startup_loads_snapshot_only_into_empty_index(snapshot_file, tmp_path, monkeypatch):
+    import app.snapshot as snapshot
+    from app.vectorstore import VectorStore
+
+    monkeypatch.setattr(snapshot.settings, "snapshot_path", snapshot_file)
+    monkeypatch.setattr(snapshot.settings, "snapshot_load_on_startup", True)
+    store = VectorStore(persist_dir=str(tmp_path / "fresh"), provider="local")
+
+    loaded = await snapshot.load_on_startup(store)
+    assert loaded is not None and store.collection.count() == 3
+    assert json.loads(open(tmp_path / "fresh" / "active_collection.json").read())["active"] == loaded["active"]
+
+    # already populated: nothing to do
+    assert await snapshot.load_on_startup(store) is None
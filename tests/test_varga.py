@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+# (division, sidereal longitude, expected varga sign 0..11) from Parashara's tables
+REFERENCE = [
+    (1, 45.0, 1),      # 15° Taurus
+    (2, 10.0, 4),      # odd sign, first half: Leo (Sun)
+    (2, 20.0, 3),      # odd sign, second half: Cancer (Moon)
+    (2, 40.0, 3),      # even sign, first half: Cancer
+    (3, 25.0, 8),      # Aries 3rd decanate: Sagittarius
+    (4, 8.0, 3),       # Aries 2nd quarter: Cancer
+    (7, 30.0, 7),      # even sign starts from the 7th: Taurus -> Scorpio
+    (9, 45.0, 1),      # 15° Taurus, middle navamsa of a fixed sign: vargottama
+    (9, 95.0, 4),      # 5° Cancer, movable: 2nd from Cancer -> Leo
+    (10, 45.0, 2),     # even sign starts from the 9th (Capricorn), 6th part: Gemini
+    (12, 149.0, 3),    # 29° Leo: 12th from Leo
+    (16, 30.0, 4),     # fixed sign starts from Leo
+    (20, 30.0, 8),     # fixed sign starts from Sagittarius
+    (24, 0.0, 4),      # odd sign starts from Leo
+    (24, 30.0, 3),     # even sign starts from Cancer
+    (27, 30.0, 3),     # earth sign starts from Cancer
+    (30, 3.0, 0),      # odd sign 0-5°: Mars -> Aries
+    (30, 7.0, 10),     # odd sign 5-10°: Saturn -> Aquarius
+    (30, 33.0, 1),     # even sign 0-5°: Venus -> Taurus
+    (30, 57.0, 7),     # even sign 25-30°: Mars -> Scorpio
+    (40, 30.0, 6),     # even sign starts from Libra
+    (45, 120.0, 4),    # fixed sign starts from Leo
+    (60, 0.4, 0),
+    (60, 29.9, 11),    # 60th part of Aries
+]
+
+
+@pytest.mark.parametrize("division, longitude, expected", REFERENCE)
+def test_varga_signs_match_reference_values(division, longitude, expected):
+    from app.varga import varga_signs
+
+    assert int(varga_signs(longitude, division)) == expected
+
+
+def test_continuous_vargas_match_their_closed_form():
+    from app.varga import varga_signs
+
+    # for these divisions the rules reduce to counting parts from 0° Aries
+    lon = np.random.default_rng(0).uniform(0, 360, 20000)
+    for d in (9, 16, 20, 27):
+        assert (varga_signs(lon, d) == np.floor(lon * d / 30.0) % 12).all()
+    # D9 vargottama: first navamsa of movable, middle of fixed, last of dual signs
+    rasi = np.arange(12)
+    centre = 30.0 * rasi + (10.0 / 3.0) * np.array([0, 4, 8] * 4) + 1.0
+    assert (varga_signs(centre, 9) == rasi).all()
+
+
+def test_compute_vargas_houses_and_interpret_chart_maps():
+    from app.logic_interpret import interpret_chart, load_house_lords_map
+    from app.varga import VARGAS, compute_vargas, varga_houses_maps
+
+    longitudes = np.array([[45.0, 95.0, 200.0, 30.0, 31.0, 250.0, 300.0, 10.0, 190.0]])
+    vargas = compute_vargas(longitudes, ascendant=[100.0])
+    assert set(vargas) == set(VARGAS)
+
+    d9 = vargas[9]
+    assert d9["ascendant"][0] == 6             # 10° Cancer -> Libra navamsa
+    assert d9["houses"][0, 0] == 8             # Sun in Taurus navamsa: 8th from Libra
+    assert (vargas[1]["houses"] == (longitudes // 30 - 3) % 12 + 1).all()
+
+    maps = varga_houses_maps({9: d9})
+    assert maps["D9"][0]["8"][0] == "Sun"
+    out = interpret_chart({"houses": maps["D9"][0]}, load_house_lords_map("app/domain/house_lords.json"))
+    assert len(out["interpretations"]) == 9
+
+
+def test_unsupported_division_is_rejected():
+    from app.varga import varga_signs
+
+    with pytest.raises(ValueError):
+        varga_signs([10.0], 5)